@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from core.config import Settings, get_settings
+from core.http_metrics import render_metrics
+
+router = APIRouter(tags=["metrics"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics(settings: Settings = Depends(get_settings)) -> PlainTextResponse:
+    return PlainTextResponse(render_metrics(settings), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,23 +1,35 @@
 from __future__ import annotations
 
+import math
 from functools import lru_cache
 from pathlib import Path
-from typing import AsyncIterator, Callable, Any
+from typing import Callable, Any
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.agents.catalog_agent import CatalogAgent
 from app.agents.llm_agent import LLMAgent
 from app.agents.orchestration import HandoffOrchestration
 from app.agents.search_agent import SearchAgent
 from core.ai_kernel import get_kernel, load_prompt_config
+from core.answer_cache import get_answer_cache
 from core.config import Settings, get_settings
 from core.db import get_session
+from core.llm_governor import (
+    DeadlineExceededError,
+    LLMUnavailableError,
+    QueueFullError,
+    get_llm_governor,
+)
+from core.sse import event_stream_response, format_event
 from domain.models import (
     AIHandoffRequest,
     AIHandoffResponse,
+    AISummaryBatchRequest,
     AISummaryRequest,
+    SummaryBatchOut,
     SummaryOut,
 )
 from domain.services import AIService, DomainError, FilmService, MissingDependencyError, NotFoundError
@@ -25,8 +37,8 @@ from domain.services import AIService, DomainError, FilmService, MissingDependen
 router = APIRouter(tags=["ai"])
 
 
-def _prompt_folder() -> Path:
-    return Path(__file__).resolve().parents[2] / "core" / "prompts" / "summary"
+def _prompt_folder(name: str = "summary") -> Path:
+    return Path(__file__).resolve().parents[2] / "core" / "prompts" / name
 
 
 @lru_cache()
@@ -34,6 +46,11 @@ def _summary_prompt_config() -> dict[str, Any]:
     return load_prompt_config(_prompt_folder())
 
 
+@lru_cache()
+def _batch_summary_prompt_config() -> dict[str, Any]:
+    return load_prompt_config(_prompt_folder("summary_batch"))
+
+
 def _kernel_provider(settings: Settings) -> Callable[[], Any]:
     def _provider() -> Any:
         return get_kernel(settings)
@@ -49,19 +66,46 @@ def get_ai_service(
     settings: Settings = Depends(get_settings),
     film_service: FilmService = Depends(get_film_service),
 ) -> AIService:
-    return AIService(_kernel_provider(settings), _summary_prompt_config(), film_service)
+    return AIService(
+        _kernel_provider(settings),
+        _summary_prompt_config(),
+        film_service,
+        answer_cache=get_answer_cache(settings),
+        governor=get_llm_governor(settings),
+        batch_summary_prompt=_batch_summary_prompt_config(),
+    )
+
+
+def _unavailable(exc: LLMUnavailableError) -> HTTPException:
+    if isinstance(exc, QueueFullError):
+        status_code = status.HTTP_429_TOO_MANY_REQUESTS
+    elif isinstance(exc, DeadlineExceededError):
+        status_code = status.HTTP_504_GATEWAY_TIMEOUT
+    else:
+        status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    headers = None
+    if exc.retry_after is not None:
+        headers = {"Retry-After": str(max(1, math.ceil(exc.retry_after)))}
+    return HTTPException(status_code=status_code, detail=str(exc), headers=headers)
 
 
 def get_handoff_orchestration(
     film_service: FilmService = Depends(get_film_service),
     ai_service: AIService = Depends(get_ai_service),
+    settings: Settings = Depends(get_settings),
 ) -> HandoffOrchestration:
     search_agent = SearchAgent(film_service)
+    catalog_agent = CatalogAgent(film_service, min_score=settings.catalog_min_score)
 
     def _llm_factory() -> LLMAgent:
         return LLMAgent(ai_service)
 
-    return HandoffOrchestration(search_agent, _llm_factory)
+    return HandoffOrchestration(
+        search_agent,
+        _llm_factory,
+        speculative=settings.handoff_speculative_llm,
+        catalog_agent=catalog_agent,
+    )
 
 
 @router.get(
@@ -69,11 +113,16 @@ def get_handoff_orchestration(
     summary="Stream AI answer for a question",
 )
 async def ai_ask(
+    request: Request,
     question: str = Query(..., min_length=1),
     service: AIService = Depends(get_ai_service),
+    settings: Settings = Depends(get_settings),
 ) -> StreamingResponse:
     try:
         service.ensure_ready()
+        service.ensure_capacity("ask", question)
+    except LLMUnavailableError as exc:
+        raise _unavailable(exc) from exc
     except (MissingDependencyError, ImportError) as exc:
         raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(exc)) from exc
     except DomainError as exc:
@@ -81,11 +130,7 @@ async def ai_ask(
     except Exception as exc:
         raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(exc)) from exc
 
-    async def event_stream() -> AsyncIterator[str]:
-        async for chunk in service.ask(question):
-            yield f"data: {chunk}\n\n"
-
-    return StreamingResponse(event_stream(), media_type="text/event-stream")
+    return event_stream_response(service.ask(question), request, settings, stream="ask")
 
 
 @router.post(
@@ -101,6 +146,8 @@ async def ai_summary(
         summary = await service.summary(payload.film_id)
     except NotFoundError as exc:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
+    except LLMUnavailableError as exc:
+        raise _unavailable(exc) from exc
     except (MissingDependencyError, ImportError) as exc:
         raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(exc)) from exc
     except DomainError as exc:
@@ -111,6 +158,32 @@ async def ai_summary(
     return summary
 
 
+@router.post(
+    "/ai/summary/batch",
+    response_model=SummaryBatchOut,
+    summary="Return structured summaries for many films, several per LLM call",
+)
+async def ai_summary_batch(
+    payload: AISummaryBatchRequest,
+    service: AIService = Depends(get_ai_service),
+    settings: Settings = Depends(get_settings),
+) -> SummaryBatchOut:
+    try:
+        return await service.summary_batch(
+            payload.film_ids,
+            batch_size=settings.summary_batch_size,
+            max_attempts=settings.summary_batch_max_attempts,
+        )
+    except LLMUnavailableError as exc:
+        raise _unavailable(exc) from exc
+    except (MissingDependencyError, ImportError) as exc:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(exc)) from exc
+    except DomainError as exc:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(exc)) from exc
+    except Exception as exc:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(exc)) from exc
+
+
 @router.post(
     "/ai/handoff",
     response_model=AIHandoffResponse,
@@ -122,6 +195,8 @@ async def ai_handoff(
 ) -> AIHandoffResponse:
     try:
         agent, answer = await orchestration.handle(payload.question)
+    except LLMUnavailableError as exc:
+        raise _unavailable(exc) from exc
     except (MissingDependencyError, ImportError) as exc:
         raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(exc)) from exc
     except DomainError as exc:
@@ -130,3 +205,41 @@ async def ai_handoff(
         raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(exc)) from exc
 
     return AIHandoffResponse(agent=agent, answer=answer)
+
+
+@router.post(
+    "/ai/handoff/stream",
+    summary="Stream the SearchAgent or LLMAgent answer as server-sent events",
+)
+async def ai_handoff_stream(
+    payload: AIHandoffRequest,
+    request: Request,
+    orchestration: HandoffOrchestration = Depends(get_handoff_orchestration),
+    settings: Settings = Depends(get_settings),
+) -> StreamingResponse:
+    try:
+        agent, chunks = await orchestration.stream(payload.question)
+    except LLMUnavailableError as exc:
+        raise _unavailable(exc) from exc
+    except (MissingDependencyError, ImportError) as exc:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(exc)) from exc
+    except DomainError as exc:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(exc)) from exc
+    except Exception as exc:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(exc)) from exc
+
+    return event_stream_response(
+        chunks,
+        request,
+        settings,
+        stream="handoff",
+        preamble=[format_event("agent", agent)],
+    )
+
+
+@router.get(
+    "/ai/status",
+    summary="Report LLM concurrency, queue depth and circuit breaker state",
+)
+async def ai_status(settings: Settings = Depends(get_settings)) -> dict[str, Any]:
+    return get_llm_governor(settings).snapshot()
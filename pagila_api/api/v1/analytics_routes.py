@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import Settings, get_settings
+from core.db import ShardSessions, get_session, get_shard_sessions
+from domain.models import CategorySalesOut, StoreSalesOut
+from domain.services import AnalyticsService, DataNotReadyError
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+
+def get_analytics_service(
+    session: AsyncSession = Depends(get_session),
+    shards: ShardSessions = Depends(get_shard_sessions),
+    settings: Settings = Depends(get_settings),
+) -> AnalyticsService:
+    if shards.sharded:
+        # The views aggregate the catalog's payments and rentals, which are empty once sharded.
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="sales analytics are not available when stores are sharded",
+        )
+    interval = settings.analytics_refresh_seconds
+    # One missed refresh is tolerated before the data is reported as stale.
+    return AnalyticsService(session, stale_after=2 * interval if interval else None)
+
+
+def _not_ready(exc: DataNotReadyError) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(exc),
+        headers={"Retry-After": "30"},
+    )
+
+
+@router.get(
+    "/sales-by-category",
+    response_model=CategorySalesOut,
+    summary="Total sales per film category, from the rental_by_category materialized view",
+)
+async def sales_by_category(
+    service: AnalyticsService = Depends(get_analytics_service),
+) -> CategorySalesOut:
+    try:
+        return await service.sales_by_category()
+    except DataNotReadyError as exc:
+        raise _not_ready(exc) from exc
+
+
+@router.get(
+    "/sales-by-store",
+    response_model=StoreSalesOut,
+    summary="Total sales per store, from the sales_by_store_mv materialized view",
+)
+async def sales_by_store(
+    service: AnalyticsService = Depends(get_analytics_service),
+) -> StoreSalesOut:
+    try:
+        return await service.sales_by_store()
+    except DataNotReadyError as exc:
+        raise _not_ready(exc) from exc
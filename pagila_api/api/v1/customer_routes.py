@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, status
+
+from core.auth import require_admin_token
+from core.db import ShardSessions, get_shard_sessions
+from domain.models import CustomerBalanceOut, CustomerBalancesOut
+from domain.services import NotFoundError
+from domain.sharding import ShardedBalanceService, ShardRouter
+
+router = APIRouter(
+    prefix="/customers", tags=["customers"], dependencies=[Depends(require_admin_token)]
+)
+
+MAX_BALANCE_IDS = 500
+
+
+def get_balance_service(
+    shards: ShardSessions = Depends(get_shard_sessions),
+) -> ShardedBalanceService:
+    return ShardedBalanceService(ShardRouter(shards))
+
+
+@router.get(
+    "/balances",
+    response_model=CustomerBalancesOut,
+    summary="Get the balances of several customers",
+)
+async def customer_balances(
+    customer_id: list[int] = Query(..., description="Customer id; repeatable."),
+    service: ShardedBalanceService = Depends(get_balance_service),
+) -> CustomerBalancesOut:
+    if len(customer_id) > MAX_BALANCE_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"At most {MAX_BALANCE_IDS} customers per request.",
+        )
+    return await service.balances(customer_id)
+
+
+@router.get(
+    "/{customer_id}/balance",
+    response_model=CustomerBalanceOut,
+    summary="Get what a customer owes",
+)
+async def customer_balance(
+    customer_id: int = Path(..., ge=1),
+    service: ShardedBalanceService = Depends(get_balance_service),
+) -> CustomerBalanceOut:
+    try:
+        return await service.balance(customer_id)
+    except NotFoundError as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
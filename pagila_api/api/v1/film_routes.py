@@ -1,26 +1,115 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, status
 
-from core.db import get_session
-from domain.models import FilmListParams, FilmOut, Paginated
-from domain.services import FilmService
+from core.db import ShardSessions, get_shard_sessions
+from domain.models import (
+    FILM_EXPANSIONS,
+    AlsoRentedOut,
+    FilmDetailOut,
+    FilmListParams,
+    Paginated,
+    SimilarFilmsOut,
+)
+from domain.services import FilmService, NotFoundError
 
 router = APIRouter(tags=["films"])
 
+MAX_SIMILAR_QUERIES = 20
+
+
+def get_film_service(shards: ShardSessions = Depends(get_shard_sessions)) -> FilmService:
+    """Film service reading the catalog, plus inventory and rentals from every store shard."""
+    return FilmService(shards.catalog, rental_sources=list(shards.shards().values()))
 
-def get_film_service(session: AsyncSession = Depends(get_session)) -> FilmService:
-    return FilmService(session)
+
+def get_expand(
+    expand: str | None = Query(
+        default=None,
+        description=f"Comma-separated relations to include: {', '.join(FILM_EXPANSIONS)}.",
+    ),
+) -> list[str]:
+    relations = [item.strip() for item in (expand or "").split(",") if item.strip()]
+    unknown = sorted(set(relations) - set(FILM_EXPANSIONS))
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Unknown expand value(s): {', '.join(unknown)}.",
+        )
+    return relations
 
 
 @router.get(
     "/films",
-    response_model=Paginated[FilmOut],
+    response_model=Paginated[FilmDetailOut],
+    response_model_exclude_unset=True,
     summary="List films with pagination and optional category filter",
 )
 async def list_films(
     params: FilmListParams = Depends(),
+    expand: list[str] = Depends(get_expand),
+    service: FilmService = Depends(get_film_service),
+) -> Paginated[FilmDetailOut]:
+    return await service.list_films(params, expand)
+
+
+@router.get(
+    "/films/similar",
+    response_model=list[SimilarFilmsOut],
+    summary="Find films similar to free-text queries or to existing films",
+)
+async def similar_films(
+    q: list[str] = Query(default_factory=list, description="Free-text query; repeatable."),
+    film_id: list[int] = Query(default_factory=list, description="Film id; repeatable."),
+    k: int = Query(default=5, ge=1, le=50),
+    service: FilmService = Depends(get_film_service),
+) -> list[SimilarFilmsOut]:
+    queries = [query for query in (item.strip() for item in q) if query]
+    if not queries and not film_id:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Provide at least one q or film_id parameter.",
+        )
+    if len(queries) + len(film_id) > MAX_SIMILAR_QUERIES:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"At most {MAX_SIMILAR_QUERIES} queries per request.",
+        )
+    try:
+        return await service.similar_films(queries, film_id, k)
+    except NotFoundError as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
+
+
+# Registered after /films/similar so that path is not captured as a film id.
+@router.get(
+    "/films/{film_id}",
+    response_model=FilmDetailOut,
+    response_model_exclude_unset=True,
+    summary="Get a film, optionally with its actors, categories, inventory, stock or language",
+)
+async def get_film(
+    film_id: int = Path(..., ge=1),
+    expand: list[str] = Depends(get_expand),
+    service: FilmService = Depends(get_film_service),
+) -> FilmDetailOut:
+    try:
+        return await service.get_film_or_raise(film_id, expand)
+    except NotFoundError as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
+
+
+@router.get(
+    "/films/{film_id}/also-rented",
+    response_model=AlsoRentedOut,
+    summary="Films most often rented by customers who rented this film",
+)
+async def also_rented(
+    film_id: int = Path(..., ge=1),
+    k: int = Query(default=10, ge=1, le=50),
     service: FilmService = Depends(get_film_service),
-) -> Paginated[FilmOut]:
-    return await service.list_films(params)
+) -> AlsoRentedOut:
+    try:
+        return await service.also_rented(film_id, k)
+    except NotFoundError as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
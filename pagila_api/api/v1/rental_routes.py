@@ -1,18 +1,38 @@
 from __future__ import annotations
 
 from fastapi import APIRouter, Depends, HTTPException, Path, status
-from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.auth import require_admin_token
-from core.db import get_session
-from domain.models import RentalCreate, RentalCreatedResponse
-from domain.services import NotFoundError, RentalService
+from core.db import ShardSessions, get_shard_sessions
+from domain.models import (
+    PaymentCreate,
+    PaymentCreatedResponse,
+    RentalCreate,
+    RentalCreatedResponse,
+    RentalReturnedResponse,
+)
+from domain.services import ConflictError, NotFoundError, RentalService
+from domain.sharding import ShardRouter
 
 router = APIRouter(tags=["rentals"])
 
 
-def get_rental_service(session: AsyncSession = Depends(get_session)) -> RentalService:
-    return RentalService(session)
+async def get_rental_service(
+    customer_id: int = Path(..., ge=1),
+    shards: ShardSessions = Depends(get_shard_sessions),
+) -> RentalService:
+    """A rental service bound to the shard that owns ``customer_id``."""
+    return RentalService(await ShardRouter(shards).customer_session(customer_id))
+
+
+async def get_return_service(
+    rental_id: int = Path(..., ge=1),
+    shards: ShardSessions = Depends(get_shard_sessions),
+) -> RentalService:
+    try:
+        return RentalService(await ShardRouter(shards).rental_session(rental_id))
+    except ConflictError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc)) from exc
 
 
 @router.post(
@@ -31,3 +51,41 @@ async def create_rental(
         return await service.create_rental(customer_id, payload)
     except NotFoundError as exc:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
+
+
+@router.post(
+    "/rentals/{rental_id}/return",
+    response_model=RentalReturnedResponse,
+    dependencies=[Depends(require_admin_token)],
+    summary="Return a rental and charge any late fee",
+)
+async def return_rental(
+    rental_id: int = Path(..., ge=1),
+    service: RentalService = Depends(get_return_service),
+) -> RentalReturnedResponse:
+    try:
+        return await service.return_rental(rental_id)
+    except NotFoundError as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
+    except ConflictError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc)) from exc
+
+
+@router.post(
+    "/customers/{customer_id}/payments",
+    status_code=status.HTTP_201_CREATED,
+    response_model=PaymentCreatedResponse,
+    dependencies=[Depends(require_admin_token)],
+    summary="Record a payment from a customer",
+)
+async def create_payment(
+    customer_id: int = Path(..., ge=1),
+    payload: PaymentCreate = ...,
+    service: RentalService = Depends(get_rental_service),
+) -> PaymentCreatedResponse:
+    try:
+        return await service.create_payment(customer_id, payload)
+    except NotFoundError as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
+    except ConflictError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc)) from exc
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException, Path, status
+
+from core.config import Settings, get_settings
+from core.db import ShardSessions, get_shard_sessions
+from domain.models import AvailabilityRequest, StoreAvailabilityOut
+from domain.services import NotFoundError, StockService
+
+router = APIRouter(prefix="/stores", tags=["stores"])
+
+
+def get_stock_service(
+    store_id: int = Path(..., ge=1),
+    shards: ShardSessions = Depends(get_shard_sessions),
+    settings: Settings = Depends(get_settings),
+) -> StockService:
+    try:
+        session = shards.for_store(store_id)
+    except LookupError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=f"store not found: {store_id}"
+        ) from exc
+    return StockService(
+        session,
+        use_table=settings.stock_table_enabled,
+        sources=list(shards.shards().values()),
+    )
+
+
+@router.post(
+    "/{store_id}/availability",
+    response_model=StoreAvailabilityOut,
+    summary="Count the copies of many films on the shelf at a store",
+)
+async def store_availability(
+    store_id: int = Path(..., ge=1),
+    payload: AvailabilityRequest = ...,
+    service: StockService = Depends(get_stock_service),
+) -> StoreAvailabilityOut:
+    try:
+        return await service.availability(store_id, payload.film_ids)
+    except NotFoundError as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import re
+from typing import Optional
+
+from domain.services import FilmService
+
+_CATALOG_INTENT = re.compile(r"\b(?:films?|movies?)\b", flags=re.IGNORECASE)
+_RECOMMEND_INTENT = re.compile(
+    r"\b(?:recommend\w*|suggest\w*|also rent\w*|similar to|if i (?:liked?|loved?))\b",
+    flags=re.IGNORECASE,
+)
+
+
+class CatalogAgent:
+    """Answers catalog questions locally instead of asking the LLM.
+
+    "Which film is about ..." is answered from the similarity index; "what
+    would you recommend if I liked ..." from the co-rental matrix, for the
+    film the question best matches.
+    """
+
+    def __init__(self, film_service: FilmService, min_score: float, k: int = 3):
+        self._film_service = film_service
+        self._min_score = min_score
+        self._k = k
+
+    async def try_answer(self, question: str) -> Optional[str]:
+        recommend = _RECOMMEND_INTENT.search(question) is not None
+        if not recommend and not _CATALOG_INTENT.search(question):
+            return None
+
+        [result] = await self._film_service.similar_films([question], [], self._k)
+        matches = [item for item in result.items if item.score >= self._min_score]
+        if not matches:
+            return None
+
+        if recommend:
+            also = await self._film_service.also_rented(matches[0].film_id, self._k)
+            if also.items:
+                titles = ", ".join(item.title for item in also.items)
+                return f"Customers who rented {matches[0].title} also rented: {titles}."
+
+        titles = ", ".join(item.title for item in matches)
+        return f"Closest matches in the catalog: {titles}."
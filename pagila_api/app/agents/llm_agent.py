@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from collections.abc import AsyncIterator
+
 from domain.services import AIService, DomainError
 
 
@@ -11,10 +13,14 @@ class LLMAgent:
 
     async def answer(self, question: str) -> str:
         chunks: list[str] = []
-        async for chunk in self._ai_service.ask(question):
+        async for chunk in self._ai_service.ask(question, route="handoff"):
             chunks.append(chunk)
 
         response = "".join(chunks).strip()
         if not response:
             raise DomainError("LLM produced an empty response.")
         return response
+
+    async def stream(self, question: str) -> AsyncIterator[str]:
+        async for chunk in self._ai_service.ask(question, route="handoff"):
+            yield chunk
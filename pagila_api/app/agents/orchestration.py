@@ -1,23 +1,150 @@
 from __future__ import annotations
 
-from typing import Callable
+import asyncio
+import contextlib
+from collections.abc import AsyncIterator
+from typing import Callable, Optional
 
+from domain.services import DomainError
+
+from .catalog_agent import CatalogAgent
 from .llm_agent import LLMAgent
 from .search_agent import SearchAgent
 
+_END = object()
+
+
+class _Prefetch:
+    """Runs an async iterator in its own task, buffering items until they are consumed."""
+
+    def __init__(self, source: AsyncIterator[str]):
+        self._queue: asyncio.Queue[object] = asyncio.Queue()
+        self._task = asyncio.create_task(self._pump(source))
+
+    async def _pump(self, source: AsyncIterator[str]) -> None:
+        try:
+            async for item in source:
+                self._queue.put_nowait(item)
+        except Exception as exc:
+            self._queue.put_nowait(exc)
+        else:
+            self._queue.put_nowait(_END)
+
+    def __aiter__(self) -> _Prefetch:
+        return self
+
+    async def __anext__(self) -> str:
+        item = await self._queue.get()
+        if item is _END:
+            self._queue.put_nowait(_END)
+            raise StopAsyncIteration
+        if isinstance(item, Exception):
+            raise item
+        return item  # type: ignore[return-value]
+
+    async def aclose(self) -> None:
+        if not self._task.done():
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+
+
+async def _single(answer: str) -> AsyncIterator[str]:
+    yield answer
+
+
+async def _prepend(first: str, rest: AsyncIterator[str]) -> AsyncIterator[str]:
+    try:
+        yield first
+        async for chunk in rest:
+            yield chunk
+    finally:
+        await rest.aclose()  # type: ignore[attr-defined]
+
+
+async def _cancel(task: asyncio.Task) -> None:
+    task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await task
+
 
 class HandoffOrchestration:
-    """Coordinates SearchAgent and LLMAgent according to the assignment specification."""
+    """Coordinates the search, catalog and LLM agents according to the assignment specification.
 
-    def __init__(self, search_agent: SearchAgent, llm_factory: Callable[[], LLMAgent]):
+    Local agents are tried in order and the LLM is only used when none of
+    them answers. With ``speculative`` enabled the LLM starts while the local
+    agents are still running and is cancelled as soon as one of them answers,
+    so a miss no longer pays for the lookups and the completion back to back.
+    """
+
+    def __init__(
+        self,
+        search_agent: SearchAgent,
+        llm_factory: Callable[[], LLMAgent],
+        speculative: bool = False,
+        catalog_agent: Optional[CatalogAgent] = None,
+    ):
         self._search_agent = search_agent
+        self._catalog_agent = catalog_agent
         self._llm_factory = llm_factory
+        self._speculative = speculative
 
-    async def handle(self, question: str) -> tuple[str, str]:
+    async def _local_answer(self, question: str) -> Optional[tuple[str, str]]:
         search_answer = await self._search_agent.try_answer(question)
         if search_answer:
             return "SearchAgent", search_answer
+        if self._catalog_agent is not None:
+            catalog_answer = await self._catalog_agent.try_answer(question)
+            if catalog_answer:
+                return "CatalogAgent", catalog_answer
+        return None
+
+    async def handle(self, question: str) -> tuple[str, str]:
+        if not self._speculative:
+            local = await self._local_answer(question)
+            if local:
+                return local
+
+            llm_agent = self._llm_factory()
+            answer = await llm_agent.answer(question)
+            return "LLMAgent", answer
+
+        llm_task = asyncio.create_task(self._llm_factory().answer(question))
+        try:
+            local = await self._local_answer(question)
+        except BaseException:
+            await _cancel(llm_task)
+            raise
+        if local:
+            await _cancel(llm_task)
+            return local
+        return "LLMAgent", await llm_task
+
+    async def stream(self, question: str) -> tuple[str, AsyncIterator[str]]:
+        """Choose the answering agent and return its answer as a stream of chunks.
+
+        On the LLM path the first chunk is awaited before returning, so
+        refusals and upstream errors surface before a response is started.
+        """
+        speculative = _Prefetch(self._llm_factory().stream(question)) if self._speculative else None
+        try:
+            local = await self._local_answer(question)
+        except BaseException:
+            if speculative is not None:
+                await speculative.aclose()
+            raise
+        if local:
+            if speculative is not None:
+                await speculative.aclose()
+            agent, answer = local
+            return agent, _single(answer)
 
-        llm_agent = self._llm_factory()
-        answer = await llm_agent.answer(question)
-        return "LLMAgent", answer
+        source = speculative if speculative is not None else self._llm_factory().stream(question)
+        try:
+            first = await anext(source)
+        except StopAsyncIteration:
+            raise DomainError("LLM produced an empty response.") from None
+        except BaseException:
+            await source.aclose()  # type: ignore[union-attr]
+            raise
+        return "LLMAgent", _prepend(first, source)
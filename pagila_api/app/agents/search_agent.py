@@ -7,6 +7,14 @@ from typing import Optional
 from domain.models import FilmOut
 from domain.services import FilmService
 
+_QUOTED_TITLE = re.compile(r'"([^"]+)"')
+_FILM_PHRASE = re.compile(r"\bfilm(s)?\s+([^?.!]+)", flags=re.IGNORECASE)
+_PARENTHETICAL = re.compile(r"\(.*?\)")
+_CLAUSE_BREAK = re.compile(r"[?.!,]")
+_TITLE_SEPARATOR = re.compile(r"\s*(?:,|&|\band\b|\bvs\.?|\bversus\b)\s*", flags=re.IGNORECASE)
+
+MAX_TITLES = 10
+
 
 class SearchAgent:
     """Attempts to answer questions about specific films by querying the database."""
@@ -15,19 +23,31 @@ class SearchAgent:
         self._film_service = film_service
 
     async def try_answer(self, question: str) -> Optional[str]:
-        if "film" not in question.lower():
+        titles = self._extract_titles(question)
+        if not titles:
             return None
 
-        title = self._extract_title(question)
-        if not title:
+        films = await self._film_service.find_by_titles(titles)
+        if not films:
             return None
 
-        film: Optional[FilmOut] = await self._film_service.find_by_title(title)
-        if film is None:
-            return None
+        found = list({film.film_id: film for film in films.values()}.values())
+        sentences = [self._describe(film) for film in found]
+        if len(found) > 1:
+            cheapest = min(found, key=lambda film: film.rental_rate)
+            if any(film.rental_rate != cheapest.rental_rate for film in found):
+                sentences.append(f"{cheapest.title} is the cheapest to rent.")
+        missing = [title for title in titles if title not in films]
+        if missing and _QUOTED_TITLE.search(question):
+            sentences.append(
+                "No film matched " + ", ".join(f'"{title}"' for title in missing) + "."
+            )
+        return " ".join(sentences)
 
+    @classmethod
+    def _describe(cls, film: FilmOut) -> str:
         category = film.category or "Unknown"
-        rate = self._format_rate(film.rental_rate)
+        rate = cls._format_rate(film.rental_rate)
         return f"{film.title} ({category}) rents for ${rate}."
 
     @staticmethod
@@ -35,21 +55,28 @@ class SearchAgent:
         return f"{rate:.2f}"
 
     @staticmethod
-    def _extract_title(question: str) -> Optional[str]:
+    def _extract_titles(question: str) -> list[str]:
+        """Return candidate titles: every quoted phrase, else the text after "film(s)".
+
+        Quoted titles are trusted without the word "film" being present, which
+        lets comparisons such as ``compare "A" and "B"`` skip the LLM.
+        """
         text = question.strip()
         if not text:
-            return None
+            return []
 
-        quoted = re.findall(r'"([^"]+)"', text)
+        quoted = [title.strip() for title in _QUOTED_TITLE.findall(text) if title.strip()]
         if quoted:
-            return quoted[0].strip()
+            return list(dict.fromkeys(quoted))[:MAX_TITLES]
 
-        match = re.search(r"film\s+([^?.!]+)", text, flags=re.IGNORECASE)
+        match = _FILM_PHRASE.search(text)
         if not match:
-            return None
+            return []
 
-        candidate = match.group(1)
-        candidate = re.sub(r"\(.*?\)", "", candidate)
-        candidate = re.split(r"[?.!,]", candidate)[0]
-        candidate = candidate.strip(" '\"")
-        return candidate or None
+        candidate = _PARENTHETICAL.sub("", match.group(2))
+        if match.group(1):
+            parts = _TITLE_SEPARATOR.split(candidate)
+        else:
+            parts = [_CLAUSE_BREAK.split(candidate)[0]]
+        titles = [part.strip(" '\"") for part in parts]
+        return list(dict.fromkeys(title for title in titles if title))[:MAX_TITLES]
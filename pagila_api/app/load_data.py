@@ -0,0 +1,251 @@
+"""Bulk-load the Pagila dataset: ``poetry run load-data [--database-url URL] [--jobs N]``.
+
+Postgres targets are loaded in three steps:
+
+1. Apply the pre-data part of ``pagila-schema.sql``: types, tables,
+   functions and views, with no indexes, constraints or triggers.
+2. Stream every COPY section of ``pagila-data.sql`` with asyncpg's
+   ``COPY FROM STDIN``, one pooled connection per section and up to
+   ``--jobs`` at a time. Without constraints there is no load order, so
+   independent tables and the ``payment_p2022_*`` partitions go in parallel.
+3. Apply the post-data part. Indexes, keys and triggers are built in
+   parallel, one table per connection. Foreign keys follow one at a time,
+   because Pagila's keys reference each other in a cycle (store <-> staff)
+   and concurrent ``ADD CONSTRAINT`` calls on such a pair can deadlock.
+   Finally, reset the sequences, refresh materialized views and ANALYZE.
+
+With ``--data-only`` the schema is assumed to exist, complete with
+constraints, so sections load one after another in dump order.
+
+SQLite targets (``sqlite+aiosqlite://...``) get the SQLModel tables, filled
+with batched ``executemany`` while journaling is relaxed; indexes are created
+after the rows and the ``customer_balance`` ledger is rebuilt from them.
+Useful for quick local and test fixtures.
+
+Run ``alembic upgrade head`` afterwards to add this app's own tables and
+columns on top of the Pagila schema; its ``customer_balance`` migration
+backfills the ledger from the loaded rows.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import io
+import os
+import time
+from collections import defaultdict
+from collections.abc import Awaitable, Callable, Iterable
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy.engine import make_url
+
+from core.logging import get_logger
+from core.pagila_dump import (
+    DEFAULT_DUMP_PATH,
+    DEFAULT_SCHEMA_PATH,
+    CopySection,
+    read_copy_blocks,
+    read_copy_sections,
+    sequence_resets,
+    split_schema,
+    statement_table,
+)
+
+
+async def _timed(step: str, action: Callable[[], Awaitable[Any]]) -> Any:
+    started = time.perf_counter()
+    result = await action()
+    get_logger().info(
+        "load_step_done", step=step, duration_ms=round((time.perf_counter() - started) * 1000, 1)
+    )
+    return result
+
+
+def _asyncpg_dsn(database_url: str) -> str:
+    return make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+async def _run_each(pool: Any, statements: Iterable[str]) -> None:
+    async with pool.acquire() as conn:
+        for statement in statements:
+            await conn.execute(statement)
+
+
+async def _copy_section(pool: Any, section: CopySection) -> int:
+    async with pool.acquire() as conn:
+        await conn.copy_to_table(
+            section.table,
+            source=io.BytesIO(section.data.encode("utf-8")),
+            columns=section.columns,
+            schema_name=section.schema,
+            format="text",
+        )
+    return section.data.count("\n")
+
+
+async def load_postgres(
+    database_url: str,
+    *,
+    schema_path: Path = DEFAULT_SCHEMA_PATH,
+    data_path: Path = DEFAULT_DUMP_PATH,
+    jobs: int = 8,
+    data_only: bool = False,
+) -> dict[str, int]:
+    import asyncpg
+
+    schema = split_schema(schema_path.read_text(encoding="utf-8"))
+
+    async def init(conn: Any) -> None:
+        for statement in schema.session:
+            await conn.execute(statement)
+
+    pool = await asyncpg.create_pool(
+        _asyncpg_dsn(database_url), min_size=1, max_size=jobs, init=init
+    )
+    loaded: dict[str, int] = {}
+    try:
+        if not data_only:
+            await _timed("pre_data", lambda: _run_each(pool, [";\n".join(schema.pre_data)]))
+
+        async def load_sections() -> None:
+            sections = list(read_copy_sections(data_path))
+            if data_only:
+                counts = [await _copy_section(pool, section) for section in sections]
+            else:
+                limit = asyncio.Semaphore(jobs)
+
+                async def copy(section: CopySection) -> int:
+                    async with limit:
+                        return await _copy_section(pool, section)
+
+                counts = await asyncio.gather(*(copy(section) for section in sections))
+            for section, count in zip(sections, counts):
+                loaded[section.table] = count
+
+        await _timed("data", load_sections)
+
+        if not data_only:
+            foreign_keys = [s for s in schema.post_data if "FOREIGN KEY" in s.upper()]
+            by_table: dict[str | None, list[str]] = defaultdict(list)
+            for statement in schema.post_data:
+                if statement not in foreign_keys:
+                    by_table[statement_table(statement)].append(statement)
+
+            async def post_data() -> None:
+                await asyncio.gather(*(_run_each(pool, group) for group in by_table.values()))
+                await _run_each(pool, foreign_keys)
+
+            await _timed("post_data", post_data)
+
+        async def finish() -> None:
+            resets = sequence_resets(data_path.read_text(encoding="utf-8"))
+            refreshes = [f"REFRESH MATERIALIZED VIEW {view}" for view in schema.materialized_views]
+            await _run_each(pool, [*resets, *refreshes, "ANALYZE"])
+
+        await _timed("finish", finish)
+    finally:
+        await pool.close()
+    return loaded
+
+
+async def load_sqlite(
+    database_url: str, *, data_path: Path = DEFAULT_DUMP_PATH, chunk_size: int = 5_000
+) -> dict[str, int]:
+    from sqlalchemy import event
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+    from sqlalchemy.schema import CreateTable
+    from sqlmodel import SQLModel
+
+    import domain.models  # noqa: F401  (registers the tables on SQLModel.metadata)
+    from core.pagila_dump import load_dump
+    from domain.repositories import CustomerBalanceRepository
+
+    tables = SQLModel.metadata.sorted_tables
+    engine = create_async_engine(database_url)
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _relax_durability(dbapi_connection: Any, connection_record: Any) -> None:
+        # A failed load is simply re-run, so skip fsyncs and the on-disk journal.
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode = MEMORY")
+        cursor.execute("PRAGMA synchronous = OFF")
+        cursor.close()
+
+    try:
+        async with engine.begin() as conn:
+            for table in tables:
+                await conn.execute(CreateTable(table, if_not_exists=True))
+
+        loaded = await _timed(
+            "data",
+            lambda: load_dump(engine, tables, read_copy_blocks(data_path), chunk_size=chunk_size),
+        )
+
+        async def create_indexes() -> None:
+            async with engine.begin() as conn:
+                for table in tables:
+                    for index in table.indexes:
+                        await conn.run_sync(index.create, checkfirst=True)
+
+        await _timed("post_data", create_indexes)
+
+        async def rebuild_balances() -> int:
+            async with AsyncSession(engine) as session, session.begin():
+                return await CustomerBalanceRepository(session).rebuild()
+
+        await _timed("balances", rebuild_balances)
+    finally:
+        await engine.dispose()
+    return loaded
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="load-data", description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--database-url",
+        default=os.environ.get("DATABASE_URL"),
+        help="Target database (default: DATABASE_URL).",
+    )
+    parser.add_argument("--schema", type=Path, default=DEFAULT_SCHEMA_PATH)
+    parser.add_argument("--data", type=Path, default=DEFAULT_DUMP_PATH)
+    parser.add_argument("--jobs", type=int, default=8, help="Parallel connections (Postgres).")
+    parser.add_argument(
+        "--data-only", action="store_true", help="Load rows into an existing Pagila schema."
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = _parse_args(argv)
+    if not args.database_url:
+        raise SystemExit("Set DATABASE_URL or pass --database-url.")
+
+    backend = make_url(args.database_url).get_backend_name()
+    started = time.perf_counter()
+    if backend == "postgresql":
+        loaded = asyncio.run(
+            load_postgres(
+                args.database_url,
+                schema_path=args.schema,
+                data_path=args.data,
+                jobs=args.jobs,
+                data_only=args.data_only,
+            )
+        )
+    elif backend == "sqlite":
+        loaded = asyncio.run(load_sqlite(args.database_url, data_path=args.data))
+    else:
+        raise SystemExit(f"Unsupported database backend: {backend}")
+
+    get_logger().info(
+        "load_complete",
+        rows=sum(loaded.values()),
+        tables=len(loaded),
+        duration_ms=round((time.perf_counter() - started) * 1000, 1),
+    )
+
+
+if __name__ == "__main__":
+    main()
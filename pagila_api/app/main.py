@@ -1,11 +1,96 @@
+import asyncio
+import contextlib
+from collections.abc import Awaitable, Callable
 from contextlib import asynccontextmanager
+from typing import TypeVar
 
 from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from core.ai_kernel import reset_kernel
 from core.config import Settings, get_settings
-from core.db import dispose_engine, init_engine
-from core.logging import configure_logging
-from api.v1 import ai_routes, film_routes, rental_routes
+from core.db import (
+    ShardSessions,
+    dispose_engine,
+    get_engine,
+    get_session_factory,
+    init_engine,
+)
+from core.http_client import close_http_client, warm_up_http_client
+from core.http_metrics import MetricsMiddleware, publish_metrics_periodically
+from core.logging import configure_logging, get_logger, shutdown_logging
+from core.query_stats import QueryStatsMiddleware
+from core.sse import drain_on_signals
+from domain.availability import set_stock_table
+from domain.corental import set_corental_matrix
+from domain.services import AnalyticsService, FilmService, StockService
+from api import metrics_routes
+from api.v1 import (
+    ai_routes,
+    analytics_routes,
+    customer_routes,
+    film_routes,
+    rental_routes,
+    store_routes,
+)
+from app.preload import preload
+
+T = TypeVar("T")
+
+
+async def _warm_similarity_index() -> None:
+    """Build the film similarity index up front; requests build it lazily if this fails."""
+    try:
+        async with get_session_factory()() as session:
+            index = await FilmService(session).similarity_index()
+    except Exception as exc:
+        get_logger().warning("similarity_index_warmup_failed", error=str(exc))
+    else:
+        get_logger().info("similarity_index_ready", films=len(index), dimensions=index.dimensions)
+
+
+async def _refresh_analytics_periodically(interval: float) -> None:
+    """Keep the analytics materialized views at most ``interval`` seconds old.
+
+    Every worker runs this loop; the advisory lock and ``min_age`` in
+    ``AnalyticsService.refresh`` make sure one refresh per interval does the work.
+    """
+    log = get_logger()
+    while True:
+        try:
+            async with get_session_factory()() as session:
+                refreshed = await AnalyticsService(session).refresh(min_age=interval / 2)
+        except Exception as exc:
+            log.warning("analytics_refresh_failed", error=str(exc))
+        else:
+            if refreshed:
+                log.info("analytics_refreshed", views=refreshed)
+        await asyncio.sleep(interval)
+
+
+async def _rebuild_periodically(
+    name: str,
+    interval: float,
+    build: Callable[[ShardSessions], Awaitable[T]],
+    install: Callable[[T], None],
+) -> None:
+    """Rebuild an in-process structure every ``interval`` seconds.
+
+    Picks up writes made by other workers; a failed rebuild keeps the old copy.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with ShardSessions() as shards:
+                built = await build(shards)
+        except Exception as exc:
+            get_logger().warning("rebuild_failed", structure=name, error=str(exc))
+        else:
+            install(built)
+
+
+def _shard_sources(shards: ShardSessions) -> list[AsyncSession]:
+    return list(shards.shards().values())
 
 
 @asynccontextmanager
@@ -13,8 +98,56 @@ async def lifespan(app: FastAPI):
     settings: Settings = get_settings()
     configure_logging(settings)
     init_engine(settings)
-    yield
+    if settings.similarity_index_enabled:
+        await _warm_similarity_index()
+    if settings.preload:
+        await preload(settings)
+    await warm_up_http_client(settings)
+    background: list[asyncio.Task] = []
+    if settings.metrics_multiproc_dir:
+        background.append(asyncio.create_task(publish_metrics_periodically(settings)))
+    if settings.analytics_refresh_seconds and get_engine().dialect.name == "postgresql":
+        background.append(
+            asyncio.create_task(_refresh_analytics_periodically(settings.analytics_refresh_seconds))
+        )
+    if settings.stock_table_enabled and settings.stock_refresh_seconds:
+        background.append(
+            asyncio.create_task(
+                _rebuild_periodically(
+                    "stock_table",
+                    settings.stock_refresh_seconds,
+                    lambda shards: StockService(
+                        shards.catalog, sources=_shard_sources(shards)
+                    ).build_table(),
+                    set_stock_table,
+                )
+            )
+        )
+    if settings.corental_refresh_seconds:
+        background.append(
+            asyncio.create_task(
+                _rebuild_periodically(
+                    "corental_matrix",
+                    settings.corental_refresh_seconds,
+                    lambda shards: FilmService(
+                        shards.catalog, rental_sources=_shard_sources(shards)
+                    ).build_corental_matrix(),
+                    set_corental_matrix,
+                )
+            )
+        )
+    with drain_on_signals():
+        yield
+    for task in background:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+    reset_kernel()
+    set_stock_table(None)
+    set_corental_matrix(None)
+    await close_http_client()
     await dispose_engine()
+    shutdown_logging()
 
 
 app = FastAPI(
@@ -23,6 +156,13 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(MetricsMiddleware)
+
+app.include_router(metrics_routes.router)
 app.include_router(film_routes.router, prefix="/v1")
 app.include_router(rental_routes.router, prefix="/v1")
+app.include_router(customer_routes.router, prefix="/v1")
+app.include_router(store_routes.router, prefix="/v1")
+app.include_router(analytics_routes.router, prefix="/v1")
 app.include_router(ai_routes.router, prefix="/v1")
@@ -0,0 +1,98 @@
+"""Warm-up run by each worker before it accepts traffic when ``PRELOAD=true``.
+
+The first requests after a deploy otherwise pay for opening pool
+connections, compiling the catalog queries, reading prompt files from disk
+and, on the AI routes, importing Semantic Kernel.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+
+from sqlalchemy import text
+
+from api.v1.ai_routes import _batch_summary_prompt_config, _summary_prompt_config
+from core.ai_kernel import get_kernel
+from core.config import Settings
+from core.db import ShardSessions, get_engine, get_session_factory
+from core.logging import get_logger
+from domain.models import FilmListParams
+from domain.services import FilmService, StockService
+
+
+async def warm_db_pool() -> int:
+    """Open as many connections as the pool keeps idle and hand them back."""
+    engine = get_engine()
+    size = getattr(engine.pool, "size", None)
+    connections = size() if callable(size) else 1
+
+    async def ping() -> None:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    await asyncio.gather(*(ping() for _ in range(connections)))
+    return connections
+
+
+async def warm_catalog_queries() -> None:
+    """Run each catalog query shape once so SQLAlchemy caches its compiled form."""
+    async with get_session_factory()() as session:
+        films = FilmService(session)
+        await films.list_films(FilmListParams())
+        await films.list_films(FilmListParams(category="Action"))
+        await films.get_summary_contexts([0])
+        await films.find_by_titles(["preload"])
+
+
+async def warm_stock_table(settings: Settings) -> None:
+    if not settings.stock_table_enabled:
+        return
+    async with ShardSessions() as shards:
+        sources = list(shards.shards().values())
+        await StockService(shards.catalog, sources=sources).stock_table()
+
+
+async def warm_corental_matrix() -> None:
+    async with ShardSessions() as shards:
+        sources = list(shards.shards().values())
+        await FilmService(shards.catalog, rental_sources=sources).corental_matrix()
+
+
+def warm_prompts() -> None:
+    _summary_prompt_config()
+    _batch_summary_prompt_config()
+
+
+def warm_kernel(settings: Settings) -> None:
+    if not settings.enable_ai:
+        return
+    get_kernel(settings)
+
+
+async def preload(settings: Settings) -> None:
+    """Run every warm-up step; a failing step is logged and skipped, never fatal."""
+    steps: list[tuple[str, Callable[[], Awaitable[object] | object]]] = [
+        ("db_pool", warm_db_pool),
+        ("catalog_queries", warm_catalog_queries),
+        ("stock_table", lambda: warm_stock_table(settings)),
+        ("corental_matrix", warm_corental_matrix),
+        ("prompts", warm_prompts),
+        ("kernel", lambda: warm_kernel(settings)),
+    ]
+    log = get_logger()
+    for name, step in steps:
+        started = time.perf_counter()
+        try:
+            result = step()
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception as exc:
+            log.warning("preload_step_failed", step=name, error=str(exc))
+        else:
+            log.info(
+                "preload_step_done",
+                step=name,
+                duration_ms=round((time.perf_counter() - started) * 1000, 1),
+            )
@@ -0,0 +1,87 @@
+"""Production entry point: ``poetry run serve [--workers N] [--no-preload]``.
+
+Runs ``app.main:app`` under uvicorn with ``WEB_CONCURRENCY`` worker
+processes, using uvloop and httptools when they are installed. Workers warm
+up before accepting traffic (see ``app.preload``) and, on SIGTERM/SIGINT,
+give open SSE streams ``SSE_DRAIN_SECONDS`` to finish before telling clients
+to reconnect.
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import os
+from collections.abc import Sequence
+from typing import Any
+
+import uvicorn
+
+from core.config import Settings, get_settings
+from core.logging import configure_logging, get_logger
+
+APP = "app.main:app"
+
+
+def _available(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def uvicorn_options(settings: Settings) -> dict[str, Any]:
+    # Leave headroom after the SSE drain for in-flight responses to be flushed and closed.
+    graceful_timeout = max(settings.shutdown_timeout_seconds, settings.sse_drain_seconds + 5)
+    return {
+        "host": settings.serve_host,
+        "port": settings.serve_port,
+        "workers": settings.web_concurrency,
+        "loop": "uvloop" if _available("uvloop") else "asyncio",
+        "http": "httptools" if _available("httptools") else "h11",
+        "lifespan": "on",
+        "timeout_graceful_shutdown": graceful_timeout,
+        "proxy_headers": True,
+        "log_config": None,
+    }
+
+
+def _parse_args(argv: Sequence[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="serve", description="Run the Mini Pagila API.")
+    parser.add_argument("--host", help="Bind address (HOST).")
+    parser.add_argument("--port", type=int, help="Bind port (PORT).")
+    parser.add_argument("--workers", type=int, help="Worker processes (WEB_CONCURRENCY).")
+    parser.add_argument(
+        "--no-preload",
+        dest="preload",
+        action="store_false",
+        help="Skip the warm-up step before accepting traffic.",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    args = _parse_args(argv)
+    # Workers are spawned and read their own settings, so overrides travel as environment.
+    overrides = {"HOST": args.host, "PORT": args.port, "WEB_CONCURRENCY": args.workers}
+    for name, value in overrides.items():
+        if value is not None:
+            os.environ[name] = str(value)
+    if not args.preload:
+        os.environ["PRELOAD"] = "false"
+    get_settings.cache_clear()
+    if "preload" not in get_settings().model_fields_set:
+        # Preload by default, unless PRELOAD is already set in the environment or .env.
+        os.environ["PRELOAD"] = "true"
+        get_settings.cache_clear()
+
+    settings = get_settings()
+    configure_logging(settings)
+    options = uvicorn_options(settings)
+    get_logger().info(
+        "serve_starting",
+        **{key: options[key] for key in ("host", "port", "workers", "loop", "http")},
+        preload=settings.preload,
+    )
+    uvicorn.run(APP, **options)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+"""Endpoint benchmarks against the real Pagila dataset and the fake LLM backend.
+
+Run with ``poetry run python -m bench --help``.
+"""
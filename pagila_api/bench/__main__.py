@@ -0,0 +1,150 @@
+"""``python -m bench``: seed the Pagila dataset, run the scenarios and write JSON results.
+
+Without ``--database-url`` a throwaway SQLite file is created and loaded from
+``pagila_sql/pagila-data.sql``. A Postgres URL is used as is; it is seeded
+from the same dump only if its ``film`` table is empty. AI scenarios run
+against ``LLM_BACKEND=fake`` (tune it with the usual ``FAKE_LLM_*``
+variables). With ``--baseline``, the exit status is 1 when any scenario's
+p50/p99 latency or throughput is worse than the baseline by more than
+``--tolerance``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import platform
+import sys
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+BENCH_ENVIRONMENT = {
+    "LLM_BACKEND": "fake",
+    "FAKE_LLM_TTFT_MS": "50",
+    "FAKE_LLM_TOKENS_PER_SECOND": "1000",
+    "FAKE_LLM_RESPONSE_TOKENS": "60",
+    "FAKE_LLM_SEED": "0",
+    "SQL_SLOW_QUERY_MS": "0",
+    "ADMIN_BEARER_TOKEN": "bench-token",
+}
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m bench", description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", help="Database to benchmark (default: fresh SQLite).")
+    parser.add_argument("--dump", type=Path, help="pg_dump data file to seed from.")
+    parser.add_argument("--scenario", action="append", help="Run only this scenario; repeatable.")
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests per scenario.")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=10, help="Unmeasured requests per scenario.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=Path("bench-results.json"))
+    parser.add_argument("--baseline", type=Path, help="Results file to compare against.")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25, help="Allowed regression (0.25 = 25%%)."
+    )
+    return parser.parse_args(argv)
+
+
+async def _prepare_database(dump: Path | None) -> dict[str, int]:
+    from sqlalchemy import func, select
+    from sqlmodel import SQLModel
+
+    from core.db import get_engine
+    from core.pagila_dump import DEFAULT_DUMP_PATH, load_dump, read_copy_blocks
+    from domain.models import Film
+
+    engine = get_engine()
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+        films = (await conn.execute(select(func.count()).select_from(Film))).scalar_one()
+    if films:
+        return {}
+    return await load_dump(
+        engine, SQLModel.metadata.sorted_tables, read_copy_blocks(dump or DEFAULT_DUMP_PATH)
+    )
+
+
+async def _run(args: argparse.Namespace) -> dict[str, Any]:
+    import httpx
+    import structlog
+
+    from app.main import app
+    from core.config import get_settings
+    from core.db import dispose_engine, get_engine, init_engine
+    from core.logging import configure_logging
+
+    from .runner import run_scenario
+    from .scenarios import select_scenarios
+
+    scenarios = select_scenarios(args.scenario)
+    settings = get_settings()
+    configure_logging(settings)
+    # Per-request info events (ours and httpx's) would dominate the measurement.
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+    logging.getLogger().setLevel(logging.WARNING)
+    init_engine(settings)
+    try:
+        loaded = await _prepare_database(args.dump)
+        results: dict[str, Any] = {
+            "meta": {
+                "started_at": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "database": get_engine().dialect.name,
+                "loaded_rows": loaded,
+                "requests": args.requests,
+                "concurrency": args.concurrency,
+                "seed": args.seed,
+                "fake_llm": {
+                    "ttft_ms": settings.fake_llm_ttft_ms,
+                    "tokens_per_second": settings.fake_llm_tokens_per_second,
+                    "response_tokens": settings.fake_llm_response_tokens,
+                },
+            },
+            "scenarios": {},
+        }
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for scenario in scenarios:
+                results["scenarios"][scenario.name] = await run_scenario(
+                    client,
+                    scenario,
+                    requests=args.requests,
+                    concurrency=args.concurrency,
+                    warmup=args.warmup,
+                    seed=args.seed,
+                    token=settings.admin_bearer_token,
+                )
+    finally:
+        await dispose_engine()
+    return results
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv)
+    for name, value in BENCH_ENVIRONMENT.items():
+        os.environ.setdefault(name, value)
+    with tempfile.TemporaryDirectory(prefix="pagila-bench-") as scratch:
+        os.environ["DATABASE_URL"] = args.database_url or f"sqlite+aiosqlite:///{scratch}/pagila.db"
+
+        from .report import compare, format_table, read_results, write_results
+
+        results = asyncio.run(_run(args))
+
+    write_results(args.output, results)
+    print(format_table(results))
+    print(f"\nResults written to {args.output}")
+    if args.baseline is None:
+        return 0
+    regressions = compare(results, read_results(args.baseline), args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,364 @@
+"""``python -m bench.plans``: EXPLAIN every repository query and compare against a baseline.
+
+Each case in :data:`PLAN_CASES` calls one ``FilmRepository`` or
+``RentalRepository`` method with Pagila ids. The statements it sends are
+captured as compiled by the engine's dialect and then EXPLAINed on the same
+connection. Writes are rolled back afterwards.
+
+SQLite always runs, on a throwaway file loaded from
+``pagila_sql/pagila-data.sql`` unless ``--sqlite-url`` points at one.
+Postgres runs when ``--postgres-url`` (default ``PLANS_POSTGRES_URL``, else
+:data:`DEFAULT_POSTGRES_URL`) answers and holds the loaded, migrated dataset.
+Otherwise it is skipped.
+
+A case regresses when it sequentially scans a large table
+(``--large-table-rows``) that its baseline did not scan. On Postgres it
+also regresses when its estimated total cost exceeds the baseline by more
+than ``--tolerance``. SQLite has no cost estimate. Cases missing from the
+baseline are reported but never fail. ``--update-baseline`` rewrites the
+sections of the dialects that ran.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import re
+import sys
+import tempfile
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from decimal import Decimal
+from pathlib import Path
+from typing import Any
+
+import orjson
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+
+from core.pagila_dump import parent_table
+from domain.models import FilmListParams, PaymentCreate, RentalCreate
+from domain.repositories import FilmRepository, RentalRepository
+
+from .report import read_results, write_results
+from .scenarios import FILMS_PAGE_SIZE, KNOWN_TITLES
+
+DEFAULT_BASELINE_PATH = Path(__file__).with_name("plan_baseline.json")
+DEFAULT_POSTGRES_URL = "postgresql+asyncpg://postgres@localhost:5432/pagila"
+LARGE_TABLE_ROWS = 1000
+
+_EXPLAINED = ("SELECT", "WITH", "UPDATE", "DELETE")
+_SQLITE_SCAN = re.compile(r"^SCAN (\w+)$")
+_ALIAS = re.compile(r"\b(\w+) AS (\w+)\b")
+# Ids present in pagila_sql/pagila-data.sql.
+_PAGE = list(range(1, FILMS_PAGE_SIZE + 1))
+
+
+@dataclass(frozen=True, slots=True)
+class PlanCase:
+    name: str
+    run: Callable[[AsyncSession], Awaitable[object]]
+
+
+PLAN_CASES: tuple[PlanCase, ...] = (
+    PlanCase("film.paginate", lambda s: FilmRepository(s).paginate(FilmListParams())),
+    PlanCase(
+        "film.paginate.deep_page",
+        lambda s: FilmRepository(s).paginate(FilmListParams(page=48, page_size=FILMS_PAGE_SIZE)),
+    ),
+    PlanCase(
+        "film.paginate.category",
+        lambda s: FilmRepository(s).paginate(FilmListParams(category="Horror")),
+    ),
+    PlanCase("film.get_film", lambda s: FilmRepository(s).get_film(1)),
+    PlanCase("film.get_films", lambda s: FilmRepository(s).get_films(_PAGE)),
+    PlanCase("film.actors_by_film", lambda s: FilmRepository(s).actors_by_film(_PAGE)),
+    PlanCase("film.categories_by_film", lambda s: FilmRepository(s).categories_by_film(_PAGE)),
+    PlanCase("film.inventory_by_film", lambda s: FilmRepository(s).inventory_by_film(_PAGE)),
+    PlanCase("film.stock_by_film", lambda s: FilmRepository(s).stock_by_film(_PAGE)),
+    PlanCase("film.language_by_film", lambda s: FilmRepository(s).language_by_film(_PAGE)),
+    PlanCase("film.catalog_texts", lambda s: FilmRepository(s).catalog_texts()),
+    PlanCase("film.catalog_titles", lambda s: FilmRepository(s).catalog_titles()),
+    PlanCase("film.rented_films", lambda s: FilmRepository(s).rented_films()),
+    PlanCase("film.find_by_title", lambda s: FilmRepository(s).find_by_title(KNOWN_TITLES[0])),
+    PlanCase("film.find_by_titles", lambda s: FilmRepository(s).find_by_titles(KNOWN_TITLES)),
+    PlanCase("rental.get_customer", lambda s: RentalRepository(s).get_customer(1)),
+    PlanCase(
+        "rental.get_customer_stores", lambda s: RentalRepository(s).get_customer_stores([1, 2])
+    ),
+    PlanCase("rental.get_inventory", lambda s: RentalRepository(s).get_inventory(1)),
+    PlanCase("rental.get_rental_terms", lambda s: RentalRepository(s).get_rental_terms(1)),
+    PlanCase("rental.get_rental", lambda s: RentalRepository(s).get_rental(1)),
+    PlanCase(
+        "rental.create_rental",
+        lambda s: RentalRepository(s).create_rental(
+            1, RentalCreate(inventory_id=1, staff_id=1), Decimal("2.99")
+        ),
+    ),
+    PlanCase("rental.return_rental", lambda s: RentalRepository(s).return_rental(1, 3)),
+    PlanCase(
+        "rental.create_payment",
+        lambda s: RentalRepository(s).create_payment(
+            1, PaymentCreate(rental_id=1, staff_id=1, amount=Decimal("1.00"))
+        ),
+    ),
+)
+
+
+@dataclass(slots=True)
+class StatementPlan:
+    sql: str
+    plan: list[str]
+    seq_scans: list[str]
+    cost: float | None
+
+    def as_dict(self) -> dict[str, Any]:
+        return {"sql": self.sql, "plan": self.plan, "seq_scans": self.seq_scans, "cost": self.cost}
+
+
+@contextmanager
+def captured_statements(engine: AsyncEngine) -> Iterator[list[tuple[str, Any]]]:
+    """Collect ``(sql, parameters)`` of the statements worth EXPLAINing sent on ``engine``."""
+    statements: list[tuple[str, Any]] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(_EXPLAINED):
+            statements.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+
+def _sqlite_plan(conn, sql: str, parameters: Any, large: dict[str, int]) -> StatementPlan:
+    details = [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", parameters)]
+    aliases = {alias: table for table, alias in _ALIAS.findall(sql)}
+    scans = set()
+    for detail in details:
+        match = _SQLITE_SCAN.match(detail)
+        if match is not None:
+            table = aliases.get(match.group(1), match.group(1))
+            if table in large:
+                scans.add(table)
+    return StatementPlan(sql, details, sorted(scans), None)
+
+
+def _postgres_nodes(node: dict[str, Any], depth: int = 0) -> Iterator[tuple[int, dict[str, Any]]]:
+    yield depth, node
+    for child in node.get("Plans", ()):
+        yield from _postgres_nodes(child, depth + 1)
+
+
+def _postgres_plan(conn, sql: str, parameters: Any, large: dict[str, int]) -> StatementPlan:
+    (raw,) = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}", parameters).one()
+    root = (orjson.loads(raw) if isinstance(raw, (str, bytes)) else raw)[0]["Plan"]
+    lines, scans = [], set()
+    for depth, node in _postgres_nodes(root):
+        relation = node.get("Relation Name")
+        index = node.get("Index Name")
+        lines.append(
+            "  " * depth
+            + node["Node Type"]
+            + (f" on {relation}" if relation else "")
+            + (f" using {index}" if index else "")
+        )
+        # Pagila's payment partitions count as the parent table.
+        if node["Node Type"] == "Seq Scan" and parent_table(relation) in large:
+            scans.add(parent_table(relation))
+    return StatementPlan(sql, lines, sorted(scans), root["Total Cost"])
+
+
+async def explain_call(
+    session: AsyncSession, call: Callable[[], Awaitable[object]], large: dict[str, int]
+) -> list[StatementPlan]:
+    """Run ``call`` and EXPLAIN each statement it sent, on the session's connection."""
+    assert session.bind is not None
+    with captured_statements(session.bind) as statements:
+        await call()
+    connection = await session.connection()
+    explain = _postgres_plan if connection.dialect.name == "postgresql" else _sqlite_plan
+
+    def run(conn) -> list[StatementPlan]:
+        return [explain(conn, sql, parameters, large) for sql, parameters in statements]
+
+    return await connection.run_sync(run)
+
+
+async def large_tables(conn: AsyncConnection, threshold: int) -> dict[str, int]:
+    """Row counts of the model tables holding at least ``threshold`` rows."""
+    from sqlmodel import SQLModel
+
+    counts: dict[str, int] = {}
+    for table in SQLModel.metadata.sorted_tables:
+        rows = (await conn.execute(select(func.count()).select_from(table))).scalar_one()
+        if rows >= threshold:
+            counts[str(table.name)] = rows
+    return counts
+
+
+async def collect_plans(engine: AsyncEngine, *, large_table_rows: int) -> dict[str, Any]:
+    """EXPLAIN every case in :data:`PLAN_CASES`; returns one dialect's results section."""
+    async with engine.connect() as conn:
+        large = await large_tables(conn, large_table_rows)
+    cases: dict[str, Any] = {}
+    for case in PLAN_CASES:
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            await session.begin()
+            try:
+                plans = await explain_call(session, lambda: case.run(session), large)
+            finally:
+                await session.rollback()
+        costs = [plan.cost for plan in plans if plan.cost is not None]
+        cases[case.name] = {
+            "statements": [plan.as_dict() for plan in plans],
+            "seq_scans": sorted({table for plan in plans for table in plan.seq_scans}),
+            "cost": round(sum(costs), 2) if costs else None,
+        }
+    return {"large_tables": large, "cases": cases}
+
+
+@dataclass(frozen=True, slots=True)
+class PlanRegression:
+    dialect: str
+    case: str
+    reason: str
+
+    def __str__(self) -> str:
+        return f"{self.dialect}:{self.case}: {self.reason}"
+
+
+def compare_plans(
+    current: dict[str, Any], baseline: dict[str, Any], tolerance: float
+) -> tuple[list[PlanRegression], list[str]]:
+    """Regressions of ``current`` against ``baseline``, and the cases that have no baseline."""
+    regressions: list[PlanRegression] = []
+    unbaselined: list[str] = []
+    for dialect, section in current.get("dialects", {}).items():
+        reference = baseline.get("dialects", {}).get(dialect, {}).get("cases", {})
+        for name, case in section["cases"].items():
+            before = reference.get(name)
+            if before is None:
+                unbaselined.append(f"{dialect}:{name}")
+                continue
+            for table in sorted(set(case["seq_scans"]) - set(before["seq_scans"])):
+                regressions.append(PlanRegression(dialect, name, f"new sequential scan on {table}"))
+            if before["cost"] and case["cost"] is not None:
+                if case["cost"] > before["cost"] * (1 + tolerance):
+                    regressions.append(
+                        PlanRegression(dialect, name, f"cost {before['cost']} -> {case['cost']}")
+                    )
+    return regressions, unbaselined
+
+
+def format_plans(results: dict[str, Any]) -> str:
+    lines = [f"{'dialect':<12}{'case':<30}{'statements':>11}{'cost':>12}  seq scans"]
+    for dialect, section in results["dialects"].items():
+        for name, case in section["cases"].items():
+            cost = "-" if case["cost"] is None else case["cost"]
+            scans = ", ".join(case["seq_scans"]) or "-"
+            lines.append(f"{dialect:<12}{name:<30}{len(case['statements']):>11}{cost:>12}  {scans}")
+    return "\n".join(lines)
+
+
+async def _sqlite_engine(url: str | None, scratch: str, dump: Path | None) -> AsyncEngine:
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    from app.load_data import load_sqlite
+    from core.pagila_dump import DEFAULT_DUMP_PATH
+
+    if url is None:
+        url = f"sqlite+aiosqlite:///{scratch}/pagila.db"
+        await load_sqlite(url, data_path=dump or DEFAULT_DUMP_PATH)
+    return create_async_engine(url)
+
+
+async def _postgres_engine(url: str) -> AsyncEngine | None:
+    from sqlalchemy.exc import DBAPIError
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    from domain.models import Film
+
+    engine = create_async_engine(url, connect_args={"timeout": 2})
+    try:
+        async with engine.connect() as conn:
+            films = (await conn.execute(select(func.count()).select_from(Film))).scalar_one()
+    except (OSError, DBAPIError, asyncio.TimeoutError) as exc:
+        print(f"Postgres skipped: {url} is not reachable ({exc.__class__.__name__})")
+        await engine.dispose()
+        return None
+    if not films:
+        print(f"Postgres skipped: {url} has no films; run load-data and alembic upgrade head")
+        await engine.dispose()
+        return None
+    return engine
+
+
+async def _run(args: argparse.Namespace, scratch: str) -> dict[str, Any]:
+    engines = {"sqlite": await _sqlite_engine(args.sqlite_url, scratch, args.dump)}
+    if not args.no_postgres:
+        postgres = await _postgres_engine(args.postgres_url)
+        if postgres is not None:
+            engines["postgresql"] = postgres
+    results: dict[str, Any] = {"dialects": {}}
+    try:
+        for dialect, engine in engines.items():
+            results["dialects"][dialect] = await collect_plans(
+                engine, large_table_rows=args.large_table_rows
+            )
+    finally:
+        for engine in engines.values():
+            await engine.dispose()
+    return results
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m bench.plans", description=__doc__.splitlines()[0]
+    )
+    parser.add_argument("--sqlite-url", help="Loaded SQLite database (default: load the dump).")
+    parser.add_argument("--dump", type=Path, help="pg_dump data file to seed SQLite from.")
+    parser.add_argument(
+        "--postgres-url", default=os.environ.get("PLANS_POSTGRES_URL", DEFAULT_POSTGRES_URL)
+    )
+    parser.add_argument("--no-postgres", action="store_true", help="Only run SQLite.")
+    parser.add_argument("--large-table-rows", type=int, default=LARGE_TABLE_ROWS)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE_PATH)
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25, help="Allowed cost growth (0.25 = 25%%)."
+    )
+    parser.add_argument("--output", type=Path, help="Also write the full results here.")
+    parser.add_argument(
+        "--update-baseline", action="store_true", help="Store this run as the baseline."
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv)
+    with tempfile.TemporaryDirectory(prefix="pagila-plans-") as scratch:
+        results = asyncio.run(_run(args, scratch))
+
+    print(format_plans(results))
+    if args.output is not None:
+        write_results(args.output, results)
+    baseline = read_results(args.baseline) if args.baseline.exists() else {"dialects": {}}
+    if args.update_baseline:
+        baseline["dialects"].update(results["dialects"])
+        write_results(args.baseline, baseline)
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    regressions, unbaselined = compare_plans(results, baseline, args.tolerance)
+    for name in unbaselined:
+        print(f"NO BASELINE {name}")
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
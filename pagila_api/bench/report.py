@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import math
+from collections.abc import Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import orjson
+
+# Metrics compared against the baseline, and whether a larger value is better.
+COMPARED_METRICS: dict[str, bool] = {"p50_ms": False, "p99_ms": False, "rps": True}
+
+
+def percentile(values: Sequence[float], fraction: float) -> float:
+    """Nearest-rank percentile of ``values`` (which need not be sorted)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarise(
+    latencies: Sequence[float],
+    errors: int,
+    elapsed: float,
+    first_byte: Sequence[float] = (),
+) -> dict[str, Any]:
+    """Latency percentiles (ms) and throughput for one scenario run."""
+
+    def ms(value: float) -> float:
+        return round(value * 1000, 2)
+
+    stats: dict[str, Any] = {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 2) if elapsed > 0 else 0.0,
+        "mean_ms": ms(sum(latencies) / len(latencies)) if latencies else 0.0,
+        "p50_ms": ms(percentile(latencies, 0.50)),
+        "p90_ms": ms(percentile(latencies, 0.90)),
+        "p99_ms": ms(percentile(latencies, 0.99)),
+        "max_ms": ms(max(latencies, default=0.0)),
+    }
+    if first_byte:
+        stats["ttfb_p50_ms"] = ms(percentile(first_byte, 0.50))
+        stats["ttfb_p99_ms"] = ms(percentile(first_byte, 0.99))
+    return stats
+
+
+@dataclass(frozen=True, slots=True)
+class Regression:
+    scenario: str
+    metric: str
+    baseline: float
+    current: float
+
+    def __str__(self) -> str:
+        return f"{self.scenario}.{self.metric}: {self.baseline} -> {self.current}"
+
+
+def compare(
+    current: dict[str, Any], baseline: dict[str, Any], tolerance: float
+) -> list[Regression]:
+    """Metrics in ``current`` worse than ``baseline`` by more than ``tolerance`` (a fraction).
+
+    Scenarios or metrics missing from either side are ignored, so a baseline
+    recorded with fewer scenarios still applies to the ones it has.
+    """
+    regressions: list[Regression] = []
+    for name, stats in current.get("scenarios", {}).items():
+        reference = baseline.get("scenarios", {}).get(name)
+        if reference is None:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            before, after = reference.get(metric), stats.get(metric)
+            if not before or after is None:
+                continue
+            if higher_is_better:
+                worse = after < before * (1 - tolerance)
+            else:
+                worse = after > before * (1 + tolerance)
+            if worse:
+                regressions.append(Regression(name, metric, before, after))
+    return regressions
+
+
+def write_results(path: Path, results: dict[str, Any]) -> None:
+    path.write_bytes(orjson.dumps(results, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS))
+
+
+def read_results(path: Path) -> dict[str, Any]:
+    return orjson.loads(path.read_bytes())
+
+
+def format_table(results: dict[str, Any]) -> str:
+    columns = ("requests", "errors", "rps", "p50_ms", "p90_ms", "p99_ms", "max_ms")
+    lines = [f"{'scenario':<20}" + "".join(f"{column:>10}" for column in columns)]
+    for name, stats in results["scenarios"].items():
+        lines.append(f"{name:<20}" + "".join(f"{stats[column]:>10}" for column in columns))
+    return "\n".join(lines)
@@ -0,0 +1,81 @@
+"""Drives scenarios against the ASGI app in-process, so results measure the API, not a network."""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+import httpx
+
+from .report import summarise
+from .scenarios import RequestSpec, Scenario
+
+
+@dataclass(slots=True)
+class _Samples:
+    latencies: list[float] = field(default_factory=list)
+    first_byte: list[float] = field(default_factory=list)
+    errors: int = 0
+
+
+async def _send(client: httpx.AsyncClient, spec: RequestSpec, stream: bool, samples: _Samples):
+    started = time.perf_counter()
+    try:
+        if stream:
+            async with client.stream(
+                spec.method, spec.url, params=spec.params, json=spec.json, headers=spec.headers
+            ) as response:
+                first_byte = None
+                async for _ in response.aiter_bytes():
+                    if first_byte is None:
+                        first_byte = time.perf_counter() - started
+                ok = response.is_success
+        else:
+            response = await client.request(
+                spec.method, spec.url, params=spec.params, json=spec.json, headers=spec.headers
+            )
+            first_byte = None
+            ok = response.is_success
+    except httpx.HTTPError:
+        ok = False
+    if not ok:
+        samples.errors += 1
+        return
+    samples.latencies.append(time.perf_counter() - started)
+    if first_byte is not None:
+        samples.first_byte.append(first_byte)
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    *,
+    requests: int,
+    concurrency: int,
+    warmup: int,
+    seed: int,
+    token: str,
+) -> dict[str, Any]:
+    """Send ``warmup`` unmeasured requests, then ``requests`` measured ones.
+
+    The measured requests are sent by ``concurrency`` workers.
+    """
+    rng = random.Random(seed)
+    warmup_samples = _Samples()
+    for n in range(warmup):
+        await _send(client, scenario.build(rng, -1 - n, token), scenario.stream, warmup_samples)
+
+    samples = _Samples()
+    specs = iter([scenario.build(rng, n, token) for n in range(requests)])
+
+    async def worker() -> None:
+        for spec in specs:
+            await _send(client, spec, scenario.stream, samples)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return summarise(samples.latencies, samples.errors, elapsed, samples.first_byte)
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import random
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+# Film ids, titles and row counts below match pagila_sql/pagila-data.sql.
+FILM_COUNT = 1000
+CUSTOMER_COUNT = 599
+INVENTORY_COUNT = 4581
+KNOWN_TITLES = ("ACADEMY DINOSAUR", "ALIEN CENTER", "CHAMBER ITALIAN", "ZORRO ARK")
+FILMS_PAGE_SIZE = 20
+
+
+@dataclass(frozen=True, slots=True)
+class RequestSpec:
+    method: str
+    url: str
+    params: dict[str, Any] | None = None
+    json: Any = None
+    headers: dict[str, str] = field(default_factory=dict)
+
+
+@dataclass(frozen=True, slots=True)
+class Scenario:
+    """One benchmarked endpoint; ``build`` makes the ``n``-th request from a seeded RNG."""
+
+    name: str
+    build: Callable[[random.Random, int, str], RequestSpec]
+    stream: bool = False
+    uses_llm: bool = False
+
+
+def _films_first_page(rng: random.Random, n: int, token: str) -> RequestSpec:
+    return RequestSpec("GET", "/v1/films", params={"page": 1, "page_size": FILMS_PAGE_SIZE})
+
+
+def _films_deep_page(rng: random.Random, n: int, token: str) -> RequestSpec:
+    last_page = FILM_COUNT // FILMS_PAGE_SIZE
+    page = rng.randint(last_page - 5, last_page)
+    return RequestSpec("GET", "/v1/films", params={"page": page, "page_size": FILMS_PAGE_SIZE})
+
+
+def _films_by_category(rng: random.Random, n: int, token: str) -> RequestSpec:
+    category = rng.choice(("Action", "Comedy", "Horror", "Sci-Fi", "Documentary"))
+    return RequestSpec(
+        "GET",
+        "/v1/films",
+        params={"category": category, "page": rng.randint(1, 3), "page_size": FILMS_PAGE_SIZE},
+    )
+
+
+def _create_rental(rng: random.Random, n: int, token: str) -> RequestSpec:
+    return RequestSpec(
+        "POST",
+        f"/v1/customers/{rng.randint(1, CUSTOMER_COUNT)}/rentals",
+        json={"inventory_id": rng.randint(1, INVENTORY_COUNT), "staff_id": 1},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+
+def _handoff_search(rng: random.Random, n: int, token: str) -> RequestSpec:
+    title = rng.choice(KNOWN_TITLES)
+    # Quoted after "film" so SearchAgent extracts the title and answers from the database.
+    return RequestSpec(
+        "POST", "/v1/ai/handoff", json={"question": f'Tell me about the film "{title}"'}
+    )
+
+
+def _handoff_llm(rng: random.Random, n: int, token: str) -> RequestSpec:
+    # Unique questions keep the answer cache out of the measurement.
+    return RequestSpec(
+        "POST", "/v1/ai/handoff", json={"question": f"Who won the world cup in {1930 + n}?"}
+    )
+
+
+def _ai_ask(rng: random.Random, n: int, token: str) -> RequestSpec:
+    return RequestSpec("GET", "/v1/ai/ask", params={"question": f"Suggest a film for night {n}"})
+
+
+def _ai_summary(rng: random.Random, n: int, token: str) -> RequestSpec:
+    return RequestSpec("POST", "/v1/ai/summary", json={"film_id": rng.randint(1, FILM_COUNT)})
+
+
+def _ai_summary_batch(rng: random.Random, n: int, token: str) -> RequestSpec:
+    film_ids = rng.sample(range(1, FILM_COUNT + 1), 20)
+    return RequestSpec("POST", "/v1/ai/summary/batch", json={"film_ids": film_ids})
+
+
+SCENARIOS: tuple[Scenario, ...] = (
+    Scenario("films_first_page", _films_first_page),
+    Scenario("films_deep_page", _films_deep_page),
+    Scenario("films_by_category", _films_by_category),
+    Scenario("rental_create", _create_rental),
+    Scenario("handoff_search", _handoff_search),
+    Scenario("handoff_llm", _handoff_llm, uses_llm=True),
+    Scenario("ai_ask_stream", _ai_ask, stream=True, uses_llm=True),
+    Scenario("ai_summary", _ai_summary, uses_llm=True),
+    Scenario("ai_summary_batch", _ai_summary_batch, uses_llm=True),
+)
+
+
+def select_scenarios(names: list[str] | None) -> list[Scenario]:
+    if not names:
+        return list(SCENARIOS)
+    known = {scenario.name: scenario for scenario in SCENARIOS}
+    unknown = sorted(set(names) - known.keys())
+    if unknown:
+        raise ValueError(f"Unknown scenario(s): {', '.join(unknown)}")
+    return [known[name] for name in names]
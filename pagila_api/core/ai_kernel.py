@@ -19,13 +19,18 @@ def get_kernel(settings: Settings):
     """Lazily create the Semantic Kernel, importing SK only when needed.
 
     This avoids import-time errors if SK has optional dependency mismatches
-    and lets non-AI endpoints run without SK installed.
+    and lets non-AI endpoints run without SK installed. With
+    ``LLM_BACKEND=fake`` the kernel talks to the offline stand-in in
+    ``core.fake_llm`` instead of the OpenAI API; otherwise the OpenAI client
+    reuses the pooled HTTP client from ``core.http_client``.
     """
     global _kernel
     if _kernel is not None:
         return _kernel
 
-    if not settings.openai_api_key:
+    if not settings.enable_ai:
+        raise RuntimeError("AI features are disabled (ENABLE_AI=false).")
+    if settings.llm_backend == "openai" and not settings.openai_api_key:
         raise RuntimeError("OPENAI_API_KEY must be set to initialise the Semantic Kernel.")
 
                                                 
@@ -43,17 +48,38 @@ def get_kernel(settings: Settings):
         pass
 
     kernel = Kernel()
-    kernel.add_service(
-        OpenAIChatCompletion(
-            ai_model_id=settings.openai_model,
+    if settings.llm_backend == "fake":
+        from .fake_llm import create_fake_chat_service
+
+        kernel.add_service(create_fake_chat_service(settings, service_id="openai"))
+    else:
+        from openai import AsyncOpenAI
+
+        from .http_client import get_http_client
+
+        client = AsyncOpenAI(
             api_key=settings.openai_api_key,
-            service_id="openai",
+            base_url=settings.openai_base_url,
+            max_retries=settings.openai_max_retries,
+            http_client=get_http_client(settings),
+        )
+        kernel.add_service(
+            OpenAIChatCompletion(
+                ai_model_id=settings.openai_model,
+                async_client=client,
+                service_id="openai",
+            )
         )
-    )
     _kernel = kernel
     return kernel
 
 
+def reset_kernel() -> None:
+    """Drop the cached kernel, e.g. after the shared HTTP client it uses was closed."""
+    global _kernel
+    _kernel = None
+
+
 def load_prompt_config(path: Path) -> dict[str, Any]:
     """Return a dict containing both the template string and config settings.
 
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+
+from .config import Settings
+
+# Only words that never change what is being asked: articles, "please" and
+# pronouns. Interrogatives and modals stay in the key ("when" vs "where").
+_STOP_WORDS = frozenset(
+    """
+    a an the please i me my mine we us our you your it its this that these those
+    """.split()
+)
+_QUESTION_WORDS = frozenset(
+    """
+    what when where which who whom whose why how can could may might must shall should will would
+    """.split()
+)
+_NON_WORD = re.compile(r"[^\w\s]+")
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def normalize_question(question: str) -> str:
+    """Fold case, punctuation, whitespace and stop words into a stable cache key.
+
+    Questions made only of stop words keep them, so "what is it?" does not
+    collapse onto an empty key shared with every other such question.
+    """
+    tokens = _NON_WORD.sub(" ", question.casefold()).split()
+    content = [token for token in tokens if token not in _STOP_WORDS]
+    return " ".join(content or tokens)
+
+
+def _question_words(key: str) -> frozenset[str]:
+    return frozenset(token for token in key.split() if token in _QUESTION_WORDS)
+
+
+class MinHasher:
+    """MinHash signatures over character shingles of a normalised question."""
+
+    def __init__(self, num_perm: int = 64, shingle_size: int = 4, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        params: list[tuple[int, int]] = []
+        state = seed.to_bytes(8, "little")
+        for _ in range(num_perm):
+            state = hashlib.blake2b(state, digest_size=16).digest()
+            a = int.from_bytes(state[:8], "little") % _MERSENNE_PRIME
+            b = int.from_bytes(state[8:], "little") % _MERSENNE_PRIME
+            params.append((a or 1, b))
+        self._params = params
+
+    def _shingles(self, text: str) -> set[int]:
+        padded = f" {text} "
+        size = min(self.shingle_size, len(padded))
+        return {
+            int.from_bytes(
+                hashlib.blake2b(padded[i : i + size].encode("utf-8"), digest_size=8).digest(),
+                "little",
+            )
+            for i in range(len(padded) - size + 1)
+        }
+
+    def signature(self, text: str) -> tuple[int, ...]:
+        shingles = self._shingles(text)
+        return tuple(
+            min(((a * value + b) % _MERSENNE_PRIME) & _MAX_HASH for value in shingles)
+            for a, b in self._params
+        )
+
+    @staticmethod
+    def similarity(left: tuple[int, ...], right: tuple[int, ...]) -> float:
+        """Estimated Jaccard similarity of the shingle sets behind two signatures."""
+        if not left or len(left) != len(right):
+            return 0.0
+        return sum(1 for x, y in zip(left, right) if x == y) / len(left)
+
+
+@dataclass(slots=True)
+class _Entry:
+    chunks: tuple[str, ...]
+    expires_at: float
+    signature: tuple[int, ...] | None = None
+
+
+class AnswerCache:
+    """Bounded TTL cache of streamed answers keyed on normalised questions.
+
+    Entries hold the original chunks so a cache hit can be replayed through
+    the same SSE path as a live completion. With ``near_duplicates`` enabled
+    a miss on the exact key falls back to MinHash/LSH candidate lookup.
+    """
+
+    def __init__(
+        self,
+        *,
+        ttl_seconds: float,
+        max_entries: int,
+        near_duplicates: bool = False,
+        similarity_threshold: float = 0.8,
+        bands: int = 16,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._ttl = ttl_seconds
+        self._max_entries = max_entries
+        self._clock = clock
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._threshold = similarity_threshold
+        self._hasher = MinHasher() if near_duplicates else None
+        self._bands = bands
+        self._buckets: dict[tuple[int, tuple[int, ...]], set[str]] = {}
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, question: str) -> tuple[str, ...] | None:
+        entry, exact = self._lookup(question)
+        if entry is None:
+            self.misses += 1
+            return None
+        if exact:
+            self.hits += 1
+        else:
+            self.near_hits += 1
+        return entry.chunks
+
+    def __contains__(self, question: str) -> bool:
+        return self._lookup(question)[0] is not None
+
+    def _lookup(self, question: str) -> tuple[_Entry | None, bool]:
+        key = normalize_question(question)
+        now = self._clock()
+        entry = self._live_entry(key, now)
+        if entry is not None:
+            return entry, True
+        if self._hasher is not None:
+            return self._nearest(key, self._hasher.signature(key), now), False
+        return None, False
+
+    def put(self, question: str, chunks: Iterable[str]) -> None:
+        key = normalize_question(question)
+        stored = tuple(chunks)
+        if not stored:
+            return
+
+        self._discard(key)
+        signature = self._hasher.signature(key) if self._hasher is not None else None
+        self._entries[key] = _Entry(stored, self._clock() + self._ttl, signature)
+        if signature is not None:
+            for bucket in self._band_keys(signature):
+                self._buckets.setdefault(bucket, set()).add(key)
+
+        while len(self._entries) > self._max_entries:
+            oldest = next(iter(self._entries))
+            self._discard(oldest)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._buckets.clear()
+
+    def _live_entry(self, key: str, now: float) -> _Entry | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= now:
+            self._discard(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _nearest(self, key: str, signature: tuple[int, ...], now: float) -> _Entry | None:
+        candidates: set[str] = set()
+        for bucket in self._band_keys(signature):
+            candidates.update(self._buckets.get(bucket, ()))
+
+        # Shingles barely notice "when" -> "where"; near duplicates must ask the same way.
+        asked = _question_words(key)
+        best_key: str | None = None
+        best_score = self._threshold
+        for candidate in candidates:
+            entry = self._entries.get(candidate)
+            if entry is None or entry.signature is None or _question_words(candidate) != asked:
+                continue
+            score = MinHasher.similarity(signature, entry.signature)
+            if score >= best_score:
+                best_key, best_score = candidate, score
+
+        return self._live_entry(best_key, now) if best_key is not None else None
+
+    def _band_keys(self, signature: tuple[int, ...]) -> list[tuple[int, tuple[int, ...]]]:
+        rows = max(1, len(signature) // self._bands)
+        return [
+            (index, signature[start : start + rows])
+            for index, start in enumerate(range(0, len(signature), rows))
+        ]
+
+    def _discard(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None or entry.signature is None:
+            return
+        for bucket in self._band_keys(entry.signature):
+            members = self._buckets.get(bucket)
+            if members is not None:
+                members.discard(key)
+                if not members:
+                    del self._buckets[bucket]
+
+
+_answer_cache: AnswerCache | None = None
+
+
+def get_answer_cache(settings: Settings) -> AnswerCache | None:
+    """Return the process-wide answer cache, or ``None`` when caching is disabled."""
+    global _answer_cache
+    if not settings.ai_cache_enabled:
+        return None
+    if _answer_cache is None:
+        _answer_cache = AnswerCache(
+            ttl_seconds=settings.ai_cache_ttl_seconds,
+            max_entries=settings.ai_cache_max_entries,
+            near_duplicates=settings.ai_cache_near_duplicates,
+            similarity_threshold=settings.ai_cache_similarity_threshold,
+        )
+    return _answer_cache
@@ -9,10 +9,130 @@ class Settings(BaseSettings):
     app_name: str = "Mini Pagila API"
     environment: Literal["local", "test", "prod"] = "local"
     database_url: str = Field(validation_alias="DATABASE_URL")
+    shard_database_urls: dict[int, str] = Field(
+        default_factory=dict, validation_alias="SHARD_DATABASE_URLS"
+    )
     admin_bearer_token: str = Field(default="dvd_admin", validation_alias="ADMIN_BEARER_TOKEN")
+    enable_ai: bool = Field(default=True, validation_alias="ENABLE_AI")
     openai_api_key: str | None = Field(default=None, validation_alias="OPENAI_API_KEY")
     openai_model: str = Field(default="gpt-4o-mini", validation_alias="OPENAI_MODEL")
+    openai_base_url: str | None = Field(default=None, validation_alias="OPENAI_BASE_URL")
+    openai_max_connections: int = Field(
+        default=100, gt=0, validation_alias="OPENAI_MAX_CONNECTIONS"
+    )
+    openai_max_keepalive_connections: int = Field(
+        default=20, ge=0, validation_alias="OPENAI_MAX_KEEPALIVE_CONNECTIONS"
+    )
+    openai_keepalive_expiry_seconds: float = Field(
+        default=30.0, ge=0, validation_alias="OPENAI_KEEPALIVE_EXPIRY_SECONDS"
+    )
+    openai_connect_timeout_seconds: float = Field(
+        default=5.0, gt=0, validation_alias="OPENAI_CONNECT_TIMEOUT_SECONDS"
+    )
+    openai_read_timeout_seconds: float = Field(
+        default=60.0, gt=0, validation_alias="OPENAI_READ_TIMEOUT_SECONDS"
+    )
+    openai_pool_timeout_seconds: float = Field(
+        default=5.0, gt=0, validation_alias="OPENAI_POOL_TIMEOUT_SECONDS"
+    )
+    openai_http2: bool = Field(default=False, validation_alias="OPENAI_HTTP2")
+    openai_max_retries: int = Field(default=2, ge=0, validation_alias="OPENAI_MAX_RETRIES")
+    openai_warmup_connections: int = Field(
+        default=2, ge=0, validation_alias="OPENAI_WARMUP_CONNECTIONS"
+    )
+    llm_backend: Literal["openai", "fake"] = Field(default="openai", validation_alias="LLM_BACKEND")
+    fake_llm_ttft_ms: float = Field(default=200.0, ge=0, validation_alias="FAKE_LLM_TTFT_MS")
+    fake_llm_tokens_per_second: float = Field(
+        default=50.0, gt=0, validation_alias="FAKE_LLM_TOKENS_PER_SECOND"
+    )
+    fake_llm_error_rate: float = Field(
+        default=0.0, ge=0, le=1, validation_alias="FAKE_LLM_ERROR_RATE"
+    )
+    fake_llm_response_tokens: int = Field(
+        default=60, gt=0, validation_alias="FAKE_LLM_RESPONSE_TOKENS"
+    )
+    fake_llm_seed: int | None = Field(default=None, validation_alias="FAKE_LLM_SEED")
     log_json: bool = Field(default=False, validation_alias="LOG_JSON")
+    log_async: bool = Field(default=False, validation_alias="LOG_ASYNC")
+    log_buffer_size: int = Field(default=10_000, gt=0, validation_alias="LOG_BUFFER_SIZE")
+    log_sample_rates: dict[str, float] = Field(
+        default_factory=dict, validation_alias="LOG_SAMPLE_RATES"
+    )
+    ai_cache_enabled: bool = Field(default=True, validation_alias="AI_CACHE_ENABLED")
+    ai_cache_ttl_seconds: float = Field(
+        default=3600.0, gt=0, validation_alias="AI_CACHE_TTL_SECONDS"
+    )
+    ai_cache_max_entries: int = Field(default=1024, gt=0, validation_alias="AI_CACHE_MAX_ENTRIES")
+    ai_cache_near_duplicates: bool = Field(
+        default=False, validation_alias="AI_CACHE_NEAR_DUPLICATES"
+    )
+    ai_cache_similarity_threshold: float = Field(
+        default=0.8, gt=0, le=1, validation_alias="AI_CACHE_SIMILARITY_THRESHOLD"
+    )
+    summary_batch_size: int = Field(default=10, gt=0, le=50, validation_alias="SUMMARY_BATCH_SIZE")
+    summary_batch_max_attempts: int = Field(
+        default=2, gt=0, validation_alias="SUMMARY_BATCH_MAX_ATTEMPTS"
+    )
+    sse_coalesce_max_bytes: int = Field(
+        default=512, ge=0, validation_alias="SSE_COALESCE_MAX_BYTES"
+    )
+    sse_coalesce_window_ms: float = Field(
+        default=50.0, ge=0, validation_alias="SSE_COALESCE_WINDOW_MS"
+    )
+    sse_heartbeat_seconds: float = Field(
+        default=15.0, gt=0, validation_alias="SSE_HEARTBEAT_SECONDS"
+    )
+    sse_drain_seconds: float = Field(default=10.0, ge=0, validation_alias="SSE_DRAIN_SECONDS")
+    llm_max_concurrency: int = Field(default=16, gt=0, validation_alias="LLM_MAX_CONCURRENCY")
+    llm_route_concurrency: dict[str, int] = Field(
+        default_factory=dict, validation_alias="LLM_ROUTE_CONCURRENCY"
+    )
+    llm_max_queue: int = Field(default=64, ge=0, validation_alias="LLM_MAX_QUEUE")
+    llm_queue_timeout_seconds: float = Field(
+        default=5.0, gt=0, validation_alias="LLM_QUEUE_TIMEOUT_SECONDS"
+    )
+    llm_call_timeout_seconds: float = Field(
+        default=30.0, gt=0, validation_alias="LLM_CALL_TIMEOUT_SECONDS"
+    )
+    llm_breaker_failure_threshold: int = Field(
+        default=5, gt=0, validation_alias="LLM_BREAKER_FAILURE_THRESHOLD"
+    )
+    llm_breaker_reset_seconds: float = Field(
+        default=30.0, gt=0, validation_alias="LLM_BREAKER_RESET_SECONDS"
+    )
+    handoff_speculative_llm: bool = Field(default=False, validation_alias="HANDOFF_SPECULATIVE_LLM")
+    sql_echo: bool = Field(default=False, validation_alias="SQL_ECHO")
+    sql_slow_query_ms: float = Field(default=200.0, ge=0, validation_alias="SQL_SLOW_QUERY_MS")
+    sql_explain_slow_queries: bool = Field(
+        default=True, validation_alias="SQL_EXPLAIN_SLOW_QUERIES"
+    )
+    metrics_multiproc_dir: str | None = Field(
+        default=None, validation_alias="METRICS_MULTIPROC_DIR"
+    )
+    metrics_flush_seconds: float = Field(
+        default=5.0, gt=0, validation_alias="METRICS_FLUSH_SECONDS"
+    )
+    analytics_refresh_seconds: float = Field(
+        default=300.0, ge=0, validation_alias="ANALYTICS_REFRESH_SECONDS"
+    )
+    stock_table_enabled: bool = Field(default=True, validation_alias="STOCK_TABLE_ENABLED")
+    stock_refresh_seconds: float = Field(
+        default=60.0, ge=0, validation_alias="STOCK_REFRESH_SECONDS"
+    )
+    similarity_index_enabled: bool = Field(
+        default=True, validation_alias="SIMILARITY_INDEX_ENABLED"
+    )
+    corental_refresh_seconds: float = Field(
+        default=3600.0, ge=0, validation_alias="CORENTAL_REFRESH_SECONDS"
+    )
+    catalog_min_score: float = Field(default=0.25, gt=0, le=1, validation_alias="CATALOG_MIN_SCORE")
+    serve_host: str = Field(default="127.0.0.1", validation_alias="HOST")
+    serve_port: int = Field(default=8000, gt=0, lt=65536, validation_alias="PORT")
+    web_concurrency: int = Field(default=1, gt=0, validation_alias="WEB_CONCURRENCY")
+    preload: bool = Field(default=False, validation_alias="PRELOAD")
+    shutdown_timeout_seconds: float = Field(
+        default=30.0, gt=0, validation_alias="SHUTDOWN_TIMEOUT_SECONDS"
+    )
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
 
@@ -1,32 +1,63 @@
-from collections.abc import AsyncIterator
+from __future__ import annotations
 
+from collections.abc import AsyncIterator, Callable
+
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 
 from .config import Settings
+from .query_stats import instrument_engine
 
 _engine: AsyncEngine | None = None
 _session_factory: async_sessionmaker[AsyncSession] | None = None
+# store_id -> engine / session factory, when SHARD_DATABASE_URLS is set.
+_shard_engines: dict[int, AsyncEngine] = {}
+_shard_factories: dict[int, async_sessionmaker[AsyncSession]] = {}
+
+
+def _create_engine(url: str, settings: Settings) -> AsyncEngine:
+    engine = create_async_engine(url, echo=settings.sql_echo, pool_pre_ping=True)
+    instrument_engine(engine, settings)
+    return engine
 
 
 def init_engine(settings: Settings) -> AsyncEngine:
     global _engine, _session_factory
 
     if _engine is None:
-        _engine = create_async_engine(
-            settings.database_url,
-            echo=settings.environment == "local",
-            pool_pre_ping=True,
-        )
+        _engine = _create_engine(settings.database_url, settings)
         _session_factory = async_sessionmaker(
             _engine,
             expire_on_commit=False,
         )
+        init_shards(settings)
 
     return _engine
 
 
+def init_shards(settings: Settings) -> None:
+    """Create an engine per distinct ``SHARD_DATABASE_URLS`` entry.
+
+    Stores that share a URL share its engine.
+    """
+    by_url: dict[str, AsyncEngine] = {}
+    for store_id, url in settings.shard_database_urls.items():
+        engine = by_url.get(url) or by_url.setdefault(url, _create_engine(url, settings))
+        _shard_engines[store_id] = engine
+        _shard_factories[store_id] = async_sessionmaker(engine, expire_on_commit=False)
+
+
+async def dispose_shards() -> None:
+    engines = {id(engine): engine for engine in _shard_engines.values()}
+    _shard_engines.clear()
+    _shard_factories.clear()
+    for engine in engines.values():
+        await engine.dispose()
+
+
 async def dispose_engine() -> None:
     global _engine
+    await dispose_shards()
     if _engine is not None:
         await _engine.dispose()
         _engine = None
@@ -38,12 +69,119 @@ def get_engine() -> AsyncEngine:
     return _engine
 
 
+def pool_status() -> dict[str, int]:
+    """Connection pool counters for the current engine; empty for pools that keep none."""
+    if _engine is None:
+        return {}
+    pool = _engine.pool
+    status: dict[str, int] = {}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        reader = getattr(pool, name, None)
+        if callable(reader):
+            status[name] = reader()
+    return status
+
+
 def get_session_factory() -> async_sessionmaker[AsyncSession]:
     if _session_factory is None:
         raise RuntimeError("Database session factory has not been initialised.")
     return _session_factory
 
 
+def shard_store_ids() -> list[int]:
+    """Store ids with their own shard; empty when sharding is off."""
+    return sorted(_shard_factories)
+
+
+def get_shard_engines() -> dict[int, AsyncEngine]:
+    return dict(_shard_engines)
+
+
+class ShardSessions:
+    """Sessions for the catalog database and each store shard, opened on first use.
+
+    ``DATABASE_URL`` is the catalog: films, categories, actors, stores.
+    With ``SHARD_DATABASE_URLS='{"1": "...", "2": "..."}'`` each store's
+    customers, inventory, rentals and payments live in that store's
+    database; without it every store maps to the catalog, so callers need
+    not care whether sharding is on. Stores that share a URL share a session.
+    """
+
+    def __init__(self) -> None:
+        self._sessions: dict[int | None, AsyncSession] = {}
+        self._by_engine: dict[int, AsyncSession] = {}
+
+    @property
+    def sharded(self) -> bool:
+        return bool(_shard_factories)
+
+    @property
+    def catalog(self) -> AsyncSession:
+        return self._open(None)
+
+    def for_store(self, store_id: int) -> AsyncSession:
+        if self.sharded and store_id not in _shard_factories:
+            raise LookupError(f"no shard configured for store {store_id}")
+        return self._open(store_id if self.sharded else None)
+
+    def shards(self) -> dict[int, AsyncSession]:
+        """One session per distinct shard database, keyed by one of its store ids."""
+        if not self.sharded:
+            return {0: self.catalog}
+        distinct: dict[int, AsyncSession] = {}
+        for store_id in shard_store_ids():
+            session = self.for_store(store_id)
+            if all(session is not other for other in distinct.values()):
+                distinct[store_id] = session
+        return distinct
+
+    def _open(self, store_id: int | None) -> AsyncSession:
+        session = self._sessions.get(store_id)
+        if session is None:
+            factory = get_session_factory() if store_id is None else _shard_factories[store_id]
+            engine_key = id(factory.kw["bind"])
+            session = self._by_engine.get(engine_key)
+            if session is None:
+                session = self._by_engine[engine_key] = factory()
+            self._sessions[store_id] = session
+        return session
+
+    async def commit(self) -> None:
+        for session in self._by_engine.values():
+            await session.commit()
+
+    async def rollback(self) -> None:
+        for session in self._by_engine.values():
+            await session.rollback()
+
+    async def close(self) -> None:
+        for session in self._by_engine.values():
+            await session.close()
+
+    async def __aenter__(self) -> ShardSessions:
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.close()
+
+
+async def get_shard_sessions() -> AsyncIterator[ShardSessions]:
+    """Like :func:`get_session`, for requests that route by store.
+
+    Writes normally touch a single shard; when several were written, each
+    commits on its own (there is no two-phase commit).
+    """
+    shards = ShardSessions()
+    try:
+        yield shards
+        await shards.commit()
+    except Exception:
+        await shards.rollback()
+        raise
+    finally:
+        await shards.close()
+
+
 async def get_session() -> AsyncIterator[AsyncSession]:
     """FastAPI dependency that yields an AsyncSession per request.
 
@@ -59,3 +197,24 @@ async def get_session() -> AsyncIterator[AsyncSession]:
         raise
     finally:
         await session.close()
+
+
+def run_after_commit(session: AsyncSession, callback: Callable[[], None]) -> None:
+    """Call ``callback`` when ``session`` next commits; a rollback discards it.
+
+    For in-process state (caches, counters) that must only reflect writes
+    that actually reached the database.
+    """
+    callbacks = session.info.get("after_commit")
+    if callbacks is None:
+        callbacks = session.info["after_commit"] = []
+
+        def _commit(sync_session) -> None:
+            pending = list(callbacks)
+            callbacks.clear()
+            for pending_callback in pending:
+                pending_callback()
+
+        event.listen(session.sync_session, "after_commit", _commit)
+        event.listen(session.sync_session, "after_rollback", lambda _: callbacks.clear())
+    callbacks.append(callback)
@@ -0,0 +1,159 @@
+"""Offline stand-in for the OpenAI chat backend, used for load tests and local development.
+
+Selected with ``LLM_BACKEND=fake``. Replies are synthesised locally with a
+configurable time-to-first-token, token rate and error rate, so streaming,
+coalescing and concurrency limits can be benchmarked without spending tokens.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import re
+from collections.abc import AsyncIterator
+from typing import Any
+
+import orjson
+from openai.types import CompletionUsage
+from pydantic import Field, PrivateAttr
+from semantic_kernel.connectors.ai.chat_completion_client_base import ChatCompletionClientBase
+from semantic_kernel.contents import ChatMessageContent, StreamingChatMessageContent
+from semantic_kernel.contents.chat_role import ChatRole
+from semantic_kernel.exceptions import ServiceResponseException
+
+from .config import Settings
+
+_SUMMARY_FIELDS = {
+    "title": re.compile(r"^Film title:\s*(.*)$", flags=re.MULTILINE),
+    "rating": re.compile(r"^MPAA rating:\s*(.*)$", flags=re.MULTILINE),
+    "rental_rate": re.compile(r"^Rental rate:\s*(.*)$", flags=re.MULTILINE),
+}
+_FILM_ID = re.compile(r"^Film id:\s*(\d+)\s*$", flags=re.MULTILINE)
+_QUESTION = re.compile(r"^Question:\s*(.*)$", flags=re.MULTILINE)
+_STRICT_RATINGS = {"R", "NC-17"}
+_FILLER = (
+    "Our store keeps a wide catalog of classic and recent titles, and staff are happy to help "
+    "you find a film that suits your evening, whether you want drama, comedy, horror or a "
+    "family favourite to share."
+).split()
+
+
+class FakeChatCompletion(ChatCompletionClientBase):
+    """Chat completion service that answers locally instead of calling the OpenAI API."""
+
+    ttft_seconds: float = Field(default=0.2, ge=0)
+    tokens_per_second: float = Field(default=50.0, gt=0)
+    error_rate: float = Field(default=0.0, ge=0, le=1)
+    response_tokens: int = Field(default=60, gt=0)
+    seed: int | None = None
+
+    _random: random.Random = PrivateAttr()
+
+    def model_post_init(self, __context: Any) -> None:
+        self._random = random.Random(self.seed)
+
+    async def complete_chat(self, chat_history, settings) -> list[ChatMessageContent]:
+        prompt = self._prompt(chat_history)
+        tokens = self._reply_tokens(prompt, settings)
+        await self._wait_for_first_token()
+        await asyncio.sleep((len(tokens) - 1) / self.tokens_per_second)
+        return [
+            ChatMessageContent(
+                role=ChatRole.ASSISTANT,
+                content="".join(tokens),
+                ai_model_id=self.ai_model_id,
+                metadata={"usage": self._usage(prompt, tokens)},
+            )
+        ]
+
+    async def complete_chat_stream(
+        self, chat_history, settings
+    ) -> AsyncIterator[list[StreamingChatMessageContent]]:
+        tokens = self._reply_tokens(self._prompt(chat_history), settings)
+        await self._wait_for_first_token()
+        interval = 1.0 / self.tokens_per_second
+        for position, token in enumerate(tokens):
+            if position:
+                await asyncio.sleep(interval)
+            yield [
+                StreamingChatMessageContent(
+                    choice_index=0,
+                    role=ChatRole.ASSISTANT,
+                    content=token,
+                    ai_model_id=self.ai_model_id,
+                )
+            ]
+
+    async def _wait_for_first_token(self) -> None:
+        await asyncio.sleep(self.ttft_seconds)
+        if self.error_rate and self._random.random() < self.error_rate:
+            raise ServiceResponseException("Injected failure from the fake LLM backend.")
+
+    @staticmethod
+    def _prompt(chat_history) -> str:
+        messages = getattr(chat_history, "messages", None) or []
+        return "\n".join(message.content or "" for message in messages)
+
+    def _reply_tokens(self, prompt: str, settings) -> list[str]:
+        extension_data = getattr(settings, "extension_data", None) or {}
+        response_format = extension_data.get("response_format") or {}
+        if response_format.get("type") == "json_object":
+            if _FILM_ID.search(prompt):
+                return self._tokenize(self._batch_summary_json(prompt))
+            return self._tokenize(orjson.dumps(self._summary(prompt)).decode())
+
+        question = _QUESTION.search(prompt)
+        subject = question.group(1).strip() if question else "your request"
+        words = f"Simulated answer to: {subject}.".split()
+        limit = max(self.response_tokens, len(words))
+        while len(words) < limit:
+            words.extend(_FILLER)
+        return self._tokenize(" ".join(words[:limit]))
+
+    @staticmethod
+    def _tokenize(text: str) -> list[str]:
+        return re.findall(r"\S+\s*", text)
+
+    @staticmethod
+    def _summary(prompt: str) -> dict[str, Any]:
+        fields = {}
+        for name, pattern in _SUMMARY_FIELDS.items():
+            match = pattern.search(prompt)
+            fields[name] = match.group(1).strip() if match else None
+        try:
+            cheap = float(fields["rental_rate"] or "") < 3.0
+        except ValueError:
+            cheap = False
+        rating = fields["rating"] or None
+        recommended = cheap and (rating or "").upper() in _STRICT_RATINGS
+        return {"title": fields["title"] or None, "rating": rating, "recommended": recommended}
+
+    @classmethod
+    def _batch_summary_json(cls, prompt: str) -> str:
+        blocks = _FILM_ID.split(prompt)[1:]
+        summaries = [
+            {"film_id": int(film_id), **cls._summary(block)}
+            for film_id, block in zip(blocks[::2], blocks[1::2])
+        ]
+        return orjson.dumps({"summaries": summaries}).decode()
+
+    @staticmethod
+    def _usage(prompt: str, tokens: list[str]) -> CompletionUsage:
+        prompt_tokens = len(prompt.split())
+        return CompletionUsage(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=len(tokens),
+            total_tokens=prompt_tokens + len(tokens),
+        )
+
+
+def create_fake_chat_service(settings: Settings, service_id: str) -> FakeChatCompletion:
+    return FakeChatCompletion(
+        ai_model_id=f"fake-{settings.openai_model}",
+        service_id=service_id,
+        ttft_seconds=settings.fake_llm_ttft_ms / 1000.0,
+        tokens_per_second=settings.fake_llm_tokens_per_second,
+        error_rate=settings.fake_llm_error_rate,
+        response_tokens=settings.fake_llm_response_tokens,
+        seed=settings.fake_llm_seed,
+    )
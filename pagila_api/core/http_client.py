@@ -0,0 +1,89 @@
+"""Application-owned HTTP client shared by outbound LLM calls.
+
+One pooled ``httpx.AsyncClient`` is reused for the lifetime of the process so
+TCP/TLS handshakes are paid once, not on every burst of requests. ``lifespan``
+opens a few keep-alive connections ahead of traffic and closes the pool on
+shutdown.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+
+import httpx
+
+from .config import Settings
+from .logging import get_logger
+
+DEFAULT_OPENAI_BASE_URL = "https://api.openai.com/v1"
+
+_client: httpx.AsyncClient | None = None
+
+
+def _http2_enabled(settings: Settings) -> bool:
+    if not settings.openai_http2:
+        return False
+    if importlib.util.find_spec("h2") is None:
+        get_logger().warning("http2_unavailable", reason="install httpx[http2] to enable HTTP/2")
+        return False
+    return True
+
+
+def create_http_client(settings: Settings) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=_http2_enabled(settings),
+        limits=httpx.Limits(
+            max_connections=settings.openai_max_connections,
+            max_keepalive_connections=settings.openai_max_keepalive_connections,
+            keepalive_expiry=settings.openai_keepalive_expiry_seconds,
+        ),
+        timeout=httpx.Timeout(
+            settings.openai_read_timeout_seconds,
+            connect=settings.openai_connect_timeout_seconds,
+            pool=settings.openai_pool_timeout_seconds,
+        ),
+    )
+
+
+def get_http_client(settings: Settings) -> httpx.AsyncClient:
+    """Return the process-wide client, creating it from ``settings`` on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_http_client(settings)
+    return _client
+
+
+async def warm_up_http_client(settings: Settings) -> None:
+    """Open ``OPENAI_WARMUP_CONNECTIONS`` keep-alive connections to the LLM endpoint.
+
+    Any response, including 401/404, means the handshake is done and the
+    connection is back in the pool; failures are logged and otherwise ignored.
+    """
+    if (
+        not settings.enable_ai
+        or settings.llm_backend != "openai"
+        or not settings.openai_api_key
+        or settings.openai_warmup_connections <= 0
+    ):
+        return
+
+    client = get_http_client(settings)
+    url = settings.openai_base_url or DEFAULT_OPENAI_BASE_URL
+    results = await asyncio.gather(
+        *(client.head(url) for _ in range(settings.openai_warmup_connections)),
+        return_exceptions=True,
+    )
+    errors = [str(result) for result in results if isinstance(result, Exception)]
+    log = get_logger(url=url, connections=settings.openai_warmup_connections)
+    if errors:
+        log.warning("http_client_warmup_failed", errors=len(errors), error=errors[0])
+    else:
+        log.info("http_client_warmed_up")
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
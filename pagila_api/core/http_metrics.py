@@ -0,0 +1,133 @@
+"""Request metrics middleware and the ``/metrics`` exposition.
+
+The middleware is a plain ASGI callable rather than ``BaseHTTPMiddleware``,
+so it adds no extra task per request and never buffers streaming bodies.
+Under several workers each process publishes snapshots to
+``METRICS_MULTIPROC_DIR`` and a scrape of any worker merges them all.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from pathlib import Path
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import Settings
+from .db import pool_status
+from .metrics import (
+    REGISTRY,
+    merge_snapshots,
+    read_snapshots,
+    remove_snapshot,
+    render_prometheus,
+    write_snapshot,
+)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+# Flush intervals a worker's snapshot may miss before it is taken for a dead worker's.
+STALE_SNAPSHOT_FLUSHES = 3
+
+_requests = REGISTRY.counter(
+    "http_requests_total", "HTTP requests served.", ("method", "route", "status")
+)
+_latency = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "Time until response headers were sent.",
+    ("method", "route", "status"),
+)
+_in_flight = REGISTRY.gauge("http_requests_in_flight", "HTTP requests currently being handled.")
+_streams_open = REGISTRY.gauge(
+    "http_streams_open", "Streaming (text/event-stream) responses still sending.", ("route",)
+)
+_stream_duration = REGISTRY.histogram(
+    "http_stream_duration_seconds",
+    "Time from request start until a streaming response finished.",
+    ("route", "status"),
+    buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0),
+)
+_pool_gauges = {
+    name: REGISTRY.gauge(f"db_pool_{name}", f"Database connection pool {name}.")
+    for name in ("size", "checkedin", "checkedout", "overflow")
+}
+
+
+def _route_template(scope: Scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path_format", None) or getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+def _is_event_stream(message: Message) -> bool:
+    for name, value in message.get("headers", ()):
+        if name.lower() == b"content-type":
+            return value.startswith(b"text/event-stream")
+    return False
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+        headers_sent: float | None = None
+        stream_route: str | None = None
+
+        async def send_with_metrics(message: Message) -> None:
+            nonlocal status, headers_sent, stream_route
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers_sent = time.perf_counter()
+                if _is_event_stream(message):
+                    stream_route = _route_template(scope)
+                    _streams_open.inc(route=stream_route)
+            await send(message)
+
+        _in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            finished = time.perf_counter()
+            _in_flight.dec()
+            route = _route_template(scope)
+            labels = {"method": scope["method"], "route": route, "status": str(status)}
+            _requests.inc(**labels)
+            _latency.observe((headers_sent or finished) - started, **labels)
+            if stream_route is not None:
+                _streams_open.dec(route=stream_route)
+                _stream_duration.observe(finished - started, route=stream_route, status=str(status))
+
+
+def refresh_pool_gauges() -> None:
+    for name, value in pool_status().items():
+        _pool_gauges[name].set(value)
+
+
+def render_metrics(settings: Settings) -> str:
+    """Prometheus text for this process, or for every worker when a snapshot dir is set."""
+    refresh_pool_gauges()
+    if not settings.metrics_multiproc_dir:
+        return render_prometheus(REGISTRY.snapshot())
+    directory = Path(settings.metrics_multiproc_dir)
+    write_snapshot(directory)
+    max_age = STALE_SNAPSHOT_FLUSHES * settings.metrics_flush_seconds
+    return render_prometheus(merge_snapshots(read_snapshots(directory, max_age=max_age)))
+
+
+async def publish_metrics_periodically(settings: Settings) -> None:
+    """Keep this worker's snapshot fresh so scrapes served by siblings include it."""
+    directory = Path(settings.metrics_multiproc_dir or "")
+    try:
+        while True:
+            refresh_pool_gauges()
+            write_snapshot(directory)
+            await asyncio.sleep(settings.metrics_flush_seconds)
+    finally:
+        remove_snapshot(directory)
@@ -0,0 +1,318 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+from .config import Settings
+from .metrics import REGISTRY
+
+T = TypeVar("T")
+
+_in_flight = REGISTRY.gauge("llm_in_flight", "LLM calls currently running.", ("route",))
+_queue_depth = REGISTRY.gauge("llm_queue_depth", "LLM calls waiting for a slot.", ("route",))
+_rejected = REGISTRY.counter(
+    "llm_rejected_total", "LLM calls refused by the governor.", ("reason",)
+)
+_breaker_state = REGISTRY.gauge(
+    "llm_circuit_state",
+    "LLM circuit breaker state (0=closed, 1=half-open, 2=open).",
+    aggregate="max",
+)
+
+
+class LLMUnavailableError(RuntimeError):
+    """Raised when the governor refuses or abandons an LLM call."""
+
+    def __init__(self, message: str, retry_after: float | None = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class QueueFullError(LLMUnavailableError):
+    """No slot became free and the wait queue is full or timed out."""
+
+
+class CircuitOpenError(LLMUnavailableError):
+    """The upstream is considered unhealthy; calls fail fast until it recovers."""
+
+
+class DeadlineExceededError(LLMUnavailableError):
+    """The call did not finish within its deadline."""
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    HALF_OPEN = "half_open"
+    OPEN = "open"
+
+    _STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(
+        self,
+        failure_threshold: int,
+        reset_timeout: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._clock = clock
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._state = self.CLOSED
+        _breaker_state.set(0)
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self._reset_timeout:
+            self._set_state(self.HALF_OPEN)
+        return self._state
+
+    @property
+    def retry_after(self) -> float:
+        if self.state != self.OPEN:
+            return 0.0
+        return max(0.0, self._reset_timeout - (self._clock() - self._opened_at))
+
+    def check(self) -> None:
+        """Raise ``CircuitOpenError`` if a call would be refused right now."""
+        state = self.state
+        if state == self.OPEN:
+            raise CircuitOpenError("LLM upstream is unavailable.", retry_after=self.retry_after)
+        if state == self.HALF_OPEN and self._probe_in_flight:
+            raise CircuitOpenError("LLM upstream is recovering.", retry_after=1.0)
+
+    def before_call(self) -> None:
+        self.check()
+        if self._state == self.HALF_OPEN:
+            self._probe_in_flight = True
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._probe_in_flight = False
+        self._set_state(self.CLOSED)
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._probe_in_flight = False
+        if self._state == self.HALF_OPEN or self._failures >= self._failure_threshold:
+            self._opened_at = self._clock()
+            self._set_state(self.OPEN)
+
+    def release_probe(self) -> None:
+        """Forget a half-open probe that ended without a verdict (e.g. client went away)."""
+        self._probe_in_flight = False
+
+    def _set_state(self, state: str) -> None:
+        self._state = state
+        _breaker_state.set(self._STATE_VALUES[state])
+
+
+@dataclass(slots=True)
+class Permit:
+    route: str
+    queue_wait: float
+
+
+class _Pool:
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.semaphore = asyncio.Semaphore(limit)
+        self.in_flight = 0
+        self.waiting = 0
+
+
+class LLMGovernor:
+    """Bounds concurrent LLM calls globally and per route.
+
+    Calls beyond the limits wait in a bounded queue for at most
+    ``queue_timeout`` seconds. Every admitted call runs under a deadline, and
+    failures feed a circuit breaker that rejects calls while it is open.
+    """
+
+    def __init__(
+        self,
+        *,
+        global_limit: int,
+        route_limits: dict[str, int] | None = None,
+        max_queue: int,
+        queue_timeout: float,
+        call_timeout: float,
+        breaker: CircuitBreaker,
+    ):
+        self._global = _Pool(global_limit)
+        self._route_limits = dict(route_limits or {})
+        self._routes: dict[str, _Pool] = {}
+        self._max_queue = max_queue
+        self._queue_timeout = queue_timeout
+        self.call_timeout = call_timeout
+        self.breaker = breaker
+
+    def _pool(self, route: str) -> _Pool:
+        pool = self._routes.get(route)
+        if pool is None:
+            pool = _Pool(self._route_limits.get(route, self._global.limit))
+            self._routes[route] = pool
+        return pool
+
+    def concurrency(self, route: str) -> int:
+        """How many calls on ``route`` can be in flight at once."""
+        return min(self._pool(route).limit, self._global.limit)
+
+    def _queued(self) -> int:
+        return sum(pool.waiting for pool in self._routes.values())
+
+    def check(self, route: str) -> None:
+        """Fail fast, without waiting, if a call on ``route`` would be refused."""
+        self.breaker.check()
+        pool = self._pool(route)
+        saturated = pool.semaphore.locked() or self._global.semaphore.locked()
+        if saturated and self._queued() >= self._max_queue:
+            _rejected.inc(reason="queue_full")
+            raise QueueFullError("Too many pending LLM calls.", retry_after=self._queue_timeout)
+
+    @asynccontextmanager
+    async def slot(self, route: str) -> AsyncIterator[Permit]:
+        try:
+            self.check(route)
+        except CircuitOpenError:
+            _rejected.inc(reason="circuit_open")
+            raise
+
+        pool = self._pool(route)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        pool.waiting += 1
+        _queue_depth.inc(route=route)
+        acquired: list[asyncio.Semaphore] = []
+        try:
+            async with asyncio.timeout(self._queue_timeout):
+                for semaphore in (pool.semaphore, self._global.semaphore):
+                    await semaphore.acquire()
+                    acquired.append(semaphore)
+        except TimeoutError:
+            for semaphore in acquired:
+                semaphore.release()
+            _rejected.inc(reason="queue_timeout")
+            raise QueueFullError(
+                "Timed out waiting for LLM capacity.", retry_after=self._queue_timeout
+            ) from None
+        except BaseException:
+            for semaphore in acquired:
+                semaphore.release()
+            raise
+        finally:
+            pool.waiting -= 1
+            _queue_depth.dec(route=route)
+
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError:
+            for semaphore in acquired:
+                semaphore.release()
+            _rejected.inc(reason="circuit_open")
+            raise
+
+        pool.in_flight += 1
+        _in_flight.inc(route=route)
+        try:
+            yield Permit(route=route, queue_wait=loop.time() - started)
+        except (asyncio.CancelledError, GeneratorExit):
+            self.breaker.release_probe()
+            raise
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        else:
+            self.breaker.record_success()
+        finally:
+            pool.in_flight -= 1
+            _in_flight.dec(route=route)
+            for semaphore in acquired:
+                semaphore.release()
+
+    async def call(
+        self,
+        route: str,
+        operation: Callable[[], Awaitable[T]],
+        on_admit: Callable[[Permit], None] | None = None,
+    ) -> T:
+        """Run ``operation`` inside a slot, bounded by the per-call deadline."""
+        async with self.slot(route) as permit:
+            if on_admit is not None:
+                on_admit(permit)
+            try:
+                return await asyncio.wait_for(operation(), self.call_timeout)
+            except TimeoutError:
+                raise DeadlineExceededError(
+                    f"LLM call exceeded {self.call_timeout:g}s.", retry_after=1.0
+                ) from None
+
+    async def stream(
+        self,
+        route: str,
+        open_stream: Callable[[], AsyncIterator[T]],
+        on_admit: Callable[[Permit], None] | None = None,
+    ) -> AsyncIterator[T]:
+        """Iterate a streamed call inside a slot; the deadline covers the whole stream."""
+        async with self.slot(route) as permit:
+            if on_admit is not None:
+                on_admit(permit)
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.call_timeout
+            iterator = aiter(open_stream())
+            try:
+                while True:
+                    try:
+                        item = await asyncio.wait_for(anext(iterator), deadline - loop.time())
+                    except StopAsyncIteration:
+                        break
+                    except TimeoutError:
+                        raise DeadlineExceededError(
+                            f"LLM stream exceeded {self.call_timeout:g}s.", retry_after=1.0
+                        ) from None
+                    yield item
+            finally:
+                aclose = getattr(iterator, "aclose", None)
+                if aclose is not None:
+                    await aclose()
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "circuit": {"state": self.breaker.state, "retry_after": self.breaker.retry_after},
+            "global": {"limit": self._global.limit, "in_flight": self._global_in_flight()},
+            "queued": self._queued(),
+            "max_queue": self._max_queue,
+            "routes": {
+                route: {"limit": pool.limit, "in_flight": pool.in_flight, "waiting": pool.waiting}
+                for route, pool in sorted(self._routes.items())
+            },
+        }
+
+    def _global_in_flight(self) -> int:
+        return sum(pool.in_flight for pool in self._routes.values())
+
+
+_governor: LLMGovernor | None = None
+
+
+def get_llm_governor(settings: Settings) -> LLMGovernor:
+    """Return the process-wide governor, creating it from ``settings`` on first use."""
+    global _governor
+    if _governor is None:
+        _governor = LLMGovernor(
+            global_limit=settings.llm_max_concurrency,
+            route_limits=settings.llm_route_concurrency,
+            max_queue=settings.llm_max_queue,
+            queue_timeout=settings.llm_queue_timeout_seconds,
+            call_timeout=settings.llm_call_timeout_seconds,
+            breaker=CircuitBreaker(
+                failure_threshold=settings.llm_breaker_failure_threshold,
+                reset_timeout=settings.llm_breaker_reset_seconds,
+            ),
+        )
+    return _governor
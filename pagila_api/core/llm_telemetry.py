@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import time
+from collections.abc import Callable
+from typing import Any
+
+from .llm_governor import Permit
+from .logging import get_logger
+from .metrics import REGISTRY
+
+_TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+_CHUNK_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+_queue_wait = REGISTRY.histogram(
+    "llm_queue_wait_seconds", "Time spent waiting for an LLM slot.", ("route",)
+)
+_time_to_first_token = REGISTRY.histogram(
+    "llm_time_to_first_token_seconds",
+    "Time from call start to the first streamed chunk.",
+    ("route", "outcome"),
+)
+_duration = REGISTRY.histogram(
+    "llm_call_duration_seconds", "Total duration of an AI call.", ("route", "outcome")
+)
+_chunks = REGISTRY.histogram(
+    "llm_call_chunks", "Chunks produced per AI call.", ("route", "outcome"), buckets=_CHUNK_BUCKETS
+)
+_tokens = REGISTRY.histogram(
+    "llm_call_tokens",
+    "Tokens per LLM call as reported by the connector.",
+    ("route", "kind"),
+    buckets=_TOKEN_BUCKETS,
+)
+_json_failures = REGISTRY.counter(
+    "llm_json_parse_failures_total", "LLM responses that were not valid JSON.", ("route",)
+)
+
+
+def usage_tokens(usage: Any) -> tuple[int | None, int | None]:
+    """Read ``(prompt_tokens, completion_tokens)`` from an OpenAI usage object or dict."""
+    if usage is None:
+        return None, None
+    if isinstance(usage, dict):
+        return usage.get("prompt_tokens"), usage.get("completion_tokens")
+    return getattr(usage, "prompt_tokens", None), getattr(usage, "completion_tokens", None)
+
+
+class LLMCallTelemetry:
+    """Collects timings and token counts for one AI call and reports them once it ends.
+
+    ``outcome`` is one of ``ok``, ``cached``, ``error``, ``cancelled`` or
+    ``invalid_json``; cache hits are recorded too, so their latency can be
+    compared with real completions on the same route.
+    """
+
+    def __init__(self, route: str, clock: Callable[[], float] = time.perf_counter):
+        self.route = route
+        self._clock = clock
+        self._started = clock()
+        self.queue_wait: float | None = None
+        self.time_to_first_token: float | None = None
+        self.chunks = 0
+        self.prompt_tokens: int | None = None
+        self.completion_tokens: int | None = None
+
+    def admitted(self, permit: Permit) -> None:
+        self.queue_wait = permit.queue_wait
+
+    def chunk(self) -> None:
+        if self.chunks == 0:
+            self.time_to_first_token = self._clock() - self._started
+        self.chunks += 1
+
+    def usage(self, usage: Any) -> None:
+        prompt_tokens, completion_tokens = usage_tokens(usage)
+        if prompt_tokens is not None:
+            self.prompt_tokens = prompt_tokens
+        if completion_tokens is not None:
+            self.completion_tokens = completion_tokens
+
+    def json_failure(self) -> None:
+        _json_failures.inc(route=self.route)
+
+    def finish(self, outcome: str) -> None:
+        duration = self._clock() - self._started
+        labels = {"route": self.route, "outcome": outcome}
+        _duration.observe(duration, **labels)
+        _chunks.observe(self.chunks, **labels)
+        if self.queue_wait is not None:
+            _queue_wait.observe(self.queue_wait, route=self.route)
+        if self.time_to_first_token is not None:
+            _time_to_first_token.observe(self.time_to_first_token, **labels)
+        if self.prompt_tokens is not None:
+            _tokens.observe(self.prompt_tokens, route=self.route, kind="prompt")
+        if self.completion_tokens is not None:
+            _tokens.observe(self.completion_tokens, route=self.route, kind="completion")
+
+        get_logger().info(
+            "llm_call",
+            route=self.route,
+            outcome=outcome,
+            duration_ms=round(duration * 1000, 1),
+            queue_wait_ms=_milliseconds(self.queue_wait),
+            ttft_ms=_milliseconds(self.time_to_first_token),
+            chunks=self.chunks,
+            prompt_tokens=self.prompt_tokens,
+            completion_tokens=self.completion_tokens,
+        )
+
+
+def _milliseconds(seconds: float | None) -> float | None:
+    return None if seconds is None else round(seconds * 1000, 1)
@@ -1,10 +1,22 @@
 import logging
+import queue
+import random
 import sys
-from typing import Any
+import threading
+from collections.abc import Callable, Sequence
+from typing import Any, TextIO
 
 import structlog
 
 from .config import Settings
+from .metrics import REGISTRY
+
+_dropped = REGISTRY.counter(
+    "log_events_dropped_total", "Log events discarded before being written.", ("reason",)
+)
+
+_STOP = object()
+_ALWAYS_KEPT = {"warning", "error", "critical", "exception"}
 
 
 def _configure_stdlib(level: int) -> None:
@@ -16,27 +28,148 @@ def _configure_stdlib(level: int) -> None:
     )
 
 
+class EventSampler:
+    """structlog processor keeping only a fraction of selected high-volume events.
+
+    Rates are keyed by event name; warnings and errors are never sampled out.
+    """
+
+    def __init__(self, rates: dict[str, float], rng: Callable[[], float] = random.random):
+        self._rates = rates
+        self._rng = rng
+
+    def __call__(self, logger: Any, method_name: str, event_dict: dict[str, Any]) -> dict[str, Any]:
+        rate = self._rates.get(event_dict.get("event"))
+        if rate is None or rate >= 1 or method_name in _ALWAYS_KEPT:
+            return event_dict
+        if rate <= 0 or self._rng() >= rate:
+            _dropped.inc(reason="sampled")
+            raise structlog.DropEvent
+        return event_dict
+
+
+class QueueLogWriter:
+    """Renders and writes log events on a background thread.
+
+    Callers only enqueue the event dict, so a slow stdout never blocks the
+    event loop. The buffer is bounded: when it is full new events are dropped
+    and counted, and the writer reports how many were lost once it catches up.
+    Once closed, events still reaching it (from loggers bound earlier) are
+    rendered and written by the caller.
+    """
+
+    def __init__(
+        self,
+        renderers: Sequence[structlog.types.Processor],
+        stream: TextIO | None = None,
+        max_size: int = 10_000,
+    ):
+        self._renderers = list(renderers)
+        self._stream = stream or sys.stdout
+        self._queue: queue.Queue[Any] = queue.Queue(maxsize=max_size)
+        self._lost = 0
+        self._lost_lock = threading.Lock()
+        self._closed = False
+        self._closing = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def __call__(self, logger: Any, method_name: str, event_dict: dict[str, Any]) -> Any:
+        """Final processor: hand the event to the writer thread instead of the logger."""
+        with self._closing:
+            closed = self._closed
+            if not closed:
+                try:
+                    self._queue.put_nowait((method_name, event_dict))
+                except queue.Full:
+                    _dropped.inc(reason="buffer_full")
+                    with self._lost_lock:
+                        self._lost += 1
+        if closed:
+            # Nobody reads the queue any more: write it here rather than lose it.
+            self._stream.write(self._render(method_name, event_dict) + "\n")
+            self._stream.flush()
+        raise structlog.DropEvent
+
+    def _render(self, method_name: str, event_dict: Any) -> str:
+        for renderer in self._renderers:
+            event_dict = renderer(None, method_name, event_dict)
+        return event_dict if isinstance(event_dict, str) else str(event_dict)
+
+    def _run(self) -> None:
+        while True:
+            items = [self._queue.get()]
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            lines: list[str] = []
+            stop = False
+            for item in items:
+                if item is _STOP:
+                    stop = True
+                    continue
+                try:
+                    lines.append(self._render(*item))
+                except Exception as exc:  # a bad event must not kill the writer
+                    lines.append(f"log_render_failed: {exc!r}")
+            with self._lost_lock:
+                lost, self._lost = self._lost, 0
+            if lost:
+                lines.append(
+                    self._render("warning", {"event": "log_events_dropped", "count": lost})
+                )
+            if lines:
+                self._stream.write("\n".join(lines) + "\n")
+                self._stream.flush()
+            for _ in items:
+                self._queue.task_done()
+            if stop:
+                return
+
+    def close(self, timeout: float | None = 5.0) -> None:
+        with self._closing:
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+
+_writer: QueueLogWriter | None = None
+_synchronous_processors: list[structlog.types.Processor] = []
+
+
 def configure_logging(settings: Settings) -> None:
+    from .query_stats import add_query_stats
+
+    shutdown_logging()
     log_level = logging.INFO
     _configure_stdlib(log_level)
 
     shared_processors: list[structlog.types.Processor] = [
         structlog.contextvars.merge_contextvars,
+        add_query_stats,
         structlog.processors.add_log_level,
         structlog.processors.TimeStamper(fmt="iso", key="timestamp"),
     ]
+    if settings.log_sample_rates:
+        shared_processors.insert(0, EventSampler(settings.log_sample_rates))
 
     if settings.log_json or settings.environment == "prod":
-        processors: list[structlog.types.Processor] = [
-            *shared_processors,
+        renderers: list[structlog.types.Processor] = [
             structlog.processors.EventRenamer("message"),
             structlog.processors.JSONRenderer(),
         ]
     else:
-        processors = [
-            *shared_processors,
-            structlog.dev.ConsoleRenderer(colors=True),
-        ]
+        renderers = [structlog.dev.ConsoleRenderer(colors=True)]
+
+    processors = [*shared_processors, *renderers]
+    if settings.log_async:
+        global _writer, _synchronous_processors
+        _writer = QueueLogWriter(renderers, max_size=settings.log_buffer_size)
+        _synchronous_processors = processors
+        processors = [*shared_processors, _writer]
 
     structlog.configure(
         processors=processors,
@@ -47,5 +180,16 @@ def configure_logging(settings: Settings) -> None:
     )
 
 
+def shutdown_logging() -> None:
+    """Write out buffered events and stop the background writer, if one is running."""
+    global _writer
+    if _writer is not None:
+        # Loggers created from now on skip the writer; ones bound earlier keep
+        # it as their last processor, and a closed writer writes for them itself.
+        structlog.configure(processors=_synchronous_processors)
+        _writer.close()
+        _writer = None
+
+
 def get_logger(**initial_values: Any) -> structlog.stdlib.BoundLogger:
     return structlog.get_logger().bind(**initial_values)
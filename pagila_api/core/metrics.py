@@ -0,0 +1,314 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from bisect import bisect_left
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Any, NamedTuple
+
+LabelValues = tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+
+    def _key(self, labels: dict[str, str]) -> LabelValues:
+        if labels.keys() != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterator[tuple[LabelValues, Any]]:
+        raise NotImplementedError
+
+    def snapshot(self) -> dict[str, Any]:
+        """JSON-serialisable state, used to merge metrics across worker processes."""
+        return {
+            "kind": self.kind,
+            "help": self.documentation,
+            "labelnames": list(self.labelnames),
+            "aggregate": getattr(self, "aggregate", "sum"),
+            "samples": [[list(key), value] for key, value in self.samples()],
+        }
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase.")
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterator[tuple[LabelValues, float]]:
+        yield from self._values.items()
+
+
+class Gauge(_Metric):
+    """A value that can go up and down.
+
+    ``aggregate`` decides how values from several worker processes are merged:
+    ``sum`` for things like in-flight requests, ``max`` for states.
+    """
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        aggregate: str = "sum",
+    ):
+        super().__init__(name, documentation, labelnames)
+        if aggregate not in ("sum", "max"):
+            raise ValueError(f"Unsupported gauge aggregation: {aggregate}")
+        self.aggregate = aggregate
+        self._values: dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterator[tuple[LabelValues, float]]:
+        yield from self._values.items()
+
+
+class HistogramSample(NamedTuple):
+    buckets: list[tuple[float, int]]
+    """Cumulative ``(upper_bound, count)`` pairs, ending with ``+Inf``."""
+    sum: float
+    count: int
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: dict[LabelValues, list[int]] = {}
+        self._sums: dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        counts = self._counts.get(key)
+        if counts is None:
+            counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+            self._sums[key] = 0.0
+        counts[bisect_left(self.buckets, value)] += 1
+        self._sums[key] += value
+
+    def count(self, **labels: str) -> int:
+        return sum(self._counts.get(self._key(labels), ()))
+
+    def sum(self, **labels: str) -> float:
+        return self._sums.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterator[tuple[LabelValues, HistogramSample]]:
+        for key, counts in self._counts.items():
+            cumulative: list[tuple[float, int]] = []
+            running = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                running += count
+                cumulative.append((bound, running))
+            yield key, HistogramSample(cumulative, self._sums[key], running)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "help": self.documentation,
+            "labelnames": list(self.labelnames),
+            "buckets": list(self.buckets),
+            "samples": [
+                [list(key), list(counts), self._sums[key]] for key, counts in self._counts.items()
+            ],
+        }
+
+
+class MetricsRegistry:
+    """Process-local registry; metrics are created once and looked up by name."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+
+    def _get_or_create(
+        self, cls: type, name: str, documentation: str, labelnames: tuple[str, ...], **options
+    ):
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = cls(name, documentation, labelnames, **options)
+            self._metrics[name] = metric
+        elif not isinstance(metric, cls) or metric.labelnames != labelnames:
+            raise ValueError(f"Metric {name} already registered with a different shape.")
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        aggregate: str = "sum",
+    ) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames, aggregate=aggregate)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def collect(self) -> list[_Metric]:
+        return list(self._metrics.values())
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        return {metric.name: metric.snapshot() for metric in self.collect()}
+
+
+REGISTRY = MetricsRegistry()
+
+Snapshot = dict[str, dict[str, Any]]
+
+
+def merge_snapshots(snapshots: Iterable[Snapshot]) -> Snapshot:
+    """Combine per-process snapshots: counters and histograms add up, gauges per ``aggregate``."""
+    merged: Snapshot = {}
+    for snapshot in snapshots:
+        for name, metric in snapshot.items():
+            target = merged.get(name)
+            if target is None:
+                merged[name] = {**metric, "samples": [list(sample) for sample in metric["samples"]]}
+                continue
+            if target["kind"] != metric["kind"] or target.get("buckets") != metric.get("buckets"):
+                continue
+            index = {tuple(sample[0]): sample for sample in target["samples"]}
+            for sample in metric["samples"]:
+                existing = index.get(tuple(sample[0]))
+                if existing is None:
+                    copied = list(sample)
+                    target["samples"].append(copied)
+                    index[tuple(sample[0])] = copied
+                elif metric["kind"] == "histogram":
+                    existing[1] = [a + b for a, b in zip(existing[1], sample[1])]
+                    existing[2] += sample[2]
+                elif target.get("aggregate") == "max":
+                    existing[1] = max(existing[1], sample[1])
+                else:
+                    existing[1] += sample[1]
+    return merged
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def render_prometheus(snapshot: Snapshot) -> str:
+    """Render a snapshot in the Prometheus text exposition format (version 0.0.4)."""
+    lines: list[str] = []
+    for name in sorted(snapshot):
+        metric = snapshot[name]
+        labelnames = metric["labelnames"]
+        documentation = metric["help"].replace("\\", "\\\\").replace("\n", "\\n")
+        lines.append(f"# HELP {name} {documentation}")
+        lines.append(f"# TYPE {name} {metric['kind']}")
+        if metric["kind"] != "histogram":
+            for values, value in metric["samples"]:
+                lines.append(f"{name}{_labels(labelnames, values)} {_number(value)}")
+            continue
+        bounds = [*metric["buckets"], float("inf")]
+        for values, counts, total in metric["samples"]:
+            running = 0
+            for bound, count in zip(bounds, counts):
+                running += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{name}_bucket{_labels(labelnames, values, le)} {running}")
+            lines.append(f"{name}_sum{_labels(labelnames, values)} {_number(total)}")
+            lines.append(f"{name}_count{_labels(labelnames, values)} {running}")
+    return "\n".join(lines) + "\n"
+
+
+def write_snapshot(
+    directory: Path, registry: MetricsRegistry = REGISTRY, pid: int | None = None
+) -> None:
+    """Atomically publish this process's metrics for other workers to aggregate."""
+    directory.mkdir(parents=True, exist_ok=True)
+    target = directory / f"{pid or os.getpid()}.json"
+    temporary = target.with_suffix(".tmp")
+    temporary.write_text(json.dumps(registry.snapshot()), encoding="utf-8")
+    os.replace(temporary, target)
+
+
+def read_snapshots(directory: Path, max_age: float | None = None) -> list[Snapshot]:
+    """Every snapshot in ``directory``.
+
+    Snapshots not rewritten for ``max_age`` seconds belong to workers that
+    died without removing theirs; they are deleted rather than merged, so
+    their in-flight gauges do not linger.
+    """
+    snapshots: list[Snapshot] = []
+    now = time.time()
+    for path in sorted(directory.glob("*.json")):
+        try:
+            if max_age is not None and now - path.stat().st_mtime > max_age:
+                path.unlink(missing_ok=True)
+                continue
+            snapshots.append(json.loads(path.read_text(encoding="utf-8")))
+        except (OSError, ValueError):
+            continue
+    return snapshots
+
+
+def remove_snapshot(directory: Path, pid: int | None = None) -> None:
+    (directory / f"{pid or os.getpid()}.json").unlink(missing_ok=True)
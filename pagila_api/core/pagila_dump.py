@@ -0,0 +1,303 @@
+"""Read ``pg_dump`` plain-text files: ``COPY ... FROM stdin`` blocks and schema scripts.
+
+Used to seed SQLite or Postgres with the real Pagila dataset without
+``psql`` (see ``app.load_data`` and the ``bench`` package). COPY sections are
+available raw, for streaming straight into Postgres, or decoded from
+PostgreSQL's text COPY format; when loaded through SQLAlchemy, values are
+coerced to the Python type of the matching SQLModel column and columns the
+models do not declare are dropped. Schema scripts are split into the
+pre-data and post-data statements ``pg_restore`` would run around the data.
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Iterable, Iterator, Sequence
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Callable
+
+from sqlalchemy import Table, insert, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+DEFAULT_DUMP_PATH = Path(__file__).resolve().parents[2] / "pagila_sql" / "pagila-data.sql"
+DEFAULT_SCHEMA_PATH = DEFAULT_DUMP_PATH.with_name("pagila-schema.sql")
+
+_COPY = re.compile(r"^COPY\s+(?:(\w+)\.)?(\w+)\s*\(([^)]*)\)\s+FROM\s+stdin;\s*$")
+_ESCAPE = re.compile(r"\\(?:([0-7]{1,3})|x([0-9A-Fa-f]{1,2})|(.))")
+_SIMPLE_ESCAPES = {"b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t", "v": "\v"}
+# Pagila partitions payments by month (plus migration 0004's payment_p_default);
+# rows are loaded into the parent table.
+_PARTITION = re.compile(r"^(\w+?)_p(?:\d{4}_\d{2}|_default)$")
+_END_OF_DATA = "\\."
+_DOLLAR_QUOTE = re.compile(r"\$[A-Za-z_][A-Za-z0-9_]*\$|\$\$")
+_SESSION = re.compile(r"^(SET\s|SELECT\s+pg_catalog\.set_config\()", re.IGNORECASE)
+_OWNER = re.compile(r"\sOWNER\s+TO\s", re.IGNORECASE)
+_POST_DATA = re.compile(
+    r"^(CREATE\s+(UNIQUE\s+)?INDEX|CREATE\s+TRIGGER|CREATE\s+RULE"
+    r"|ALTER\s+TABLE\s+(ONLY\s+)?\S+\s+ADD\s+CONSTRAINT"
+    r"|ALTER\s+INDEX\s+\S+\s+ATTACH\s+PARTITION)",
+    re.IGNORECASE,
+)
+_STATEMENT_TABLE = re.compile(
+    r"^(?:ALTER\s+TABLE\s+(?:ONLY\s+)?(\S+)|.*?\sON\s+(?:ONLY\s+)?(\S+))",
+    re.IGNORECASE | re.DOTALL,
+)
+_MATERIALIZED_VIEW = re.compile(r"^CREATE\s+MATERIALIZED\s+VIEW\s+(\S+)", re.IGNORECASE)
+_SEQUENCE_RESET = re.compile(r"^SELECT\s+pg_catalog\.setval\(.*\);$", re.MULTILINE)
+
+
+@dataclass(slots=True)
+class CopySection:
+    """One COPY section as written in the dump; ``data`` is still in COPY text format."""
+
+    schema: str | None
+    table: str
+    columns: list[str]
+    data: str
+
+
+@dataclass(slots=True)
+class CopyBlock:
+    table: str
+    columns: list[str]
+    rows: list[list[str | None]]
+
+
+def _unescape_match(match: re.Match[str]) -> str:
+    octal, hexadecimal, char = match.groups()
+    if octal is not None:
+        return chr(int(octal, 8))
+    if hexadecimal is not None:
+        return chr(int(hexadecimal, 16))
+    return _SIMPLE_ESCAPES.get(char, char)
+
+
+def decode_field(raw: str) -> str | None:
+    """Decode one field of PostgreSQL's text COPY format; ``\\N`` is NULL."""
+    if raw == "\\N":
+        return None
+    if "\\" not in raw:
+        return raw
+    return _ESCAPE.sub(_unescape_match, raw)
+
+
+def parent_table(table: str) -> str:
+    match = _PARTITION.match(table)
+    return match.group(1) if match else table
+
+
+def iter_copy_sections(stream: Iterable[str]) -> Iterator[CopySection]:
+    """Yield every COPY section in ``stream`` in file order, without decoding rows."""
+    lines = iter(stream)
+    for line in lines:
+        header = _COPY.match(line)
+        if header is None:
+            continue
+        columns = [column.strip().strip('"') for column in header.group(3).split(",")]
+        data: list[str] = []
+        for row in lines:
+            if row.rstrip("\n") == _END_OF_DATA:
+                break
+            data.append(row if row.endswith("\n") else row + "\n")
+        yield CopySection(
+            schema=header.group(1), table=header.group(2), columns=columns, data="".join(data)
+        )
+
+
+def iter_copy_blocks(stream: Iterable[str]) -> Iterator[CopyBlock]:
+    """Yield every COPY block in ``stream`` in file order, with rows decoded."""
+    for section in iter_copy_sections(stream):
+        rows = [
+            [decode_field(field) for field in row.split("\t")]
+            # Not splitlines(): COPY escapes \r and \n but leaves other line separators raw.
+            for row in section.data.split("\n")[:-1]
+        ]
+        yield CopyBlock(table=section.table, columns=section.columns, rows=rows)
+
+
+def read_copy_sections(path: Path = DEFAULT_DUMP_PATH) -> Iterator[CopySection]:
+    with path.open(encoding="utf-8") as handle:
+        yield from iter_copy_sections(handle)
+
+
+def read_copy_blocks(path: Path = DEFAULT_DUMP_PATH) -> Iterator[CopyBlock]:
+    with path.open(encoding="utf-8") as handle:
+        yield from iter_copy_blocks(handle)
+
+
+def _boolean(value: str) -> bool:
+    return value.lower() in {"t", "true", "1", "y", "yes"}
+
+
+_CONVERTERS: dict[type, Callable[[str], Any]] = {
+    int: int,
+    float: float,
+    Decimal: Decimal,
+    bool: _boolean,
+    datetime: datetime.fromisoformat,
+    date: date.fromisoformat,
+}
+
+
+def _converter(table: Table, column: str) -> Callable[[str], Any]:
+    try:
+        python_type = table.c[column].type.python_type
+    except NotImplementedError:
+        return str
+    return _CONVERTERS.get(python_type, str)
+
+
+def coerce_rows(block: CopyBlock, table: Table) -> tuple[list[str], list[dict[str, Any]]]:
+    """Keep the columns ``table`` declares and convert their values to Python types."""
+    keep = [(index, name) for index, name in enumerate(block.columns) if name in table.c]
+    converters = {name: _converter(table, name) for _, name in keep}
+    records = [
+        {name: None if row[index] is None else converters[name](row[index]) for index, name in keep}
+        for row in block.rows
+    ]
+    return [name for _, name in keep], records
+
+
+async def load_dump(
+    engine: AsyncEngine,
+    tables: Sequence[Table],
+    blocks: Iterable[CopyBlock],
+    *,
+    chunk_size: int = 5_000,
+) -> dict[str, int]:
+    """Insert the rows of ``blocks`` into the matching ``tables``; returns rows per table.
+
+    Blocks for tables not in ``tables`` are skipped. Rows are inserted with
+    ``executemany`` in chunks of ``chunk_size`` inside one transaction, in
+    dump order, which already respects foreign keys. On Postgres the serial
+    sequences are moved past the loaded ids afterwards.
+    """
+    by_name = {str(table.name): table for table in tables}
+    loaded: dict[str, int] = {}
+    async with engine.begin() as conn:
+        for block in blocks:
+            table = by_name.get(parent_table(block.table))
+            if table is None or not block.rows:
+                continue
+            _, records = coerce_rows(block, table)
+            for start in range(0, len(records), chunk_size):
+                await conn.execute(insert(table), records[start : start + chunk_size])
+            name = str(table.name)
+            loaded[name] = loaded.get(name, 0) + len(records)
+
+        if conn.dialect.name == "postgresql":
+            for name in loaded:
+                key = list(by_name[name].primary_key.columns)
+                if len(key) != 1:
+                    continue
+                column = key[0].name
+                await conn.execute(
+                    text(
+                        f"SELECT setval(pg_get_serial_sequence('{name}', '{column}'), "
+                        f"(SELECT COALESCE(MAX({column}), 1) FROM {name}))"
+                    )
+                )
+    return loaded
+
+
+@dataclass(slots=True)
+class SchemaScript:
+    """A ``pg_dump`` schema split the way ``pg_restore --section`` would run it.
+
+    ``session`` holds the leading ``SET``/``set_config`` statements, which
+    every connection running the rest needs; ``pre_data`` creates types,
+    tables, functions and views; ``post_data`` adds the indexes, constraints
+    and triggers that are cheaper to build once the rows are in.
+    """
+
+    session: list[str]
+    pre_data: list[str]
+    post_data: list[str]
+
+    @property
+    def materialized_views(self) -> list[str]:
+        return [
+            match.group(1)
+            for match in map(_MATERIALIZED_VIEW.match, self.pre_data)
+            if match is not None
+        ]
+
+
+def _strip_comments(statement: str) -> str:
+    lines = [line for line in statement.splitlines() if not line.lstrip().startswith("--")]
+    return "\n".join(lines).strip()
+
+
+def split_statements(script: str) -> list[str]:
+    """Split SQL on top-level semicolons, honouring quotes, dollar quotes and ``--`` comments."""
+    statements: list[str] = []
+    start = position = 0
+    quote: str | None = None
+    while position < len(script):
+        char = script[position]
+        if quote is None:
+            if script.startswith("--", position):
+                end = script.find("\n", position)
+                position = len(script) if end == -1 else end
+                continue
+            if char in "'\"":
+                quote = char
+            elif char == "$":
+                tag = _DOLLAR_QUOTE.match(script, position)
+                if tag is not None:
+                    quote = tag.group(0)
+                    position = tag.end()
+                    continue
+            elif char == ";":
+                statement = _strip_comments(script[start:position])
+                if statement:
+                    statements.append(statement)
+                start = position + 1
+        elif len(quote) == 1:
+            if char == quote:
+                quote = None
+        elif script.startswith(quote, position):
+            position += len(quote)
+            quote = None
+            continue
+        position += 1
+    tail = _strip_comments(script[start:])
+    if tail:
+        statements.append(tail)
+    return statements
+
+
+def split_schema(script: str, *, keep_owner: bool = False) -> SchemaScript:
+    """Classify the statements of a ``pg_dump --schema-only`` script.
+
+    ``ALTER ... OWNER TO`` statements are dropped unless ``keep_owner`` is
+    set, like ``pg_restore --no-owner``, so the load works without the roles
+    of the machine the dump came from.
+    """
+    schema = SchemaScript(session=[], pre_data=[], post_data=[])
+    for statement in split_statements(script):
+        if _SESSION.match(statement):
+            schema.session.append(statement)
+        elif not keep_owner and _OWNER.search(statement):
+            continue
+        elif _POST_DATA.match(statement):
+            schema.post_data.append(statement)
+        else:
+            schema.pre_data.append(statement)
+    return schema
+
+
+def statement_table(statement: str) -> str | None:
+    """The table a post-data statement (index, constraint, trigger) applies to."""
+    match = _STATEMENT_TABLE.match(statement)
+    if match is None:
+        return None
+    return match.group(1) or match.group(2)
+
+
+def sequence_resets(script: str) -> list[str]:
+    """The ``setval`` calls ``pg_dump`` writes after the data to move serial sequences on."""
+    return [match.group(0).rstrip(";") for match in _SEQUENCE_RESET.finditer(script)]
@@ -0,0 +1,146 @@
+"""Per-request SQL statement counts and timings, plus a slow-query log.
+
+Engine events time every cursor execution and add it to the ``QueryStats``
+held in a context variable for the current request. The totals are added to
+every structlog event (see ``core.logging``) and returned in a
+``Server-Timing`` header. Statements slower than ``SQL_SLOW_QUERY_MS``
+(0 disables) are logged with their parameters and, for reads, the
+database's query plan.
+"""
+
+from __future__ import annotations
+
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import Settings
+from .logging import get_logger
+
+_START_KEY = "query_stats_started"
+_EXPLAINABLE = ("select", "with")
+
+
+@dataclass(slots=True)
+class QueryStats:
+    count: int = 0
+    total_seconds: float = 0.0
+    slow: int = 0
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.total_seconds * 1000:.1f};desc="{self.count} queries"'
+
+
+_current: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+_explaining: ContextVar[bool] = ContextVar("query_stats_explaining", default=False)
+
+
+def current_query_stats() -> QueryStats | None:
+    return _current.get()
+
+
+def add_query_stats(logger: Any, method_name: str, event_dict: dict[str, Any]) -> dict[str, Any]:
+    """structlog processor adding the current request's query totals to each event."""
+    stats = _current.get()
+    if stats is not None and stats.count:
+        event_dict.setdefault("db_queries", stats.count)
+        event_dict.setdefault("db_ms", round(stats.total_seconds * 1000, 1))
+    return event_dict
+
+
+def _explain(conn: Connection, statement: str, parameters: Any) -> list[str] | None:
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        prefix = "EXPLAIN QUERY PLAN "
+    elif dialect == "postgresql":
+        prefix = "EXPLAIN "
+    else:
+        return None
+
+    token = _explaining.set(True)
+    try:
+        # A failed statement aborts a Postgres transaction, so isolate EXPLAIN in a savepoint.
+        savepoint = (
+            conn.begin_nested() if dialect == "postgresql" and conn.in_transaction() else None
+        )
+        try:
+            rows = conn.exec_driver_sql(prefix + statement, parameters).all()
+        except Exception:
+            if savepoint is not None:
+                savepoint.rollback()
+            return None
+        if savepoint is not None:
+            savepoint.commit()
+    finally:
+        _explaining.reset(token)
+    return [" | ".join(str(value) for value in row) for row in rows]
+
+
+def instrument_engine(engine: AsyncEngine, settings: Settings) -> None:
+    """Attach statement timing and the slow-query log to ``engine``."""
+    threshold = settings.sql_slow_query_ms / 1000.0 if settings.sql_slow_query_ms else None
+    explain = settings.sql_explain_slow_queries
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany) -> None:
+        conn.info[_START_KEY] = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany) -> None:
+        started = conn.info.pop(_START_KEY, None)
+        if started is None or _explaining.get():
+            return
+        elapsed = time.perf_counter() - started
+
+        stats = _current.get()
+        if stats is not None:
+            stats.count += 1
+            stats.total_seconds += elapsed
+
+        if threshold is None or elapsed < threshold:
+            return
+        if stats is not None:
+            stats.slow += 1
+        plan = None
+        if explain and not executemany and statement.lstrip().lower().startswith(_EXPLAINABLE):
+            plan = _explain(conn, statement, parameters)
+        get_logger().warning(
+            "slow_query",
+            duration_ms=round(elapsed * 1000, 1),
+            statement=statement,
+            parameters=parameters,
+            plan=plan,
+        )
+
+
+class QueryStatsMiddleware:
+    """Scopes a fresh ``QueryStats`` to each HTTP request and reports it in ``Server-Timing``."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current.set(stats)
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", ()))
+                headers.append((b"server-timing", stats.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
@@ -0,0 +1,275 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import signal
+import threading
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterator, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+from .config import Settings
+from .logging import get_logger
+from .metrics import REGISTRY
+
+HEARTBEAT_FRAME = ": keep-alive\n\n"
+# Sent to streams still open when the drain grace period ends; clients reconnect after ``retry`` ms.
+DRAIN_FRAME = "retry: 1000\nevent: drain\ndata: server is restarting\n\n"
+
+_frames_sent = REGISTRY.counter(
+    "sse_frames_sent_total", "SSE data frames written to clients.", ("stream",)
+)
+_heartbeats_sent = REGISTRY.counter(
+    "sse_heartbeats_sent_total", "SSE heartbeat comments written to clients.", ("stream",)
+)
+_disconnects = REGISTRY.counter(
+    "sse_client_disconnects_total", "SSE streams abandoned by the client.", ("stream",)
+)
+_tokens_wasted = REGISTRY.counter(
+    "sse_tokens_wasted_total",
+    "Upstream chunks received but never delivered because the client went away.",
+    ("stream",),
+)
+_streams_drained = REGISTRY.counter(
+    "sse_streams_drained_total",
+    "SSE streams ended early because the server was shutting down.",
+    ("stream",),
+)
+
+
+@dataclass(frozen=True, slots=True)
+class _Failure:
+    error: BaseException
+
+
+_END = object()
+_DRAIN = object()
+
+_draining = False
+_active_queues: set[asyncio.Queue[object]] = set()
+
+
+def is_draining() -> bool:
+    return _draining
+
+
+def begin_drain() -> None:
+    """Start the shutdown grace period for every open stream; must run on the event loop."""
+    global _draining
+    if _draining:
+        return
+    _draining = True
+    for queue in _active_queues:
+        queue.put_nowait(_DRAIN)
+
+
+@contextlib.contextmanager
+def drain_on_signals(signals: Sequence[int] = (signal.SIGINT, signal.SIGTERM)) -> Iterator[None]:
+    """Call ``begin_drain`` as soon as a shutdown signal arrives, then the previous handler.
+
+    The server only runs the lifespan shutdown once every connection has
+    closed, which is too late to warn long-lived streams, so the signal itself
+    is hooked. Outside the main thread (e.g. under test clients) this is a no-op.
+    """
+    global _draining
+    if threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    loop = asyncio.get_running_loop()
+    previous: dict[int, Any] = {}
+
+    def handler(signum: int, frame: Any) -> None:
+        loop.call_soon_threadsafe(begin_drain)
+        original = previous.get(signum)
+        if callable(original):
+            original(signum, frame)
+        elif original != signal.SIG_IGN:
+            signal.signal(signum, original or signal.SIG_DFL)
+            signal.raise_signal(signum)
+
+    for signum in signals:
+        previous[signum] = signal.signal(signum, handler)
+    try:
+        yield
+    finally:
+        for signum, original in previous.items():
+            signal.signal(signum, original if original is not None else signal.SIG_DFL)
+        _draining = False
+
+
+def format_data(text: str) -> str:
+    """Render ``text`` as one SSE event, splitting embedded newlines into ``data:`` lines."""
+    return "".join(f"data: {line}\n" for line in text.split("\n")) + "\n"
+
+
+def format_event(event: str, text: str) -> str:
+    """Render a named SSE event."""
+    return f"event: {event}\n{format_data(text)}"
+
+
+async def coalesce_events(
+    source: AsyncIterator[str],
+    *,
+    max_bytes: int,
+    window: float,
+    heartbeat: float,
+    is_disconnected: Callable[[], Awaitable[bool]] | None = None,
+    stream: str = "default",
+    drain_grace: float = 0.0,
+) -> AsyncIterator[str]:
+    """Turn a stream of text pieces into SSE frames.
+
+    Pieces are buffered until ``max_bytes`` accumulate or ``window`` seconds
+    pass since the first buffered piece, whichever comes first. A comment
+    frame is written after ``heartbeat`` idle seconds. The upstream iterator
+    runs in its own task so that a client disconnect, noticed before any
+    write, cancels it straight away instead of after the next upstream piece.
+
+    Once the server starts draining (see ``begin_drain``) the upstream gets
+    ``drain_grace`` more seconds to finish; after that buffered text is
+    flushed, ``DRAIN_FRAME`` is written and the stream ends.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue[object] = asyncio.Queue()
+    _active_queues.add(queue)
+
+    async def pump() -> None:
+        try:
+            async for piece in source:
+                queue.put_nowait(piece)
+        except Exception as exc:
+            queue.put_nowait(_Failure(exc))
+        else:
+            queue.put_nowait(_END)
+
+    producer = asyncio.create_task(pump())
+    buffer: list[str] = []
+    buffered_bytes = 0
+    flush_at: float | None = None
+    last_write = loop.time()
+    received = delivered = frames = 0
+    disconnected = False
+    drain_at: float | None = loop.time() + drain_grace if _draining else None
+
+    async def client_gone() -> bool:
+        return is_disconnected is not None and await is_disconnected()
+
+    try:
+        while True:
+            deadline = last_write + heartbeat if flush_at is None else flush_at
+            if drain_at is not None:
+                deadline = min(deadline, drain_at)
+            try:
+                item = await asyncio.wait_for(queue.get(), max(0.0, deadline - loop.time()))
+            except TimeoutError:
+                item = None
+
+            if item is _DRAIN:
+                item = None
+                if drain_at is None:
+                    drain_at = loop.time() + drain_grace
+
+            finished = item is _END or isinstance(item, _Failure)
+            if isinstance(item, str):
+                buffer.append(item)
+                buffered_bytes += len(item.encode("utf-8"))
+                received += 1
+                if flush_at is None:
+                    flush_at = loop.time() + window
+
+            now = loop.time()
+            due = flush_at is not None and now >= flush_at
+            drained = drain_at is not None and now >= drain_at and not finished
+            if buffer and (finished or due or drained or buffered_bytes >= max_bytes):
+                if await client_gone():
+                    disconnected = True
+                    break
+                yield format_data("".join(buffer))
+                delivered += len(buffer)
+                frames += 1
+                _frames_sent.inc(stream=stream)
+                buffer.clear()
+                buffered_bytes = 0
+                flush_at = None
+                last_write = now
+            elif not buffer and now - last_write >= heartbeat:
+                if await client_gone():
+                    disconnected = True
+                    break
+                yield HEARTBEAT_FRAME
+                _heartbeats_sent.inc(stream=stream)
+                last_write = now
+
+            if isinstance(item, _Failure):
+                raise item.error
+            if finished:
+                break
+            if drained:
+                yield DRAIN_FRAME
+                _streams_drained.inc(stream=stream)
+                get_logger(stream=stream).info(
+                    "sse_stream_drained", frames=frames, delivered=delivered
+                )
+                break
+    except (asyncio.CancelledError, GeneratorExit):
+        disconnected = True
+        raise
+    finally:
+        _active_queues.discard(queue)
+        if not producer.done():
+            producer.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await producer
+        if disconnected:
+            wasted = received - delivered + sum(isinstance(i, str) for i in _drain(queue))
+            _disconnects.inc(stream=stream)
+            _tokens_wasted.inc(wasted, stream=stream)
+            get_logger(stream=stream).info(
+                "sse_client_disconnected", frames=frames, delivered=delivered, wasted=wasted
+            )
+
+
+def _drain(queue: asyncio.Queue[object]) -> list[object]:
+    items: list[object] = []
+    while not queue.empty():
+        items.append(queue.get_nowait())
+    return items
+
+
+def event_stream_response(
+    source: AsyncIterator[str],
+    request: Request,
+    settings: Settings,
+    *,
+    stream: str,
+    preamble: Sequence[str] = (),
+) -> StreamingResponse:
+    """Wrap ``source`` in a coalescing, heartbeating SSE response.
+
+    ``preamble`` frames, already formatted, are written before the first data frame.
+    """
+    frames = coalesce_events(
+        source,
+        max_bytes=settings.sse_coalesce_max_bytes,
+        window=settings.sse_coalesce_window_ms / 1000,
+        heartbeat=settings.sse_heartbeat_seconds,
+        is_disconnected=request.is_disconnected,
+        stream=stream,
+        drain_grace=settings.sse_drain_seconds,
+    )
+
+    async def events() -> AsyncIterator[str]:
+        for frame in preamble:
+            yield frame
+        async for frame in frames:
+            yield frame
+
+    return StreamingResponse(
+        events() if preamble else frames,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
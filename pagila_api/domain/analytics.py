@@ -0,0 +1,44 @@
+"""Materialized sales views behind ``/v1/analytics``.
+
+The views are not SQLModel tables: they live in their own ``MetaData`` so
+``create_all`` and Alembic autogenerate leave them alone. ``rental_by_category``
+ships with the Pagila schema; ``sales_by_store_mv`` and the refresh log are
+created by migration ``0003``. Both views have a unique index, which
+``REFRESH MATERIALIZED VIEW CONCURRENTLY`` requires.
+"""
+
+from __future__ import annotations
+
+from sqlalchemy import Column, DateTime, Float, Integer, MetaData, Numeric, String, Table, Text
+
+ANALYTICS_METADATA = MetaData()
+
+rental_by_category = Table(
+    "rental_by_category",
+    ANALYTICS_METADATA,
+    Column("category", Text, primary_key=True),
+    Column("total_sales", Numeric),
+)
+
+sales_by_store = Table(
+    "sales_by_store_mv",
+    ANALYTICS_METADATA,
+    Column("store_id", Integer, primary_key=True),
+    Column("store", Text, nullable=False),
+    Column("manager", Text, nullable=False),
+    Column("total_sales", Numeric),
+)
+
+analytics_refresh_log = Table(
+    "analytics_refresh_log",
+    ANALYTICS_METADATA,
+    Column("view_name", String(63), primary_key=True),
+    Column("refreshed_at", DateTime(timezone=True), nullable=False),
+    Column("duration_ms", Float, nullable=False),
+    Column("row_count", Integer, nullable=False),
+)
+
+MATERIALIZED_VIEWS: tuple[str, ...] = (rental_by_category.name, sales_by_store.name)
+
+# pg_try_advisory_xact_lock key, so only one worker refreshes at a time.
+REFRESH_LOCK_KEY = 0x5041_4741
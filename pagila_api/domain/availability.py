@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import time
+from collections.abc import Iterable, Sequence
+
+
+class StockTable:
+    """Copies per store and film, and how many of them are on the shelf.
+
+    Built from one grouped query over ``inventory`` and the open rentals,
+    then kept current in process: committed rentals call
+    :meth:`checked_out` and returns :meth:`checked_in`. Writes made by other
+    workers or processes are only picked up by the next rebuild, so the
+    table is rebuilt periodically (``STOCK_REFRESH_SECONDS``).
+    """
+
+    def __init__(self, store_ids: Iterable[int], counts: Iterable[tuple[int, int, int, int]]):
+        # store_id -> film_id -> [total, available]
+        self._stores: dict[int, dict[int, list[int]]] = {store_id: {} for store_id in store_ids}
+        for store_id, film_id, total, available in counts:
+            self._stores.setdefault(store_id, {})[film_id] = [total, available]
+        self.built_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return sum(len(films) for films in self._stores.values())
+
+    def has_store(self, store_id: int) -> bool:
+        return store_id in self._stores
+
+    def counts(self, store_id: int, film_ids: Sequence[int]) -> list[tuple[int, int, int]]:
+        """``(film_id, total, available)`` for each of ``film_ids`` at ``store_id``."""
+        films = self._stores.get(store_id, {})
+        return [(film_id, *films.get(film_id, (0, 0))) for film_id in film_ids]
+
+    def checked_out(self, store_id: int, film_id: int) -> None:
+        self._adjust(store_id, film_id, -1)
+
+    def checked_in(self, store_id: int, film_id: int) -> None:
+        self._adjust(store_id, film_id, 1)
+
+    def _adjust(self, store_id: int, film_id: int, delta: int) -> None:
+        counts = self._stores.get(store_id, {}).get(film_id)
+        if counts is None:
+            # A copy the table has never seen (added after the last rebuild).
+            return
+        total, available = counts
+        counts[1] = min(total, max(0, available + delta))
+
+    def age(self) -> float:
+        return time.monotonic() - self.built_at
+
+
+_table: StockTable | None = None
+
+
+def get_stock_table() -> StockTable | None:
+    return _table
+
+
+def set_stock_table(table: StockTable | None) -> None:
+    global _table
+    _table = table
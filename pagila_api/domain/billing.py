@@ -0,0 +1,27 @@
+"""Pagila's billing rules, shared by the incremental ledger and its full rebuild.
+
+A customer's balance is what ``get_customer_balance()`` computes in the
+Pagila schema: rental fees plus late fees minus payments. Late fees are
+charged per started day past the film's ``rental_duration``.
+"""
+
+from __future__ import annotations
+
+import math
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+LATE_FEE_PER_DAY = Decimal("1.00")
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def late_fee(rental_date: datetime, return_date: datetime | None, rental_duration: int) -> Decimal:
+    if return_date is None:
+        return Decimal("0")
+    overdue = _as_utc(return_date) - _as_utc(rental_date) - timedelta(days=rental_duration)
+    if overdue <= timedelta(0):
+        return Decimal("0")
+    return LATE_FEE_PER_DAY * math.ceil(overdue / timedelta(days=1))
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+import numpy as np
+
+
+class CoRentalMatrix:
+    """How many customers rented both films, for every pair of films, as a sparse matrix.
+
+    Stored in CSR form (``indptr``/``indices``/``counts``) with each row
+    already sorted by count, descending, then by catalog order. A top-k
+    lookup is therefore a slice of one row, with no scoring at request time.
+    """
+
+    def __init__(
+        self,
+        film_ids: np.ndarray,
+        titles: list[str],
+        indptr: np.ndarray,
+        indices: np.ndarray,
+        counts: np.ndarray,
+    ):
+        self.film_ids = film_ids
+        self.titles = titles
+        self.indptr = indptr
+        self.indices = indices
+        self.counts = counts
+        self._rows = {int(film_id): row for row, film_id in enumerate(film_ids)}
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    @property
+    def pairs(self) -> int:
+        return len(self.indices)
+
+    @classmethod
+    def build(
+        cls, films: Iterable[tuple[int, str]], rentals: Iterable[tuple[int, int]]
+    ) -> CoRentalMatrix:
+        """Build from ``(film_id, title)`` rows and ``(customer_id, film_id)`` rentals.
+
+        Each customer counts once per pair however often they rented either
+        film. Pairs are generated per customer, so the cost grows with the
+        square of customers' distinct films, not with the catalog size.
+        """
+        rows = list(films)
+        film_ids = np.array([film_id for film_id, _ in rows], dtype=np.int64)
+        titles = [title for _, title in rows]
+        position = {film_id: row for row, (film_id, _) in enumerate(rows)}
+        size = len(rows)
+
+        seen = sorted(
+            {
+                (customer_id, position[film_id])
+                for customer_id, film_id in rentals
+                if film_id in position
+            }
+        )
+        rented = np.array(seen, dtype=np.int64).reshape(-1, 2)
+        boundaries = np.flatnonzero(np.diff(rented[:, 0])) + 1
+        keys: list[np.ndarray] = []
+        for group in np.split(rented[:, 1], boundaries):
+            if len(group) < 2:
+                continue
+            sources, targets = np.meshgrid(group, group, indexing="ij")
+            off_diagonal = sources != targets
+            keys.append(sources[off_diagonal] * size + targets[off_diagonal])
+
+        if keys:
+            unique, counts = np.unique(np.concatenate(keys), return_counts=True)
+            sources, targets = np.divmod(unique, size)
+        else:
+            sources = targets = counts = np.empty(0, dtype=np.int64)
+        order = np.lexsort((targets, -counts, sources))
+        indptr = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=size), out=indptr[1:])
+        return cls(
+            film_ids,
+            titles,
+            indptr,
+            targets[order].astype(np.int32),
+            counts[order].astype(np.int32),
+        )
+
+    def contains(self, film_id: int) -> bool:
+        return film_id in self._rows
+
+    def also_rented(self, film_id: int, k: int) -> list[tuple[int, int]]:
+        """Top ``k`` ``(film_id, customers)`` pairs rented by customers of ``film_id``."""
+        row = self._rows[film_id]
+        start = self.indptr[row]
+        end = min(self.indptr[row + 1], start + max(k, 0))
+        return list(
+            zip(
+                self.film_ids[self.indices[start:end]].tolist(),
+                self.counts[start:end].tolist(),
+            )
+        )
+
+    def title_of(self, film_id: int) -> str:
+        return self.titles[self._rows[film_id]]
+
+
+_matrix: CoRentalMatrix | None = None
+
+
+def get_corental_matrix() -> CoRentalMatrix | None:
+    return _matrix
+
+
+def set_corental_matrix(matrix: CoRentalMatrix | None) -> None:
+    global _matrix
+    _matrix = matrix
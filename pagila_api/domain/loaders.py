@@ -0,0 +1,136 @@
+"""Request-scoped batching of relation lookups, in the style of DataLoader.
+
+Callers ask for one key at a time (``await loader.load(film_id)``); every
+key requested before the event loop gets back to the loader is collected
+into a single call of the batch function, so expanding a page of films
+costs one query per relation instead of one per film. Results are cached
+for the loader's lifetime, which is why loaders must not outlive the
+request (and its session) that created them.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable, Iterable, Mapping, Sequence
+from typing import Any, Generic, TypeVar
+
+from .models import ActorOut, InventoryItemOut, StoreStockOut
+from .repositories import FilmRepository
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class DataLoader(Generic[K, V]):
+    """Coalesce ``load(key)`` calls made in the same loop iteration into one batch call.
+
+    ``batch`` receives the distinct pending keys and returns a mapping from
+    key to value; keys it leaves out resolve to ``default()``. Loaders that
+    share a ``lock`` never run their batches concurrently, which an
+    ``AsyncSession`` does not allow.
+    """
+
+    def __init__(
+        self,
+        batch: Callable[[list[K]], Awaitable[Mapping[K, V]]],
+        default: Callable[[], V],
+        *,
+        lock: asyncio.Lock | None = None,
+    ):
+        self._batch = batch
+        self._default = default
+        self._lock = lock or asyncio.Lock()
+        self._cache: dict[K, asyncio.Future[V]] = {}
+        self._pending: list[K] = []
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    def load(self, key: K) -> asyncio.Future[V]:
+        future = self._cache.get(key)
+        if future is not None:
+            return future
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._cache[key] = future
+        self._pending.append(key)
+        if len(self._pending) == 1:
+            loop.call_soon(self._schedule)
+        return future
+
+    async def load_many(self, keys: Iterable[K]) -> list[V]:
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def _schedule(self) -> None:
+        task = asyncio.ensure_future(self._dispatch())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self) -> None:
+        keys, self._pending = self._pending, []
+        try:
+            async with self._lock:
+                values = await self._batch(keys)
+        except Exception as exc:
+            for key in keys:
+                # Drop failed keys from the cache so a later load retries them.
+                self._cache.pop(key).set_exception(exc)
+            return
+        for key in keys:
+            future = self._cache[key]
+            if not future.done():
+                future.set_result(values[key] if key in values else self._default())
+
+
+class FilmLoaders:
+    """One loader per expandable film relation, all sharing the request's session.
+
+    ``inventory`` and ``stock`` read ``rental_repos`` instead, one query per
+    store shard, when inventory and rentals are sharded away from the catalog.
+    """
+
+    def __init__(self, repo: FilmRepository, rental_repos: Sequence[FilmRepository] = ()):
+        rental_repos = list(rental_repos) or [repo]
+        # One lock for every loader: the shard sessions may be the catalog session itself.
+        lock = asyncio.Lock()
+        self.actors: DataLoader[int, list[ActorOut]] = DataLoader(
+            repo.actors_by_film, list, lock=lock
+        )
+        self.categories: DataLoader[int, list[str]] = DataLoader(
+            repo.categories_by_film, list, lock=lock
+        )
+        self.inventory: DataLoader[int, list[InventoryItemOut]] = DataLoader(
+            _across(
+                [source.inventory_by_film for source in rental_repos],
+                key=lambda item: (item.store_id, item.inventory_id),
+            ),
+            list,
+            lock=lock,
+        )
+        self.stock: DataLoader[int, list[StoreStockOut]] = DataLoader(
+            _across(
+                [source.stock_by_film for source in rental_repos], key=lambda item: item.store_id
+            ),
+            list,
+            lock=lock,
+        )
+        self.language: DataLoader[int, str | None] = DataLoader(
+            repo.language_by_film, lambda: None, lock=lock
+        )
+
+    def get(self, relation: str) -> DataLoader[int, Any]:
+        return getattr(self, relation)
+
+
+def _across(
+    batches: Sequence[Callable[[list[K]], Awaitable[Mapping[K, list[V]]]]],
+    key: Callable[[V], Any],
+) -> Callable[[list[K]], Awaitable[dict[K, list[V]]]]:
+    """Batch function concatenating the lists ``batches`` return per key, sorted by ``key``."""
+
+    async def batch(keys: list[K]) -> dict[K, list[V]]:
+        merged: dict[K, list[V]] = {}
+        for source in batches:
+            for loaded_key, values in (await source(keys)).items():
+                merged.setdefault(loaded_key, []).extend(values)
+        return {loaded_key: sorted(values, key=key) for loaded_key, values in merged.items()}
+
+    return batch
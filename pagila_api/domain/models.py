@@ -5,12 +5,23 @@ from decimal import Decimal
 from typing import Generic, Literal, Optional, TypeVar
 
 from pydantic import BaseModel, Field, field_serializer
+from sqlalchemy import Index, text
 from sqlmodel import Field as SQLField
 from sqlmodel import SQLModel
 
 
 class Film(SQLModel, table=True):
     __tablename__ = "film"
+    __table_args__ = (
+        Index("idx_title", "title"),
+        # Substring title search; SQLite has no trigram index and scans instead.
+        Index(
+            "idx_film_title_trgm",
+            "title",
+            postgresql_using="gin",
+            postgresql_ops={"title": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
 
     film_id: int | None = SQLField(default=None, primary_key=True)
     title: str
@@ -27,6 +38,7 @@ class Film(SQLModel, table=True):
 
 class Category(SQLModel, table=True):
     __tablename__ = "category"
+    __table_args__ = (Index("idx_category_lower_name", text("lower(name)")),)
 
     category_id: int | None = SQLField(default=None, primary_key=True)
     name: str
@@ -34,13 +46,38 @@ class Category(SQLModel, table=True):
 
 class FilmCategory(SQLModel, table=True):
     __tablename__ = "film_category"
+    __table_args__ = (Index("idx_film_category_category_id_film_id", "category_id", "film_id"),)
 
     film_id: int = SQLField(primary_key=True, foreign_key="film.film_id")
     category_id: int = SQLField(primary_key=True, foreign_key="category.category_id")
 
 
+class FilmActor(SQLModel, table=True):
+    __tablename__ = "film_actor"
+    __table_args__ = (Index("idx_fk_film_id", "film_id"),)
+
+    actor_id: int = SQLField(primary_key=True, foreign_key="actor.actor_id")
+    film_id: int = SQLField(primary_key=True, foreign_key="film.film_id")
+
+
+class Actor(SQLModel, table=True):
+    __tablename__ = "actor"
+
+    actor_id: int | None = SQLField(default=None, primary_key=True)
+    first_name: str
+    last_name: str
+
+
+class Language(SQLModel, table=True):
+    __tablename__ = "language"
+
+    language_id: int | None = SQLField(default=None, primary_key=True)
+    name: str
+
+
 class Inventory(SQLModel, table=True):
     __tablename__ = "inventory"
+    __table_args__ = (Index("idx_inventory_film_id_store_id", "film_id", "store_id"),)
 
     inventory_id: int | None = SQLField(default=None, primary_key=True)
     film_id: int = SQLField(foreign_key="film.film_id")
@@ -48,6 +85,14 @@ class Inventory(SQLModel, table=True):
     last_update: datetime
 
 
+class Store(SQLModel, table=True):
+    __tablename__ = "store"
+
+    store_id: int | None = SQLField(default=None, primary_key=True)
+    manager_staff_id: int
+    address_id: int
+
+
 class Customer(SQLModel, table=True):
     __tablename__ = "customer"
 
@@ -63,6 +108,15 @@ class Customer(SQLModel, table=True):
 
 class Rental(SQLModel, table=True):
     __tablename__ = "rental"
+    __table_args__ = (
+        Index(
+            "idx_rental_open_inventory_id",
+            "inventory_id",
+            postgresql_where=text("return_date IS NULL"),
+            sqlite_where=text("return_date IS NULL"),
+        ),
+        Index("idx_rental_customer_id_rental_date", "customer_id", "rental_date"),
+    )
 
     rental_id: int | None = SQLField(default=None, primary_key=True)
     rental_date: datetime
@@ -73,6 +127,29 @@ class Rental(SQLModel, table=True):
     last_update: datetime
 
 
+class Payment(SQLModel, table=True):
+    __tablename__ = "payment"
+
+    payment_id: int | None = SQLField(default=None, primary_key=True)
+    customer_id: int = SQLField(foreign_key="customer.customer_id")
+    staff_id: int
+    rental_id: int = SQLField(foreign_key="rental.rental_id")
+    amount: Decimal
+    payment_date: datetime
+
+
+class CustomerBalance(SQLModel, table=True):
+    """Running totals behind a customer's balance, updated by every rental, return and payment."""
+
+    __tablename__ = "customer_balance"
+
+    customer_id: int = SQLField(primary_key=True, foreign_key="customer.customer_id")
+    rent_fees: Decimal = SQLField(default=Decimal("0"))
+    late_fees: Decimal = SQLField(default=Decimal("0"))
+    payments: Decimal = SQLField(default=Decimal("0"))
+    updated_at: datetime
+
+
 class StreamingSubscription(SQLModel, table=True):
     __tablename__ = "streaming_subscription"
 
@@ -97,6 +174,60 @@ class FilmOut(BaseModel):
         return float(value)
 
 
+FILM_EXPANSIONS = ("actors", "categories", "inventory", "stock", "language")
+
+
+class ActorOut(BaseModel):
+    actor_id: int
+    first_name: str
+    last_name: str
+
+
+class InventoryItemOut(BaseModel):
+    inventory_id: int
+    store_id: int
+    in_stock: bool
+
+
+class StoreStockOut(BaseModel):
+    store_id: int
+    total: int
+    available: int
+
+
+class FilmDetailOut(FilmOut):
+    """A film with the relations requested through ``expand``; the others are left unset."""
+
+    actors: list[ActorOut] | None = None
+    categories: list[str] | None = None
+    inventory: list[InventoryItemOut] | None = None
+    stock: list[StoreStockOut] | None = None
+    language: str | None = None
+
+
+class SimilarFilm(BaseModel):
+    film_id: int
+    title: str
+    score: float
+
+
+class SimilarFilmsOut(BaseModel):
+    query: str | None = None
+    film_id: int | None = None
+    items: list[SimilarFilm]
+
+
+class AlsoRentedFilm(BaseModel):
+    film_id: int
+    title: str
+    customers: int
+
+
+class AlsoRentedOut(BaseModel):
+    film_id: int
+    items: list[AlsoRentedFilm]
+
+
 T = TypeVar("T")
 
 
@@ -123,6 +254,99 @@ class RentalCreatedResponse(BaseModel):
     status: str = "created"
 
 
+class DataFreshness(BaseModel):
+    view: str
+    refreshed_at: datetime | None = None
+    age_seconds: float | None = None
+    stale: bool
+
+
+class CategorySales(BaseModel):
+    category: str
+    total_sales: Decimal
+
+    @field_serializer("total_sales")
+    def serialize_total_sales(self, value: Decimal) -> float:
+        return float(value)
+
+
+class StoreSales(BaseModel):
+    store_id: int
+    store: str
+    manager: str
+    total_sales: Decimal
+
+    @field_serializer("total_sales")
+    def serialize_total_sales(self, value: Decimal) -> float:
+        return float(value)
+
+
+class CategorySalesOut(BaseModel):
+    items: list[CategorySales]
+    freshness: DataFreshness
+
+
+class StoreSalesOut(BaseModel):
+    items: list[StoreSales]
+    freshness: DataFreshness
+
+
+class AvailabilityRequest(BaseModel):
+    film_ids: list[int] = Field(min_length=1, max_length=500)
+
+
+class FilmAvailability(BaseModel):
+    film_id: int
+    total: int
+    available: int
+    in_stock: bool
+
+
+class StoreAvailabilityOut(BaseModel):
+    store_id: int
+    items: list[FilmAvailability]
+    age_seconds: float | None = None
+
+
+class RentalReturnedResponse(BaseModel):
+    rental_id: int
+    return_date: datetime
+    late_fee: Decimal
+
+    @field_serializer("late_fee")
+    def serialize_late_fee(self, value: Decimal) -> float:
+        return float(value)
+
+
+class PaymentCreate(BaseModel):
+    rental_id: int = Field(gt=0)
+    staff_id: int = Field(gt=0)
+    amount: Decimal = Field(gt=0, max_digits=5, decimal_places=2)
+
+
+class CustomerBalanceOut(BaseModel):
+    customer_id: int
+    rent_fees: Decimal
+    late_fees: Decimal
+    payments: Decimal
+    balance: Decimal
+    updated_at: datetime | None = None
+
+    @field_serializer("rent_fees", "late_fees", "payments", "balance")
+    def serialize_amount(self, value: Decimal) -> float:
+        return float(value)
+
+
+class CustomerBalancesOut(BaseModel):
+    items: list[CustomerBalanceOut]
+    missing: list[int]
+
+
+class PaymentCreatedResponse(BaseModel):
+    payment_id: int
+    balance: CustomerBalanceOut
+
+
 class AISummaryRequest(BaseModel):
     film_id: int = Field(gt=0)
 
@@ -133,6 +357,24 @@ class SummaryOut(BaseModel):
     recommended: bool
 
 
+class AISummaryBatchRequest(BaseModel):
+    film_ids: list[int] = Field(min_length=1, max_length=500)
+
+
+class FilmSummaryOut(SummaryOut):
+    film_id: int
+
+
+class SummaryFailure(BaseModel):
+    film_id: int
+    detail: str
+
+
+class SummaryBatchOut(BaseModel):
+    items: list[FilmSummaryOut]
+    failed: list[SummaryFailure]
+
+
 class AIAskResponseChunk(BaseModel):
     data: str
 
@@ -142,5 +384,5 @@ class AIHandoffRequest(BaseModel):
 
 
 class AIHandoffResponse(BaseModel):
-    agent: Literal["SearchAgent", "LLMAgent"]
+    agent: Literal["SearchAgent", "CatalogAgent", "LLMAgent"]
     answer: str
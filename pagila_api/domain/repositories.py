@@ -1,23 +1,40 @@
 from __future__ import annotations
 
-from datetime import datetime
-from typing import Optional
+from collections import defaultdict
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import NamedTuple, Optional, Sequence
 
-from sqlalchemy import func, select
+from sqlalchemy import and_, delete, func, insert, literal, select, text, union_all, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from .analytics import REFRESH_LOCK_KEY, analytics_refresh_log, rental_by_category, sales_by_store
+from .billing import late_fee
 from .models import (
+    Actor,
+    ActorOut,
+    CategorySales,
     Customer,
+    CustomerBalance,
     Category,
     Film,
+    FilmActor,
     FilmCategory,
     FilmListParams,
     FilmOut,
     Inventory,
+    InventoryItemOut,
+    Language,
     Paginated,
+    Payment,
+    PaymentCreate,
     Rental,
     RentalCreate,
-    RentalCreatedResponse,
+    Store,
+    StoreSales,
+    StoreStockOut,
 )
 
 
@@ -38,9 +55,19 @@ class FilmRepository:
             .subquery()
         )
 
-        filter_clause = (
-            func.lower(category_subquery.c.category_name) == category_value if category_value else None
-        )
+        filter_clause = None
+        if category_value:
+            # The IN narrows to the category's films through idx_category_lower_name
+            # and idx_film_category_category_id_film_id before anything is grouped.
+            category_films = (
+                select(FilmCategory.film_id)
+                .join(Category, Category.category_id == FilmCategory.category_id)
+                .where(func.lower(Category.name) == category_value)
+            )
+            filter_clause = and_(
+                Film.film_id.in_(category_films),
+                func.lower(category_subquery.c.category_name) == category_value,
+            )
 
         base_stmt = (
             select(Film, category_subquery.c.category_name)
@@ -94,21 +121,116 @@ class FilmRepository:
         result = await self.session.execute(stmt)
         return result.scalar_one_or_none()
 
-    async def find_by_title(self, title: str) -> Optional[FilmOut]:
-        title_value = title.strip()
-        if not title_value:
-            return None
+    async def get_films(self, film_ids: Sequence[int]) -> list[Film]:
+        if not film_ids:
+            return []
+        stmt = select(Film).where(Film.film_id.in_(set(film_ids))).order_by(Film.film_id.asc())
+        result = await self.session.execute(stmt)
+        return list(result.scalars().all())
 
-        category_subquery = (
-            select(
-                FilmCategory.film_id.label("film_id"),
-                func.min(Category.name).label("category_name"),
+    # Batch lookups behind domain.loaders.FilmLoaders: one query for any number of films.
+
+    async def actors_by_film(self, film_ids: Sequence[int]) -> dict[int, list[ActorOut]]:
+        stmt = (
+            select(FilmActor.film_id, Actor.actor_id, Actor.first_name, Actor.last_name)
+            .join(Actor, Actor.actor_id == FilmActor.actor_id)
+            .where(FilmActor.film_id.in_(film_ids))
+            .order_by(Actor.last_name, Actor.first_name, Actor.actor_id)
+        )
+        actors: dict[int, list[ActorOut]] = defaultdict(list)
+        for film_id, actor_id, first_name, last_name in await self.session.execute(stmt):
+            actors[film_id].append(
+                ActorOut(actor_id=actor_id, first_name=first_name, last_name=last_name)
             )
+        return actors
+
+    async def categories_by_film(self, film_ids: Sequence[int]) -> dict[int, list[str]]:
+        stmt = (
+            select(FilmCategory.film_id, Category.name)
             .join(Category, Category.category_id == FilmCategory.category_id)
-            .group_by(FilmCategory.film_id)
-            .subquery()
+            .where(FilmCategory.film_id.in_(film_ids))
+            .order_by(Category.name)
+        )
+        categories: dict[int, list[str]] = defaultdict(list)
+        for film_id, name in await self.session.execute(stmt):
+            categories[film_id].append(name)
+        return categories
+
+    async def inventory_by_film(self, film_ids: Sequence[int]) -> dict[int, list[InventoryItemOut]]:
+        rented = _rented_inventory()
+        stmt = (
+            select(
+                Inventory.film_id, Inventory.inventory_id, Inventory.store_id, rented.c.inventory_id
+            )
+            .join(rented, rented.c.inventory_id == Inventory.inventory_id, isouter=True)
+            .where(Inventory.film_id.in_(film_ids))
+            .order_by(Inventory.store_id, Inventory.inventory_id)
+        )
+        inventory: dict[int, list[InventoryItemOut]] = defaultdict(list)
+        for film_id, inventory_id, store_id, rented_id in await self.session.execute(stmt):
+            inventory[film_id].append(
+                InventoryItemOut(
+                    inventory_id=inventory_id, store_id=store_id, in_stock=rented_id is None
+                )
+            )
+        return inventory
+
+    async def stock_by_film(self, film_ids: Sequence[int]) -> dict[int, list[StoreStockOut]]:
+        rented = _rented_inventory()
+        stmt = (
+            select(
+                Inventory.film_id,
+                Inventory.store_id,
+                func.count(Inventory.inventory_id),
+                func.count(rented.c.inventory_id),
+            )
+            .join(rented, rented.c.inventory_id == Inventory.inventory_id, isouter=True)
+            .where(Inventory.film_id.in_(film_ids))
+            .group_by(Inventory.film_id, Inventory.store_id)
+            .order_by(Inventory.store_id)
+        )
+        stock: dict[int, list[StoreStockOut]] = defaultdict(list)
+        for film_id, store_id, total, out in await self.session.execute(stmt):
+            stock[film_id].append(
+                StoreStockOut(store_id=store_id, total=total, available=total - out)
+            )
+        return stock
+
+    async def language_by_film(self, film_ids: Sequence[int]) -> dict[int, str]:
+        stmt = (
+            select(Film.film_id, Language.name)
+            .join(Language, Language.language_id == Film.language_id)
+            .where(Film.film_id.in_(film_ids))
+        )
+        result = await self.session.execute(stmt)
+        return {film_id: name.strip() for film_id, name in result.all()}
+
+    async def catalog_texts(self) -> list[tuple[int, str, str | None]]:
+        stmt = select(Film.film_id, Film.title, Film.description).order_by(Film.film_id.asc())
+        result = await self.session.execute(stmt)
+        return [(film_id, title, description) for film_id, title, description in result.all()]
+
+    async def catalog_titles(self) -> list[tuple[int, str]]:
+        stmt = select(Film.film_id, Film.title).order_by(Film.film_id.asc())
+        result = await self.session.execute(stmt)
+        return [(film_id, title) for film_id, title in result.all()]
+
+    async def rented_films(self) -> list[tuple[int, int]]:
+        """Every distinct ``(customer_id, film_id)`` pair with at least one rental."""
+        stmt = (
+            select(Rental.customer_id, Inventory.film_id)
+            .join(Inventory, Inventory.inventory_id == Rental.inventory_id)
+            .distinct()
         )
+        result = await self.session.execute(stmt)
+        return [(customer_id, film_id) for customer_id, film_id in result.all()]
 
+    async def find_by_title(self, title: str) -> Optional[FilmOut]:
+        title_value = title.strip()
+        if not title_value:
+            return None
+
+        category_subquery = _first_category()
         stmt = (
             select(Film, category_subquery.c.category_name)
             .select_from(Film)
@@ -122,18 +244,101 @@ class FilmRepository:
         row = result.first()
         if not row:
             return None
-
         film, category_name = row
-        return FilmOut(
-            film_id=film.film_id,                          
-            title=film.title,
-            description=film.description,
-            rating=film.rating,
-            rental_rate=film.rental_rate,
-            category=category_name,
-            streaming_available=film.streaming_available,
+        return _film_out(film, category_name)
+
+    async def find_by_titles(self, titles: Sequence[str]) -> dict[str, FilmOut]:
+        """Resolve several title fragments with one query.
+
+        Each fragment maps to the lowest ``film_id`` whose title contains it,
+        case-insensitively; fragments without a match are left out. The lowest
+        id is picked per fragment in SQL, so only the matched films are loaded.
+        """
+        wanted = list(dict.fromkeys(value.strip() for value in titles if value.strip()))
+        if not wanted:
+            return {}
+
+        matches = union_all(
+            *(
+                select(
+                    literal(position).label("position"),
+                    func.min(Film.film_id).label("film_id"),
+                ).where(Film.title.ilike(f"%{value}%"))
+                for position, value in enumerate(wanted)
+            )
+        ).subquery("matches")
+        category_subquery = _first_category()
+        stmt = (
+            select(matches.c.position, Film, category_subquery.c.category_name)
+            .select_from(matches)
+            .join(Film, Film.film_id == matches.c.film_id)
+            .join(category_subquery, Film.film_id == category_subquery.c.film_id, isouter=True)
         )
 
+        result = await self.session.execute(stmt)
+        return {
+            wanted[position]: _film_out(film, category_name)
+            for position, film, category_name in result.all()
+        }
+
+
+def _first_category():
+    """Each film's first category by name, as a ``(film_id, category_name)`` subquery."""
+    return (
+        select(
+            FilmCategory.film_id.label("film_id"),
+            func.min(Category.name).label("category_name"),
+        )
+        .join(Category, Category.category_id == FilmCategory.category_id)
+        .group_by(FilmCategory.film_id)
+        .subquery()
+    )
+
+
+def _film_out(film: Film, category_name: str | None) -> FilmOut:
+    return FilmOut(
+        film_id=film.film_id,
+        title=film.title,
+        description=film.description,
+        rating=film.rating,
+        rental_rate=film.rental_rate,
+        category=category_name,
+        streaming_available=film.streaming_available,
+    )
+
+
+def _rented_inventory():
+    """Inventory items currently out: rented and not returned.
+
+    Same rule as Pagila's ``inventory_in_stock``.
+    """
+    return (
+        select(Rental.inventory_id)
+        .where(Rental.return_date.is_(None))
+        .distinct()
+        .subquery("rented")
+    )
+
+
+class RentalTerms(NamedTuple):
+    rental_rate: Decimal
+    rental_duration: int
+    film_id: int
+    store_id: int
+
+
+class CreatedRental(NamedTuple):
+    rental_id: int
+    # No other rental of the copy was open, so this one took it off the shelf.
+    copy_was_in: bool
+
+
+class ReturnedRental(NamedTuple):
+    return_date: datetime
+    late_fee: Decimal
+    # No rental of the copy is open any more, so it is back on the shelf.
+    copy_is_in: bool
+
 
 class RentalRepository:
     def __init__(self, session: AsyncSession):
@@ -144,17 +349,41 @@ class RentalRepository:
         result = await self.session.execute(stmt)
         return result.scalar_one_or_none()
 
+    async def get_customer_stores(self, customer_ids: Sequence[int]) -> dict[int, int]:
+        """Home store of each of ``customer_ids`` found here; unknown ids are left out."""
+        if not customer_ids:
+            return {}
+        stmt = select(Customer.customer_id, Customer.store_id).where(
+            Customer.customer_id.in_(customer_ids)
+        )
+        result = await self.session.execute(stmt)
+        return {customer_id: store_id for customer_id, store_id in result.all()}
+
     async def get_inventory(self, inventory_id: int) -> Optional[int]:
         stmt = select(Inventory.inventory_id).where(Inventory.inventory_id == inventory_id)
         result = await self.session.execute(stmt)
         return result.scalar_one_or_none()
 
+    async def get_rental_terms(self, inventory_id: int) -> Optional[RentalTerms]:
+        """Rate, duration (days), film and store of an inventory item."""
+        stmt = (
+            select(Film.rental_rate, Film.rental_duration, Film.film_id, Inventory.store_id)
+            .join(Inventory, Inventory.film_id == Film.film_id)
+            .where(Inventory.inventory_id == inventory_id)
+        )
+        result = await self.session.execute(stmt)
+        row = result.one_or_none()
+        return None if row is None else RentalTerms(*row)
+
+    async def get_rental(self, rental_id: int) -> Optional[Rental]:
+        return await self.session.get(Rental, rental_id)
+
     async def create_rental(
         self,
         customer_id: int,
         payload: RentalCreate,
-    ) -> RentalCreatedResponse:
-                                                                             
+        rental_rate: Decimal,
+    ) -> CreatedRental:
         now = datetime.utcnow()
         rental = Rental(
             rental_date=now,
@@ -165,4 +394,231 @@ class RentalRepository:
         )
         self.session.add(rental)
         await self.session.flush()
-        return RentalCreatedResponse(rental_id=rental.rental_id or 0)
+        await CustomerBalanceRepository(self.session).add(customer_id, rent_fees=rental_rate)
+        open_rentals = await self._open_rentals(payload.inventory_id)
+        return CreatedRental(rental_id=rental.rental_id or 0, copy_was_in=open_rentals == 1)
+
+    async def return_rental(self, rental_id: int, rental_duration: int) -> Optional[ReturnedRental]:
+        """Close the rental now and charge its late fee; ``None`` if it is already closed.
+
+        The open check is part of the UPDATE, so of two concurrent returns
+        only one matches the row and charges the fee.
+        """
+        now = datetime.utcnow()
+        stmt = (
+            update(Rental)
+            .where(Rental.rental_id == rental_id, Rental.return_date.is_(None))
+            .values(return_date=now, last_update=now)
+            .returning(Rental.customer_id, Rental.rental_date, Rental.inventory_id)
+        )
+        row = (await self.session.execute(stmt)).one_or_none()
+        if row is None:
+            return None
+        customer_id, rental_date, inventory_id = row
+        fee = late_fee(rental_date, now, rental_duration)
+        await CustomerBalanceRepository(self.session).add(customer_id, late_fees=fee)
+        copy_is_in = await self._open_rentals(inventory_id) == 0
+        return ReturnedRental(return_date=now, late_fee=fee, copy_is_in=copy_is_in)
+
+    async def _open_rentals(self, inventory_id: int) -> int:
+        stmt = select(func.count()).where(
+            Rental.inventory_id == inventory_id, Rental.return_date.is_(None)
+        )
+        return (await self.session.execute(stmt)).scalar_one()
+
+    async def create_payment(self, customer_id: int, payload: PaymentCreate) -> int:
+        now = datetime.utcnow()
+        payment = Payment(
+            customer_id=customer_id,
+            staff_id=payload.staff_id,
+            rental_id=payload.rental_id,
+            amount=payload.amount,
+            payment_date=now,
+        )
+        self.session.add(payment)
+        await self.session.flush()
+        await CustomerBalanceRepository(self.session).add(customer_id, payments=payload.amount)
+        return payment.payment_id or 0
+
+
+class InventoryRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def store_ids(self) -> list[int]:
+        result = await self.session.execute(select(Store.store_id))
+        return list(result.scalars())
+
+    async def stock_counts(
+        self, store_id: int | None = None, film_ids: Sequence[int] | None = None
+    ) -> list[tuple[int, int, int, int]]:
+        """``(store_id, film_id, total, available)`` per store and film, in one grouped query."""
+        rented = _rented_inventory()
+        stmt = (
+            select(
+                Inventory.store_id,
+                Inventory.film_id,
+                func.count(Inventory.inventory_id),
+                func.count(Inventory.inventory_id) - func.count(rented.c.inventory_id),
+            )
+            .join(rented, rented.c.inventory_id == Inventory.inventory_id, isouter=True)
+            .group_by(Inventory.store_id, Inventory.film_id)
+        )
+        if store_id is not None:
+            stmt = stmt.where(Inventory.store_id == store_id)
+        if film_ids is not None:
+            stmt = stmt.where(Inventory.film_id.in_(film_ids))
+        result = await self.session.execute(stmt)
+        return [tuple(row) for row in result.all()]
+
+    async def store_exists(self, store_id: int) -> bool:
+        stmt = select(Store.store_id).where(Store.store_id == store_id)
+        result = await self.session.execute(stmt)
+        return result.scalar_one_or_none() is not None
+
+
+class CustomerBalanceRepository:
+    """The ``customer_balance`` ledger: one row of running totals per customer.
+
+    Every write that changes what a customer owes adds its amount here in
+    the same transaction, so reading a balance is a primary-key lookup
+    instead of summing the customer's rentals and payments.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def add(
+        self,
+        customer_id: int,
+        *,
+        rent_fees: Decimal = Decimal("0"),
+        late_fees: Decimal = Decimal("0"),
+        payments: Decimal = Decimal("0"),
+    ) -> None:
+        """Add the given amounts to the customer's totals, creating the row if needed.
+
+        A single ``INSERT ... ON CONFLICT DO UPDATE`` adds to the stored
+        values, so concurrent writers never overwrite each other's amounts.
+        """
+        table = CustomerBalance.__table__
+        dialect = self.session.get_bind().dialect.name
+        upsert = pg_insert if dialect == "postgresql" else sqlite_insert
+        stmt = upsert(table).values(
+            customer_id=customer_id,
+            rent_fees=rent_fees,
+            late_fees=late_fees,
+            payments=payments,
+            updated_at=datetime.now(timezone.utc),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.customer_id],
+            set_={
+                "rent_fees": table.c.rent_fees + stmt.excluded.rent_fees,
+                "late_fees": table.c.late_fees + stmt.excluded.late_fees,
+                "payments": table.c.payments + stmt.excluded.payments,
+                "updated_at": stmt.excluded.updated_at,
+            },
+        )
+        await self.session.execute(stmt)
+
+    async def get_many(self, customer_ids: Sequence[int]) -> dict[int, CustomerBalance]:
+        stmt = select(CustomerBalance).where(CustomerBalance.customer_id.in_(customer_ids))
+        result = await self.session.execute(stmt)
+        return {balance.customer_id: balance for balance in result.scalars()}
+
+    async def existing_customers(self, customer_ids: Sequence[int]) -> set[int]:
+        stmt = select(Customer.customer_id).where(Customer.customer_id.in_(customer_ids))
+        result = await self.session.execute(stmt)
+        return set(result.scalars())
+
+    async def rebuild(self) -> int:
+        """Recompute every customer's totals from rentals and payments; returns rows written.
+
+        For bulk loads, which bypass the incremental updates. Late fees go
+        through :func:`domain.billing.late_fee` so the rule lives in one place.
+        """
+        totals: dict[int, dict[str, Decimal]] = defaultdict(
+            lambda: {"rent_fees": Decimal("0"), "late_fees": Decimal("0"), "payments": Decimal("0")}
+        )
+        rentals = (
+            select(
+                Rental.customer_id,
+                Rental.rental_date,
+                Rental.return_date,
+                Film.rental_rate,
+                Film.rental_duration,
+            )
+            .join(Inventory, Inventory.inventory_id == Rental.inventory_id)
+            .join(Film, Film.film_id == Inventory.film_id)
+        )
+        for row in await self.session.execute(rentals):
+            customer = totals[row.customer_id]
+            customer["rent_fees"] += row.rental_rate
+            customer["late_fees"] += late_fee(row.rental_date, row.return_date, row.rental_duration)
+        payments = select(Payment.customer_id, func.sum(Payment.amount)).group_by(
+            Payment.customer_id
+        )
+        for customer_id, amount in await self.session.execute(payments):
+            totals[customer_id]["payments"] += Decimal(amount)
+
+        now = datetime.now(timezone.utc)
+        records = [
+            {"customer_id": customer_id, "updated_at": now, **amounts}
+            for customer_id, amounts in totals.items()
+        ]
+        await self.session.execute(delete(CustomerBalance))
+        if records:
+            await self.session.execute(insert(CustomerBalance), records)
+        return len(records)
+
+
+class AnalyticsRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    @property
+    def dialect(self) -> str:
+        return self.session.get_bind().dialect.name
+
+    async def category_sales(self) -> list[CategorySales]:
+        stmt = select(rental_by_category).order_by(rental_by_category.c.total_sales.desc())
+        result = await self.session.execute(stmt)
+        return [CategorySales(**row) for row in result.mappings()]
+
+    async def store_sales(self) -> list[StoreSales]:
+        stmt = select(sales_by_store).order_by(sales_by_store.c.store_id)
+        result = await self.session.execute(stmt)
+        return [StoreSales(**row) for row in result.mappings()]
+
+    async def refresh_log(self) -> dict[str, datetime]:
+        stmt = select(analytics_refresh_log.c.view_name, analytics_refresh_log.c.refreshed_at)
+        result = await self.session.execute(stmt)
+        return {view: refreshed_at for view, refreshed_at in result.all()}
+
+    async def is_populated(self, view: str) -> bool:
+        if self.dialect != "postgresql":
+            return True
+        stmt = text("SELECT ispopulated FROM pg_matviews WHERE matviewname = :view")
+        result = await self.session.execute(stmt, {"view": view})
+        return bool(result.scalar_one_or_none())
+
+    async def try_refresh_lock(self) -> bool:
+        """Take the refresh lock for the current transaction, or return False if it is held."""
+        stmt = text("SELECT pg_try_advisory_xact_lock(:key)")
+        result = await self.session.execute(stmt, {"key": REFRESH_LOCK_KEY})
+        return bool(result.scalar_one())
+
+    async def refresh_view(self, view: str, concurrently: bool) -> int:
+        mode = " CONCURRENTLY" if concurrently else ""
+        await self.session.execute(text(f"REFRESH MATERIALIZED VIEW{mode} {view}"))
+        result = await self.session.execute(text(f"SELECT count(*) FROM {view}"))
+        return result.scalar_one()
+
+    async def record_refresh(
+        self, view: str, refreshed_at: datetime, duration_ms: float, row_count: int
+    ) -> None:
+        values = {"refreshed_at": refreshed_at, "duration_ms": duration_ms, "row_count": row_count}
+        stmt = pg_insert(analytics_refresh_log).values(view_name=view, **values)
+        stmt = stmt.on_conflict_do_update(index_elements=["view_name"], set_=values)
+        await self.session.execute(stmt)
@@ -1,9 +1,64 @@
 from __future__ import annotations
 
-from collections.abc import AsyncIterator, Callable
-from typing import Any
+import asyncio
+import sys
+import time
+from collections.abc import AsyncIterator, Callable, Sequence
+from datetime import datetime, timezone
+from decimal import Decimal
+from functools import cached_property
+from typing import TYPE_CHECKING, Any, TypeVar
 
 import orjson
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.answer_cache import AnswerCache
+from core.db import run_after_commit
+from core.llm_governor import LLMGovernor, LLMUnavailableError
+from core.llm_telemetry import LLMCallTelemetry
+
+from .analytics import MATERIALIZED_VIEWS, rental_by_category, sales_by_store
+from .availability import StockTable, get_stock_table, set_stock_table
+from .corental import CoRentalMatrix, get_corental_matrix, set_corental_matrix
+from .models import (
+    AlsoRentedFilm,
+    AlsoRentedOut,
+    CategorySalesOut,
+    CustomerBalance,
+    CustomerBalanceOut,
+    CustomerBalancesOut,
+    DataFreshness,
+    FilmAvailability,
+    FilmDetailOut,
+    FilmListParams,
+    FilmOut,
+    Paginated,
+    Film,
+    FilmSummaryOut,
+    PaymentCreate,
+    PaymentCreatedResponse,
+    RentalCreate,
+    RentalCreatedResponse,
+    RentalReturnedResponse,
+    SimilarFilm,
+    SimilarFilmsOut,
+    StoreAvailabilityOut,
+    StoreSalesOut,
+    SummaryBatchOut,
+    SummaryFailure,
+    SummaryOut,
+)
+from .loaders import FilmLoaders
+from .repositories import (
+    AnalyticsRepository,
+    CustomerBalanceRepository,
+    FilmRepository,
+    InventoryRepository,
+    RentalRepository,
+)
+from .similarity import FilmSimilarityIndex, get_similarity_index, set_similarity_index
 
 try:
     from pydantic import AnyUrl
@@ -15,18 +70,36 @@ except Exception:
                                                                                              
     pass
 
-from semantic_kernel import Kernel
-from semantic_kernel.connectors.ai.prompt_execution_settings import PromptExecutionSettings
-from semantic_kernel.functions.function_result import FunctionResult
-from semantic_kernel.functions.kernel_function import KernelFunction
-from semantic_kernel.prompt_template.prompt_template_config import PromptTemplateConfig
+if TYPE_CHECKING:
+    from semantic_kernel import Kernel
+    from semantic_kernel.functions.kernel_function import KernelFunction
+    from semantic_kernel.prompt_template.prompt_template_config import PromptTemplateConfig
 
-try:
-    from semantic_kernel.functions.kernel_function_from_prompt import (
-        kernel_function_from_prompt as _sk_kernel_function_from_prompt,
-    )
-except ImportError:                    
-    _sk_kernel_function_from_prompt = None
+
+def _is_function_result(payload: Any) -> bool:
+    """``_is_function_result(payload)`` without importing Semantic Kernel.
+
+    Nothing can be a ``FunctionResult`` until the kernel has been imported, so
+    an unloaded module simply means "no".
+    """
+    module = sys.modules.get("semantic_kernel.functions.function_result")
+    result_type = getattr(module, "FunctionResult", None)
+    return result_type is not None and isinstance(payload, result_type)
+
+
+def _prompt_template_config(payload: dict[str, Any]) -> PromptTemplateConfig:
+    from semantic_kernel.prompt_template.prompt_template_config import PromptTemplateConfig
+
+    try:
+        return PromptTemplateConfig.model_validate(payload)
+    except AttributeError:
+        return PromptTemplateConfig.from_dict(payload)
+
+
+def _execution_settings(service_id: str) -> Any:
+    from semantic_kernel.connectors.ai.prompt_execution_settings import PromptExecutionSettings
+
+    return PromptExecutionSettings(service_id=service_id)
 
 
 def kernel_function_from_prompt(
@@ -36,6 +109,9 @@ def kernel_function_from_prompt(
     function_name: str,
 ) -> KernelFunction:
     """Unified helper that works across Semantic Kernel versions."""
+    from semantic_kernel.functions.kernel_function import KernelFunction
+    from semantic_kernel.prompt_template.prompt_template_config import PromptTemplateConfig
+
     prompt_arg = prompt_template
     config_arg = prompt_template_config
     if config_arg is not None:
@@ -53,17 +129,9 @@ def kernel_function_from_prompt(
         prompt=prompt_arg,
         prompt_template_config=config_arg,
     )
-from sqlalchemy.ext.asyncio import AsyncSession
 
-from .models import (
-    FilmListParams,
-    FilmOut,
-    Paginated,
-    RentalCreate,
-    RentalCreatedResponse,
-    SummaryOut,
-)
-from .repositories import FilmRepository, RentalRepository
+
+T = TypeVar("T")
 
 
 class DomainError(Exception):
@@ -81,6 +149,14 @@ class MissingDependencyError(DomainError):
     """Raised when required dependencies are not configured."""
 
 
+class DataNotReadyError(DomainError):
+    """Raised when derived data (e.g. a materialized view) has not been built yet."""
+
+
+class ConflictError(DomainError):
+    """Raised when a write does not apply to the current state of a resource."""
+
+
 def _build_ask_prompt() -> KernelFunction:
     prompt_template = """
 You are a helpful video store assistant. Answer the customer question clearly and concisely.
@@ -101,43 +177,74 @@ Question: {{$question}}
             {"name": "question", "description": "Customer question", "required": True},
         ],
     }
-    try:
-        config = PromptTemplateConfig.model_validate(config_payload)
-    except AttributeError:
-        config = PromptTemplateConfig.from_dict(config_payload)                              
     return kernel_function_from_prompt(
         prompt_template,
-        config,
+        _prompt_template_config(config_payload),
         plugin_name="ai",
         function_name="ask",
     )
 
 
 class FilmService:
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, rental_sources: Sequence[AsyncSession] = ()):
         self._repo = FilmRepository(session)
-
-    async def list_films(self, params: FilmListParams) -> Paginated[FilmOut]:
-        return await self._repo.paginate(params)
-
-    async def get_film_or_raise(self, film_id: int) -> FilmOut:
+        # Where inventory and rentals live when they are sharded away from the catalog.
+        self._rental_repos = [FilmRepository(source) for source in rental_sources] or [self._repo]
+        self._loaders = FilmLoaders(self._repo, self._rental_repos)
+
+    async def list_films(
+        self, params: FilmListParams, expand: Sequence[str] = ()
+    ) -> Paginated[FilmDetailOut]:
+        page = await self._repo.paginate(params)
+        items = await self.expand_films(page.items, expand)
+        return Paginated(items=items, page=page.page, page_size=page.page_size, total=page.total)
+
+    async def get_film_or_raise(self, film_id: int, expand: Sequence[str] = ()) -> FilmDetailOut:
         film = await self._repo.get_film(film_id)
         if film is None:
             raise NotFoundError("film", film_id)
-        return FilmOut(
+        categories = await self._loaders.categories.load(film_id)
+        out = FilmOut(
             film_id=film.film_id,                          
             title=film.title,
             description=film.description,
             rating=film.rating,
             rental_rate=film.rental_rate,
-            category=None,
+            category=min(categories, default=None),
             streaming_available=film.streaming_available,
         )
+        [detail] = await self.expand_films([out], expand)
+        return detail
+
+    async def expand_films(
+        self, films: Sequence[FilmOut], expand: Sequence[str]
+    ) -> list[FilmDetailOut]:
+        """Attach the ``expand`` relations to ``films`` with one batched query per relation."""
+        film_ids = [film.film_id for film in films]
+        relations = {
+            relation: await self._loaders.get(relation).load_many(film_ids)
+            for relation in dict.fromkeys(expand)
+        }
+        return [
+            FilmDetailOut(
+                **dict(film), **{relation: values[index] for relation, values in relations.items()}
+            )
+            for index, film in enumerate(films)
+        ]
 
     async def get_summary_context(self, film_id: int) -> dict[str, str]:
         film = await self._repo.get_film(film_id)
         if film is None:
             raise NotFoundError("film", film_id)
+        return self._summary_context(film)
+
+    async def get_summary_contexts(self, film_ids: list[int]) -> dict[int, dict[str, str]]:
+        """Summary contexts for every existing film in ``film_ids``, loaded with one query."""
+        films = await self._repo.get_films(film_ids)
+        return {film.film_id: self._summary_context(film) for film in films}
+
+    @staticmethod
+    def _summary_context(film: Film) -> dict[str, str]:
         rental_rate = f"{film.rental_rate:.2f}" if film.rental_rate is not None else "0.00"
         return {
             "title": film.title,
@@ -149,6 +256,68 @@ class FilmService:
     async def find_by_title(self, title: str) -> FilmOut | None:
         return await self._repo.find_by_title(title)
 
+    async def find_by_titles(self, titles: list[str]) -> dict[str, FilmOut]:
+        return await self._repo.find_by_titles(titles)
+
+    async def similarity_index(self) -> FilmSimilarityIndex:
+        """Return the shared similarity index, building it from the catalog on first use."""
+        index = get_similarity_index()
+        if index is None:
+            index = FilmSimilarityIndex.build(await self._repo.catalog_texts())
+            set_similarity_index(index)
+        return index
+
+    async def similar_films(
+        self, queries: list[str], film_ids: list[int], k: int
+    ) -> list[SimilarFilmsOut]:
+        index = await self.similarity_index()
+        for film_id in film_ids:
+            if not index.contains(film_id):
+                raise NotFoundError("film", film_id)
+
+        results = [
+            SimilarFilmsOut(query=query, items=self._similar_items(index, matches))
+            for query, matches in zip(queries, index.search(queries, k))
+        ]
+        results.extend(
+            SimilarFilmsOut(film_id=film_id, items=self._similar_items(index, matches))
+            for film_id, matches in zip(film_ids, index.similar_to(film_ids, k))
+        )
+        return results
+
+    async def corental_matrix(self) -> CoRentalMatrix:
+        """Return the shared co-rental matrix, building it from the rentals on first use."""
+        matrix = get_corental_matrix()
+        if matrix is None:
+            matrix = await self.build_corental_matrix()
+            set_corental_matrix(matrix)
+        return matrix
+
+    async def build_corental_matrix(self) -> CoRentalMatrix:
+        rentals: list[tuple[int, int]] = []
+        for repo in self._rental_repos:
+            rentals.extend(await repo.rented_films())
+        return CoRentalMatrix.build(await self._repo.catalog_titles(), rentals)
+
+    async def also_rented(self, film_id: int, k: int) -> AlsoRentedOut:
+        matrix = await self.corental_matrix()
+        if not matrix.contains(film_id):
+            raise NotFoundError("film", film_id)
+        items = [
+            AlsoRentedFilm(film_id=other, title=matrix.title_of(other), customers=customers)
+            for other, customers in matrix.also_rented(film_id, k)
+        ]
+        return AlsoRentedOut(film_id=film_id, items=items)
+
+    @staticmethod
+    def _similar_items(
+        index: FilmSimilarityIndex, matches: list[tuple[int, float]]
+    ) -> list[SimilarFilm]:
+        return [
+            SimilarFilm(film_id=film_id, title=index.title_of(film_id), score=round(score, 4))
+            for film_id, score in matches
+        ]
+
 
 class RentalService:
     def __init__(self, session: AsyncSession):
@@ -159,34 +328,280 @@ class RentalService:
         if customer is None:
             raise NotFoundError("customer", customer_id)
 
-        inventory = await self._repo.get_inventory(payload.inventory_id)
-        if inventory is None:
+        terms = await self._repo.get_rental_terms(payload.inventory_id)
+        if terms is None:
             raise NotFoundError("inventory", payload.inventory_id)
 
-        return await self._repo.create_rental(customer_id, payload)
+        created = await self._repo.create_rental(customer_id, payload, terms.rental_rate)
+        if created.copy_was_in:
+            # A copy already out (double checkout) is not counted out twice.
+            self._after_commit(lambda table: table.checked_out(terms.store_id, terms.film_id))
+        return RentalCreatedResponse(rental_id=created.rental_id)
+
+    async def return_rental(self, rental_id: int) -> RentalReturnedResponse:
+        rental = await self._repo.get_rental(rental_id)
+        if rental is None:
+            raise NotFoundError("rental", rental_id)
+        if rental.return_date is not None:
+            raise ConflictError(f"rental already returned: {rental_id}")
+
+        terms = await self._repo.get_rental_terms(rental.inventory_id)
+        if terms is None:
+            raise NotFoundError("inventory", rental.inventory_id)
+
+        returned = await self._repo.return_rental(rental_id, terms.rental_duration)
+        if returned is None:
+            # Another request returned it since the read above.
+            raise ConflictError(f"rental already returned: {rental_id}")
+        if returned.copy_is_in:
+            self._after_commit(lambda table: table.checked_in(terms.store_id, terms.film_id))
+        return RentalReturnedResponse(
+            rental_id=rental_id, return_date=returned.return_date, late_fee=returned.late_fee
+        )
+
+    def _after_commit(self, update: Callable[[StockTable], None]) -> None:
+        def apply() -> None:
+            table = get_stock_table()
+            if table is not None:
+                update(table)
+
+        run_after_commit(self._repo.session, apply)
+
+    async def create_payment(
+        self, customer_id: int, payload: PaymentCreate
+    ) -> PaymentCreatedResponse:
+        if await self._repo.get_customer(customer_id) is None:
+            raise NotFoundError("customer", customer_id)
+        rental = await self._repo.get_rental(payload.rental_id)
+        if rental is None or rental.customer_id != customer_id:
+            raise NotFoundError("rental", payload.rental_id)
+
+        try:
+            payment_id = await self._repo.create_payment(customer_id, payload)
+        except IntegrityError as exc:
+            # E.g. a payment_date outside every partition of Pagila's payment table.
+            raise ConflictError(f"payment rejected by the database: {exc.orig}") from exc
+        balance = await CustomerBalanceService(self._repo.session).balance(customer_id)
+        return PaymentCreatedResponse(payment_id=payment_id, balance=balance)
+
+
+class StockService:
+    """Per-store availability counts, served from the in-process :class:`StockTable`.
+
+    ``use_table=False`` answers every call with the grouped database query
+    instead, e.g. when several processes write rentals and the table's
+    refresh interval is too coarse. ``sources`` are the databases the table
+    is built from; they default to ``session``.
+    """
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        use_table: bool = True,
+        sources: Sequence[AsyncSession] = (),
+    ):
+        self._repo = InventoryRepository(session)
+        self._use_table = use_table
+        self._sources = [InventoryRepository(source) for source in sources] or [self._repo]
+
+    async def stock_table(self) -> StockTable:
+        """Return the shared stock table, building it on first use."""
+        table = get_stock_table()
+        if table is None:
+            table = await self.build_table()
+            set_stock_table(table)
+        return table
+
+    async def build_table(self) -> StockTable:
+        """Build the table from every source database (each store shard, when sharded)."""
+        store_ids: set[int] = set()
+        counts: list[tuple[int, int, int, int]] = []
+        for repo in self._sources:
+            store_ids.update(await repo.store_ids())
+            counts.extend(await repo.stock_counts())
+        return StockTable(store_ids, counts)
+
+    async def availability(self, store_id: int, film_ids: Sequence[int]) -> StoreAvailabilityOut:
+        film_ids = list(dict.fromkeys(film_ids))
+        if self._use_table:
+            table = await self.stock_table()
+            if not table.has_store(store_id):
+                raise NotFoundError("store", store_id)
+            counts = table.counts(store_id, film_ids)
+            age = round(table.age(), 1)
+        else:
+            if not await self._repo.store_exists(store_id):
+                raise NotFoundError("store", store_id)
+            rows = await self._repo.stock_counts(store_id, film_ids)
+            found = {film_id: (total, available) for _, film_id, total, available in rows}
+            counts = [(film_id, *found.get(film_id, (0, 0))) for film_id in film_ids]
+            age = None
+        items = [
+            FilmAvailability(
+                film_id=film_id, total=total, available=available, in_stock=available > 0
+            )
+            for film_id, total, available in counts
+        ]
+        return StoreAvailabilityOut(store_id=store_id, items=items, age_seconds=age)
+
+
+def _balance_out(customer_id: int, balance: CustomerBalance | None) -> CustomerBalanceOut:
+    if balance is None:
+        zero = Decimal("0")
+        return CustomerBalanceOut(
+            customer_id=customer_id, rent_fees=zero, late_fees=zero, payments=zero, balance=zero
+        )
+    return CustomerBalanceOut(
+        customer_id=customer_id,
+        rent_fees=balance.rent_fees,
+        late_fees=balance.late_fees,
+        payments=balance.payments,
+        balance=balance.rent_fees + balance.late_fees - balance.payments,
+        updated_at=balance.updated_at,
+    )
+
+
+class CustomerBalanceService:
+    """What customers owe, read from the ``customer_balance`` ledger.
+
+    Matches Pagila's ``get_customer_balance()`` as of now: rental fees plus
+    late fees minus payments. Customers with no ledger row have not been
+    charged anything yet and report zero.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self._repo = CustomerBalanceRepository(session)
+
+    async def balance(self, customer_id: int) -> CustomerBalanceOut:
+        balances = await self._repo.get_many([customer_id])
+        if customer_id not in balances and not await self._repo.existing_customers([customer_id]):
+            raise NotFoundError("customer", customer_id)
+        return _balance_out(customer_id, balances.get(customer_id))
+
+    async def balances(self, customer_ids: Sequence[int]) -> CustomerBalancesOut:
+        ordered = list(dict.fromkeys(customer_ids))
+        balances = await self._repo.get_many(ordered)
+        unbilled = [customer_id for customer_id in ordered if customer_id not in balances]
+        existing = await self._repo.existing_customers(unbilled) if unbilled else set()
+        items = [
+            _balance_out(customer_id, balances.get(customer_id))
+            for customer_id in ordered
+            if customer_id in balances or customer_id in existing
+        ]
+        missing = [customer_id for customer_id in unbilled if customer_id not in existing]
+        return CustomerBalancesOut(items=items, missing=missing)
+
+
+class AnalyticsService:
+    """Sales figures read from materialized views, with how fresh they are.
+
+    ``stale_after`` is the age in seconds past which a view is reported as
+    stale; ``None`` only flags views that were never refreshed.
+    """
+
+    def __init__(self, session: AsyncSession, stale_after: float | None = None):
+        self._repo = AnalyticsRepository(session)
+        self._session = session
+        self._stale_after = stale_after
+
+    async def sales_by_category(self) -> CategorySalesOut:
+        freshness = await self._freshness(rental_by_category.name)
+        return CategorySalesOut(items=await self._repo.category_sales(), freshness=freshness)
+
+    async def sales_by_store(self) -> StoreSalesOut:
+        freshness = await self._freshness(sales_by_store.name)
+        return StoreSalesOut(items=await self._repo.store_sales(), freshness=freshness)
+
+    async def _freshness(self, view: str) -> DataFreshness:
+        if not await self._repo.is_populated(view):
+            raise DataNotReadyError(f"{view} has not been refreshed yet")
+        refreshed_at = (await self._repo.refresh_log()).get(view)
+        if refreshed_at is None:
+            return DataFreshness(view=view, stale=True)
+        if refreshed_at.tzinfo is None:
+            refreshed_at = refreshed_at.replace(tzinfo=timezone.utc)
+        age = max(0.0, (datetime.now(timezone.utc) - refreshed_at).total_seconds())
+        stale = self._stale_after is not None and age > self._stale_after
+        return DataFreshness(
+            view=view, refreshed_at=refreshed_at, age_seconds=round(age, 1), stale=stale
+        )
+
+    async def refresh(self, min_age: float = 0.0) -> dict[str, float]:
+        """Refresh every view older than ``min_age`` seconds; returns duration (ms) per view.
+
+        Only Postgres has materialized views, so other databases are left
+        alone. The transaction-scoped advisory lock makes concurrent callers,
+        e.g. one per worker, skip instead of queueing behind each other, and
+        ``min_age`` keeps them from refreshing again right after another one did.
+        Views that were never populated get a plain refresh, since
+        ``CONCURRENTLY`` needs existing data to diff against.
+        """
+        if self._repo.dialect != "postgresql":
+            return {}
+        refreshed: dict[str, float] = {}
+        if not await self._repo.try_refresh_lock():
+            await self._session.rollback()
+            return refreshed
+        log = await self._repo.refresh_log()
+        now = datetime.now(timezone.utc)
+        for view in MATERIALIZED_VIEWS:
+            last = log.get(view)
+            if last is not None and (now - last).total_seconds() < min_age:
+                continue
+            started = time.perf_counter()
+            populated = await self._repo.is_populated(view)
+            rows = await self._repo.refresh_view(view, concurrently=populated)
+            duration_ms = round((time.perf_counter() - started) * 1000, 1)
+            await self._repo.record_refresh(view, datetime.now(timezone.utc), duration_ms, rows)
+            refreshed[view] = duration_ms
+        await self._session.commit()
+        return refreshed
 
 
 class AIService:
+    # Batches of one summary_batch request in flight at once when there is no governor.
+    UNGOVERNED_BATCH_CONCURRENCY = 16
+
     def __init__(
         self,
         kernel_provider: Callable[[], Kernel],
         summary_prompt: dict[str, Any],
         film_service: FilmService,
+        answer_cache: AnswerCache | None = None,
+        governor: LLMGovernor | None = None,
+        batch_summary_prompt: dict[str, Any] | None = None,
     ):
         self._kernel_provider = kernel_provider
-        summary_config = summary_prompt["config"]                       
-        try:
-            cfg = PromptTemplateConfig.model_validate(summary_config)
-        except AttributeError:
-            cfg = PromptTemplateConfig.from_dict(summary_config)                              
-        self._summary_prompt = kernel_function_from_prompt(
-            summary_prompt["template"],                       
-            cfg,
+        self._answer_cache = answer_cache
+        self._governor = governor
+        self._summary_prompt_config = summary_prompt
+        self._batch_summary_prompt_config = batch_summary_prompt
+        self._film_service = film_service
+
+    # Prompt functions are Semantic Kernel objects, so they are built on first use
+    # rather than per request; requests that never reach the LLM never import SK.
+    @cached_property
+    def _summary_prompt(self) -> KernelFunction:
+        return self._prompt_function(self._summary_prompt_config, "film_summary")
+
+    @cached_property
+    def _batch_summary_prompt(self) -> KernelFunction | None:
+        if self._batch_summary_prompt_config is None:
+            return None
+        return self._prompt_function(self._batch_summary_prompt_config, "film_summary_batch")
+
+    @cached_property
+    def _ask_prompt(self) -> KernelFunction:
+        return _build_ask_prompt()
+
+    @staticmethod
+    def _prompt_function(prompt: dict[str, Any], function_name: str) -> KernelFunction:
+        return kernel_function_from_prompt(
+            prompt["template"],
+            _prompt_template_config(prompt["config"]),
             plugin_name="ai",
-            function_name="film_summary",
+            function_name=function_name,
         )
-        self._ask_prompt = _build_ask_prompt()
-        self._film_service = film_service
 
     def _get_kernel(self) -> Kernel:
         kernel = self._kernel_provider()
@@ -198,7 +613,7 @@ class AIService:
     def _collect_text(payload: Any) -> list[str]:
         if isinstance(payload, str):
             return [payload]
-        if isinstance(payload, FunctionResult):
+        if _is_function_result(payload):
             return AIService._collect_text(payload.value)
         if isinstance(payload, (list, tuple)):
             collected: list[str] = []
@@ -208,13 +623,84 @@ class AIService:
         text = getattr(payload, "content", None)
         return [text] if isinstance(text, str) else []
 
+    @staticmethod
+    def _raise_for_error(payload: Any) -> None:
+        """Re-raise connector errors that Semantic Kernel reports as a result instead of raising."""
+        if _is_function_result(payload):
+            error = (payload.metadata or {}).get("error")
+            if isinstance(error, BaseException):
+                raise error
+
     def ensure_ready(self) -> None:
         """Validate that required dependencies are configured."""
         self._get_kernel()
 
-    async def ask(self, question: str) -> AsyncIterator[str]:
+    def ensure_capacity(self, route: str, question: str | None = None) -> None:
+        """Fail fast when the governor would refuse the call; cached answers are always served."""
+        if self._governor is None:
+            return
+        if (
+            question is not None
+            and self._answer_cache is not None
+            and question in self._answer_cache
+        ):
+            return
+        self._governor.check(route)
+
+    @staticmethod
+    def _report_usage(payload: Any, telemetry: LLMCallTelemetry) -> None:
+        """Feed token usage reported in result or message metadata to ``telemetry``."""
+        items = payload if isinstance(payload, (list, tuple)) else [payload]
+        for item in items:
+            metadata = getattr(item, "metadata", None) or {}
+            if metadata.get("usage") is not None:
+                telemetry.usage(metadata["usage"])
+            if _is_function_result(item) and isinstance(item.value, (list, tuple)):
+                AIService._report_usage(item.value, telemetry)
+
+    async def ask(self, question: str, route: str = "ask") -> AsyncIterator[str]:
+        """Stream the answer to ``question``, replaying a cached answer when one exists."""
+        telemetry = LLMCallTelemetry(route)
+        outcome = "error"
+        try:
+            if self._answer_cache is not None:
+                cached = self._answer_cache.get(question)
+                if cached is not None:
+                    for piece in cached:
+                        telemetry.chunk()
+                        yield piece
+                    outcome = "cached"
+                    return
+
+            if self._governor is not None:
+                stream = self._governor.stream(
+                    route,
+                    lambda: self._stream_answer(question, telemetry),
+                    on_admit=telemetry.admitted,
+                )
+            else:
+                stream = self._stream_answer(question, telemetry)
+
+            pieces: list[str] = []
+            async for piece in stream:
+                telemetry.chunk()
+                pieces.append(piece)
+                yield piece
+            outcome = "ok"
+
+            if self._answer_cache is not None:
+                self._answer_cache.put(question, pieces)
+        except (GeneratorExit, asyncio.CancelledError):
+            outcome = "cancelled"
+            raise
+        finally:
+            telemetry.finish(outcome)
+
+    async def _stream_answer(
+        self, question: str, telemetry: LLMCallTelemetry | None = None
+    ) -> AsyncIterator[str]:
         kernel = self._get_kernel()
-        settings = PromptExecutionSettings(service_id="openai")
+        settings = _execution_settings("openai")
         stream_callable = getattr(self._ask_prompt, "invoke_stream", None)
         if callable(stream_callable):
             async for chunk in stream_callable(
@@ -222,6 +708,9 @@ class AIService:
                 settings=settings,
                 question=question,
             ):
+                self._raise_for_error(chunk)
+                if telemetry is not None:
+                    self._report_usage(chunk, telemetry)
                 for piece in self._collect_text(chunk):
                     clean_piece = piece.replace("\r", "")
                     if clean_piece.strip():
@@ -234,6 +723,9 @@ class AIService:
             settings=settings,
         )
         async for message in stream:
+            self._raise_for_error(message)
+            if telemetry is not None:
+                self._report_usage(message, telemetry)
             for piece in self._collect_text(message):
                 clean_piece = piece.replace("\r", "")
                 if clean_piece.strip():
@@ -242,36 +734,175 @@ class AIService:
     async def summary(self, film_id: int) -> SummaryOut:
         kernel = self._get_kernel()
         context = await self._film_service.get_summary_context(film_id)
+        return await self._invoke_json(
+            "summary", self._summary_prompt, kernel, context, lambda data: SummaryOut(**data)
+        )
+
+    async def summary_batch(
+        self, film_ids: list[int], batch_size: int = 10, max_attempts: int = 2
+    ) -> SummaryBatchOut:
+        """Summarise many films, packing ``batch_size`` films into each completion.
+
+        Contexts are loaded with one query. Films missing from a reply, or whose
+        entry fails validation, are retried in fresh batches up to
+        ``max_attempts`` times; whatever still fails is reported per film.
+        """
+        if self._batch_summary_prompt_config is None:
+            raise MissingDependencyError("Batch summary prompt has not been configured.")
+        kernel = self._get_kernel()
+        requested = list(dict.fromkeys(film_ids))
+        contexts = await self._film_service.get_summary_contexts(requested)
+
+        summaries: dict[int, FilmSummaryOut] = {}
+        failures = {
+            film_id: str(NotFoundError("film", film_id))
+            for film_id in requested
+            if film_id not in contexts
+        }
+        pending = [film_id for film_id in requested if film_id in contexts]
+        # No more batches in flight than the governor would admit at once, so a
+        # large request queues here instead of filling the governor's queue.
+        in_flight = asyncio.Semaphore(
+            self._governor.concurrency("summary_batch")
+            if self._governor is not None
+            else self.UNGOVERNED_BATCH_CONCURRENCY
+        )
+
+        async def summarise(batch: list[int]) -> dict[int, FilmSummaryOut] | Exception:
+            async with in_flight:
+                try:
+                    return await self._summarise_batch(
+                        kernel, {film_id: contexts[film_id] for film_id in batch}
+                    )
+                except LLMUnavailableError:
+                    # Refused by the governor or the breaker: the whole request
+                    # fails with 429/503 and Retry-After rather than per film.
+                    raise
+                except Exception as exc:
+                    return exc
+
+        for _ in range(max_attempts):
+            if not pending:
+                break
+            batches = [pending[i : i + batch_size] for i in range(0, len(pending), batch_size)]
+            tasks = [asyncio.ensure_future(summarise(batch)) for batch in batches]
+            try:
+                results = await asyncio.gather(*tasks)
+            except LLMUnavailableError:
+                for task in tasks:
+                    task.cancel()
+                raise
+            pending = []
+            for batch, result in zip(batches, results):
+                for film_id in batch:
+                    if isinstance(result, BaseException):
+                        failures[film_id] = str(result) or type(result).__name__
+                    elif film_id in result:
+                        summaries[film_id] = result[film_id]
+                        failures.pop(film_id, None)
+                        continue
+                    else:
+                        failures[film_id] = "No valid summary returned for this film."
+                    pending.append(film_id)
+
+        return SummaryBatchOut(
+            items=[summaries[film_id] for film_id in requested if film_id in summaries],
+            failed=[
+                SummaryFailure(film_id=film_id, detail=failures[film_id])
+                for film_id in requested
+                if film_id in failures
+            ],
+        )
 
-        settings = PromptExecutionSettings(service_id="openai")
+    async def _summarise_batch(
+        self, kernel: Kernel, contexts: dict[int, dict[str, str]]
+    ) -> dict[int, FilmSummaryOut]:
+        films = "\n\n".join(
+            f"Film id: {film_id}\n"
+            f"Film title: {context['title']}\n"
+            f"MPAA rating: {context['rating']}\n"
+            f"Rental rate: {context['rental_rate']}\n"
+            f"Description: {context['description']}"
+            for film_id, context in contexts.items()
+        )
+
+        def parse(data: Any) -> dict[int, FilmSummaryOut]:
+            entries = data.get("summaries") if isinstance(data, dict) else data
+            if not isinstance(entries, list):
+                raise DomainError("Semantic Kernel returned no summaries array.")
+            parsed: dict[int, FilmSummaryOut] = {}
+            for entry in entries:
+                try:
+                    item = FilmSummaryOut.model_validate(entry)
+                except ValidationError:
+                    continue
+                if item.film_id in contexts:
+                    parsed.setdefault(item.film_id, item)
+            return parsed
+
+        return await self._invoke_json(
+            "summary_batch", self._batch_summary_prompt, kernel, {"films": films}, parse
+        )
+
+    async def _invoke_json(
+        self,
+        route: str,
+        function: KernelFunction,
+        kernel: Kernel,
+        arguments: dict[str, str],
+        parse: Callable[[Any], T],
+    ) -> T:
+        """Invoke a JSON-mode prompt under the governor and parse the decoded reply."""
+        settings = _execution_settings("openai")
         try:
-            settings.extension_data["response_format"] = {"type": "json_object"}                       
+            settings.extension_data["response_format"] = {"type": "json_object"}
         except AttributeError:
-                                                                                                  
             pass
 
-        invoke_callable = getattr(self._summary_prompt, "invoke", None)
-        if callable(invoke_callable):
-            result = await invoke_callable(
-                kernel=kernel,
-                settings=settings,
-                **context,
-            )
-        else:
-            result = await self._summary_prompt.invoke_async(                              
-                kernel=kernel,
-                arguments=context,
-                settings=settings,
-            )
-        segments = self._collect_text(result)
-        if not segments:
-            raise DomainError("Semantic Kernel returned unexpected payload.")
-
-        raw = "".join(segments)
-
+        async def invoke() -> Any:
+            invoke_callable = getattr(function, "invoke", None)
+            if callable(invoke_callable):
+                result = await invoke_callable(
+                    kernel=kernel,
+                    settings=settings,
+                    **arguments,
+                )
+            else:
+                result = await function.invoke_async(
+                    kernel=kernel,
+                    arguments=arguments,
+                    settings=settings,
+                )
+            self._raise_for_error(result)
+            return result
+
+        telemetry = LLMCallTelemetry(route)
+        outcome = "error"
         try:
-            data = orjson.loads(raw)
-        except orjson.JSONDecodeError as exc:
-            raise DomainError("Semantic Kernel returned invalid JSON.") from exc
+            if self._governor is not None:
+                result = await self._governor.call(route, invoke, on_admit=telemetry.admitted)
+            else:
+                result = await invoke()
+            telemetry.chunk()
+            self._report_usage(result, telemetry)
+            segments = self._collect_text(result)
+            if not segments:
+                raise DomainError("Semantic Kernel returned unexpected payload.")
+
+            raw = "".join(segments)
 
-        return SummaryOut(**data)
+            try:
+                data = orjson.loads(raw)
+            except orjson.JSONDecodeError as exc:
+                outcome = "invalid_json"
+                telemetry.json_failure()
+                raise DomainError("Semantic Kernel returned invalid JSON.") from exc
+
+            parsed = parse(data)
+            outcome = "ok"
+            return parsed
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        finally:
+            telemetry.finish(outcome)
@@ -0,0 +1,142 @@
+"""Which shard owns a customer, rental or store.
+
+Stores are the shard key (see ``core.db.ShardSessions``). Customers carry
+their home ``store_id``; rentals and payments are written to the shard of
+the customer they belong to. Since requests address customers and rentals
+by id alone, the owning shard is found by asking every shard once;
+customers rarely change store, so their shard is then remembered.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Sequence
+from typing import TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.db import ShardSessions
+
+from .models import CustomerBalanceOut, CustomerBalancesOut
+from .repositories import RentalRepository
+from .services import ConflictError, CustomerBalanceService
+
+T = TypeVar("T")
+
+MAX_CACHED_CUSTOMERS = 100_000
+
+_customer_stores: dict[int, int] = {}
+
+
+def forget_customer_stores() -> None:
+    _customer_stores.clear()
+
+
+class ShardRouter:
+    def __init__(self, shards: ShardSessions):
+        self._shards = shards
+
+    @property
+    def shards(self) -> ShardSessions:
+        return self._shards
+
+    async def _ask_every_shard(
+        self, query: Callable[[RentalRepository], Awaitable[T]]
+    ) -> dict[int, T]:
+        shards = self._shards.shards()
+        answers = await asyncio.gather(
+            *(query(RentalRepository(session)) for session in shards.values())
+        )
+        return dict(zip(shards, answers))
+
+    def _home_session(self, store_id: int | None) -> AsyncSession:
+        if store_id is None:
+            # Unknown ids go to any shard; the service there reports them as not found.
+            return next(iter(self._shards.shards().values()))
+        return self._shards.for_store(store_id)
+
+    async def customer_stores(self, customer_ids: Sequence[int]) -> dict[int, int]:
+        """Home store of each known customer in ``customer_ids``.
+
+        Ids not remembered yet are looked up together, one query per shard.
+        """
+        stores = {
+            customer_id: _customer_stores[customer_id]
+            for customer_id in customer_ids
+            if customer_id in _customer_stores
+        }
+        unknown = [
+            customer_id for customer_id in dict.fromkeys(customer_ids) if customer_id not in stores
+        ]
+        if not unknown:
+            return stores
+        answers = await self._ask_every_shard(lambda repo: repo.get_customer_stores(unknown))
+        for found in answers.values():
+            for customer_id, store_id in found.items():
+                stores.setdefault(customer_id, store_id)
+        if len(_customer_stores) + len(unknown) > MAX_CACHED_CUSTOMERS:
+            _customer_stores.clear()
+        _customer_stores.update(stores)
+        return stores
+
+    async def customer_store(self, customer_id: int) -> int | None:
+        return (await self.customer_stores([customer_id])).get(customer_id)
+
+    async def customer_session(self, customer_id: int) -> AsyncSession:
+        if not self._shards.sharded:
+            return self._shards.catalog
+        return self._home_session(await self.customer_store(customer_id))
+
+    async def customer_groups(
+        self, customer_ids: Sequence[int]
+    ) -> list[tuple[AsyncSession, list[int]]]:
+        """Split ``customer_ids`` by owning shard, keeping their order within each group."""
+        if not self._shards.sharded:
+            return [(self._shards.catalog, list(customer_ids))]
+        stores = await self.customer_stores(customer_ids)
+        groups: dict[int, tuple[AsyncSession, list[int]]] = {}
+        for customer_id in customer_ids:
+            session = self._home_session(stores.get(customer_id))
+            groups.setdefault(id(session), (session, []))[1].append(customer_id)
+        return list(groups.values())
+
+    async def rental_session(self, rental_id: int) -> AsyncSession:
+        """The shard holding ``rental_id``.
+
+        Shards must hand out rental ids from disjoint ranges; an id found in
+        more than one shard is refused rather than guessed.
+        """
+        if not self._shards.sharded:
+            return self._shards.catalog
+        answers = await self._ask_every_shard(lambda repo: repo.get_rental(rental_id))
+        owners = [store_id for store_id, rental in answers.items() if rental is not None]
+        if len(owners) > 1:
+            raise ConflictError(f"rental {rental_id} exists in several shards")
+        return self._home_session(owners[0] if owners else None)
+
+    def store_session(self, store_id: int) -> AsyncSession:
+        return self._shards.for_store(store_id)
+
+
+class ShardedBalanceService:
+    """:class:`CustomerBalanceService` over every shard, one query per shard involved."""
+
+    def __init__(self, router: ShardRouter):
+        self._router = router
+
+    async def balance(self, customer_id: int) -> CustomerBalanceOut:
+        session = await self._router.customer_session(customer_id)
+        return await CustomerBalanceService(session).balance(customer_id)
+
+    async def balances(self, customer_ids: Sequence[int]) -> CustomerBalancesOut:
+        ordered = list(dict.fromkeys(customer_ids))
+        groups = await self._router.customer_groups(ordered)
+        results = await asyncio.gather(
+            *(CustomerBalanceService(session).balances(ids) for session, ids in groups)
+        )
+        found = {item.customer_id: item for result in results for item in result.items}
+        missing = {customer_id for result in results for customer_id in result.missing}
+        return CustomerBalancesOut(
+            items=[found[customer_id] for customer_id in ordered if customer_id in found],
+            missing=[customer_id for customer_id in ordered if customer_id in missing],
+        )
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import re
+import zlib
+from collections.abc import Iterable, Sequence
+
+import numpy as np
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOP_WORDS = frozenset(
+    """
+    a about all an and any are as at be by can do does film films for from has have in is it its
+    me movie movies must of on one or show some that the their there this to what where which who
+    with
+    """.split()
+)
+
+DEFAULT_DIMENSIONS = 1 << 12
+
+
+def _tokens(text: str) -> list[str]:
+    words = [word for word in _TOKEN.findall(text.lower()) if word not in _STOP_WORDS]
+    return [word[:-1] if len(word) > 3 and word.endswith("s") else word for word in words]
+
+
+class FilmSimilarityIndex:
+    """Hashed TF-IDF vectors for every film, stored as one L2-normalised float32 matrix.
+
+    Tokens are hashed into ``dimensions`` buckets with CRC32, so the index needs
+    no vocabulary and vectors are stable across processes. Queries are batched
+    into a single matrix product followed by a partial sort per row.
+    """
+
+    def __init__(
+        self,
+        film_ids: np.ndarray,
+        titles: list[str],
+        matrix: np.ndarray,
+        idf: np.ndarray,
+    ):
+        self.film_ids = film_ids
+        self.titles = titles
+        self.matrix = matrix
+        self.idf = idf
+        self._rows = {int(film_id): row for row, film_id in enumerate(film_ids)}
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    @property
+    def dimensions(self) -> int:
+        return self.idf.shape[0]
+
+    @classmethod
+    def build(
+        cls,
+        films: Iterable[tuple[int, str, str | None]],
+        dimensions: int = DEFAULT_DIMENSIONS,
+    ) -> FilmSimilarityIndex:
+        rows = list(films)
+        film_ids = np.array([film_id for film_id, _, _ in rows], dtype=np.int64)
+        titles = [title for _, title, _ in rows]
+        texts = [f"{title} {description or ''}" for _, title, description in rows]
+        counts = cls._hash_counts(texts, dimensions)
+
+        document_frequency = np.count_nonzero(counts, axis=0).astype(np.float32)
+        idf = np.log((1.0 + len(rows)) / (1.0 + document_frequency)).astype(np.float32) + 1.0
+        matrix = cls._normalise(counts * idf)
+        return cls(film_ids, titles, matrix, idf)
+
+    @staticmethod
+    def _hash_counts(texts: Sequence[str], dimensions: int) -> np.ndarray:
+        counts = np.zeros((len(texts), dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in _tokens(text):
+                counts[row, zlib.crc32(token.encode("utf-8")) % dimensions] += 1.0
+        return counts
+
+    @staticmethod
+    def _normalise(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (vectors / norms).astype(np.float32, copy=False)
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        return self._normalise(self._hash_counts(texts, self.dimensions) * self.idf)
+
+    def contains(self, film_id: int) -> bool:
+        return film_id in self._rows
+
+    def search(self, queries: Sequence[str], k: int) -> list[list[tuple[int, float]]]:
+        """Top ``k`` ``(film_id, score)`` pairs for each free-text query."""
+        if not queries:
+            return []
+        return self._top_k(self.embed(queries), k, exclude=None)
+
+    def similar_to(self, film_ids: Sequence[int], k: int) -> list[list[tuple[int, float]]]:
+        """Top ``k`` neighbours of each indexed film, excluding the film itself."""
+        if not film_ids:
+            return []
+        rows = np.array([self._rows[film_id] for film_id in film_ids], dtype=np.int64)
+        return self._top_k(self.matrix[rows], k, exclude=rows)
+
+    def _top_k(
+        self, vectors: np.ndarray, k: int, exclude: np.ndarray | None
+    ) -> list[list[tuple[int, float]]]:
+        scores = vectors @ self.matrix.T
+        if exclude is not None:
+            scores[np.arange(len(exclude)), exclude] = -1.0
+        k = min(k, scores.shape[1])
+        if k <= 0:
+            return [[] for _ in range(len(scores))]
+
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results: list[list[tuple[int, float]]] = []
+        for row, columns in enumerate(candidates):
+            ordered = columns[np.argsort(-scores[row, columns], kind="stable")]
+            results.append(
+                [
+                    (int(self.film_ids[column]), float(scores[row, column]))
+                    for column in ordered
+                    if scores[row, column] > 0
+                ]
+            )
+        return results
+
+    def title_of(self, film_id: int) -> str:
+        return self.titles[self._rows[film_id]]
+
+
+_index: FilmSimilarityIndex | None = None
+
+
+def get_similarity_index() -> FilmSimilarityIndex | None:
+    return _index
+
+
+def set_similarity_index(index: FilmSimilarityIndex | None) -> None:
+    global _index
+    _index = index
@@ -0,0 +1,52 @@
+"""Materialized sales_by_store and analytics refresh log
+
+Revision ID: 0003_sales_analytics
+Revises: 0002_streaming_subscription
+Create Date: 2026-10-19 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003_sales_analytics"
+down_revision = "0002_streaming_subscription"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Same joins as the Pagila sales_by_store view, keyed by store_id so it can
+    # be refreshed CONCURRENTLY; rental_by_category already has such an index.
+    op.execute(
+        """
+        CREATE MATERIALIZED VIEW sales_by_store_mv AS
+        SELECT s.store_id,
+               (c.city || ',' || cy.country) AS store,
+               (m.first_name || ' ' || m.last_name) AS manager,
+               sum(p.amount) AS total_sales
+          FROM payment p
+          JOIN rental r ON p.rental_id = r.rental_id
+          JOIN inventory i ON r.inventory_id = i.inventory_id
+          JOIN store s ON i.store_id = s.store_id
+          JOIN address a ON s.address_id = a.address_id
+          JOIN city c ON a.city_id = c.city_id
+          JOIN country cy ON c.country_id = cy.country_id
+          JOIN staff m ON s.manager_staff_id = m.staff_id
+         GROUP BY s.store_id, cy.country, c.city, m.first_name, m.last_name
+        WITH NO DATA
+        """
+    )
+    op.execute("CREATE UNIQUE INDEX sales_by_store_mv_store_id ON sales_by_store_mv (store_id)")
+    op.create_table(
+        "analytics_refresh_log",
+        sa.Column("view_name", sa.String(length=63), primary_key=True),
+        sa.Column("refreshed_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("duration_ms", sa.Float(), nullable=False),
+        sa.Column("row_count", sa.Integer(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("analytics_refresh_log")
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS sales_by_store_mv")
@@ -0,0 +1,81 @@
+"""Customer balance ledger
+
+Revision ID: 0004_customer_balance
+Revises: 0003_sales_analytics
+Create Date: 2026-10-19 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004_customer_balance"
+down_revision = "0003_sales_analytics"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Pagila partitions payment by month and only ships 2022-01 to 2022-07, so
+    # a payment recorded today has no partition to land in. A DEFAULT partition
+    # takes every date outside the shipped ranges.
+    op.execute(
+        """
+        DO $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM pg_partitioned_table
+                        WHERE partrelid = 'payment'::regclass) THEN
+                CREATE TABLE IF NOT EXISTS payment_p_default PARTITION OF payment DEFAULT;
+            END IF;
+        END
+        $$
+        """
+    )
+    op.create_table(
+        "customer_balance",
+        sa.Column(
+            "customer_id",
+            sa.Integer(),
+            sa.ForeignKey("customer.customer_id"),
+            primary_key=True,
+        ),
+        sa.Column("rent_fees", sa.Numeric(10, 2), nullable=False, server_default="0"),
+        sa.Column("late_fees", sa.Numeric(10, 2), nullable=False, server_default="0"),
+        sa.Column("payments", sa.Numeric(10, 2), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    # Backfill from existing rentals and payments with the rule in
+    # domain.billing.late_fee: 1.00 per started day past rental_duration.
+    op.execute(
+        """
+        INSERT INTO customer_balance (customer_id, rent_fees, late_fees, payments, updated_at)
+        SELECT c.customer_id,
+               COALESCE(r.rent_fees, 0),
+               COALESCE(r.late_fees, 0),
+               COALESCE(p.payments, 0),
+               now()
+          FROM customer c
+          LEFT JOIN (
+                SELECT r.customer_id,
+                       sum(f.rental_rate) AS rent_fees,
+                       sum(GREATEST(0, ceil(extract(epoch FROM r.return_date - r.rental_date
+                                                     - f.rental_duration * interval '1 day')
+                                            / 86400))) AS late_fees
+                  FROM rental r
+                  JOIN inventory i ON i.inventory_id = r.inventory_id
+                  JOIN film f ON f.film_id = i.film_id
+                 GROUP BY r.customer_id
+               ) r ON r.customer_id = c.customer_id
+          LEFT JOIN (
+                SELECT customer_id, sum(amount) AS payments
+                  FROM payment
+                 GROUP BY customer_id
+               ) p ON p.customer_id = c.customer_id
+         WHERE r.customer_id IS NOT NULL OR p.customer_id IS NOT NULL
+        """
+    )
+
+
+def downgrade() -> None:
+    # payment_p_default is kept: it holds the payments recorded since upgrading.
+    op.drop_table("customer_balance")
@@ -0,0 +1,85 @@
+"""Indexes for the API's hot queries
+
+Revision ID: 0005_hot_path_indexes
+Revises: 0004_customer_balance
+Create Date: 2026-10-19 00:00:00
+
+Built with CREATE INDEX CONCURRENTLY so a live database keeps taking writes
+while they build. CONCURRENTLY cannot run inside a transaction, hence the
+autocommit blocks; IF NOT EXISTS makes a re-run after an interrupted build
+safe (drop any index left INVALID first). The same indexes are declared on
+the models, which is how SQLite databases get them.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005_hot_path_indexes"
+down_revision = "0004_customer_balance"
+branch_labels = None
+depends_on = None
+
+
+# (name, table, columns, extra create_index options)
+INDEXES = [
+    # FilmRepository.paginate: ?category= matches lower(category.name).
+    ("idx_category_lower_name", "category", [sa.text("lower(name)")], {}),
+    # ... then finds the category's films.
+    ("idx_film_category_category_id_film_id", "film_category", ["category_id", "film_id"], {}),
+    # Inventory of a page of films (expand=inventory,stock, availability).
+    ("idx_inventory_film_id_store_id", "inventory", ["film_id", "store_id"], {}),
+    # Copies currently out: the open rentals only.
+    (
+        "idx_rental_open_inventory_id",
+        "rental",
+        ["inventory_id"],
+        {
+            "postgresql_where": sa.text("return_date IS NULL"),
+            "sqlite_where": sa.text("return_date IS NULL"),
+        },
+    ),
+    # A customer's rentals by date (get_customer_balance, rewards_report).
+    ("idx_rental_customer_id_rental_date", "rental", ["customer_id", "rental_date"], {}),
+]
+
+# FilmRepository.find_by_title(s): title ILIKE '%fragment%'.
+TRIGRAM_INDEX = "idx_film_title_trgm"
+
+
+def upgrade() -> None:
+    postgres = op.get_bind().dialect.name == "postgresql"
+    with op.get_context().autocommit_block():
+        if postgres:
+            op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            op.create_index(
+                TRIGRAM_INDEX,
+                "film",
+                ["title"],
+                postgresql_using="gin",
+                postgresql_ops={"title": "gin_trgm_ops"},
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+        for name, table, columns, options in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+                **options,
+            )
+        if postgres:
+            op.execute("ANALYZE category, film, film_category, inventory, rental")
+
+
+def downgrade() -> None:
+    postgres = op.get_bind().dialect.name == "postgresql"
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+        if postgres:
+            op.drop_index(
+                TRIGRAM_INDEX, table_name="film", postgresql_concurrently=True, if_exists=True
+            )
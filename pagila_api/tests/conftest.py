@@ -15,8 +15,11 @@ from sqlmodel import SQLModel
 from app.main import app
 from core.config import get_settings
 from core.db import dispose_engine, get_engine, get_session_factory, init_engine
+from domain.availability import set_stock_table
+from domain.corental import set_corental_matrix
 from domain.models import Category, Customer, Film, FilmCategory, Inventory, SummaryOut
 from domain.services import FilmService
+from domain.similarity import set_similarity_index
 
 
 @pytest.fixture(scope="session")
@@ -55,6 +58,9 @@ async def db_session() -> AsyncIterator[AsyncSession]:
     async with engine.begin() as conn:
         await conn.run_sync(SQLModel.metadata.drop_all)
         await conn.run_sync(SQLModel.metadata.create_all)
+    set_similarity_index(None)
+    set_stock_table(None)
+    set_corental_matrix(None)
 
     session_factory = get_session_factory()
     async with session_factory() as session:
@@ -68,7 +74,10 @@ class FakeAIService:
     def ensure_ready(self) -> None:
         return None
 
-    async def ask(self, question: str):
+    def ensure_capacity(self, route: str, question: str | None = None) -> None:
+        return None
+
+    async def ask(self, question: str, route: str = "ask"):
         lower = question.lower()
         if "fifa" in lower:
             chunks = [
@@ -1,5 +1,16 @@
+import asyncio
+from datetime import datetime, timezone
+from decimal import Decimal
+
 import pytest
 
+from api.v1.ai_routes import _summary_prompt_config
+from app.agents.orchestration import HandoffOrchestration
+from app.agents.search_agent import SearchAgent
+from core.answer_cache import AnswerCache, normalize_question
+from core.metrics import REGISTRY
+from domain.models import Film, Inventory, Rental
+from domain.services import AIService
 from tests.conftest import seed_base_data
 
 
@@ -45,6 +56,51 @@ async def test_handoff_search_agent(client, db_session):
     assert "Alien" in payload["answer"]
 
 
+@pytest.mark.asyncio
+async def test_handoff_catalog_agent(client, db_session):
+    await seed_base_data(db_session)
+
+    response = await client.post(
+        "/v1/ai/handoff",
+        json={"question": "Which movie has an extraterrestrial threat?"},
+    )
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["agent"] == "CatalogAgent"
+    assert payload["answer"] == "Closest matches in the catalog: Alien."
+
+
+@pytest.mark.asyncio
+async def test_handoff_catalog_agent_recommends_from_corentals(client, db_session):
+    seeded = await seed_base_data(db_session)
+    now = datetime.now(timezone.utc)
+    sequel = Film(title="Aliens", language_id=1, rental_duration=5, streaming_available=False)
+    db_session.add(sequel)
+    await db_session.flush()
+    copy = Inventory(film_id=sequel.film_id, store_id=1, last_update=now)
+    db_session.add(copy)
+    await db_session.flush()
+    for inventory_id in (seeded["inventory_id"], copy.inventory_id):
+        db_session.add(
+            Rental(
+                rental_date=now,
+                inventory_id=inventory_id,
+                customer_id=seeded["customer_id"],
+                staff_id=1,
+                last_update=now,
+            )
+        )
+    await db_session.commit()
+
+    response = await client.post(
+        "/v1/ai/handoff",
+        json={"question": "What do you recommend if I liked the extraterrestrial threat?"},
+    )
+    payload = response.json()
+    assert payload["agent"] == "CatalogAgent"
+    assert payload["answer"] == "Customers who rented Alien also rented: Aliens."
+
+
 @pytest.mark.asyncio
 async def test_handoff_llm_agent(client, db_session):
     await seed_base_data(db_session)
@@ -57,3 +113,390 @@ async def test_handoff_llm_agent(client, db_session):
     payload = response.json()
     assert payload["agent"] == "LLMAgent"
     assert "Argentina won the 2022 FIFA World Cup" in payload["answer"]
+
+
+def test_answer_cache_normalizes_questions():
+    assert normalize_question("What are your OPENING hours, please?") == normalize_question(
+        "  what are   opening hours!! "
+    )
+    assert normalize_question("What is it?") == "what is"
+    assert normalize_question("Is it?") == "is"
+    assert normalize_question("The?") == "the"
+
+
+def test_answer_cache_keeps_questions_apart_by_wh_word():
+    when = "When was Academy Dinosaur released?"
+    where = "Where was Academy Dinosaur released?"
+    assert normalize_question(when) != normalize_question(where)
+
+    for near_duplicates in (False, True):
+        cache = AnswerCache(
+            ttl_seconds=60,
+            max_entries=10,
+            near_duplicates=near_duplicates,
+            similarity_threshold=0.6,
+        )
+        cache.put(when, ["In 2006."])
+
+        assert cache.get(where) is None
+        assert cache.get("When was ACADEMY DINOSAUR released") == ("In 2006.",)
+        cache.put("Can I rent Alien Center?", ["Yes."])
+        assert cache.get("Should I rent Alien Center?") is None
+
+
+def test_answer_cache_ttl_and_size_bounds():
+    now = [0.0]
+    cache = AnswerCache(ttl_seconds=10, max_entries=2, clock=lambda: now[0])
+
+    cache.put("late fees", ["Late fees are ", "$1 per day."])
+    assert cache.get("Late fees?") == ("Late fees are ", "$1 per day.")
+
+    now[0] = 11.0
+    assert cache.get("late fees") is None
+
+    cache.put("one", ["1"])
+    cache.put("two", ["2"])
+    cache.put("three", ["3"])
+    assert len(cache) == 2
+    assert cache.get("one") is None
+    assert cache.get("three") == ("3",)
+
+
+def test_answer_cache_near_duplicate_matching():
+    cache = AnswerCache(
+        ttl_seconds=60, max_entries=10, near_duplicates=True, similarity_threshold=0.6
+    )
+    cache.put("When does the store open on weekends?", ["9am."])
+
+    assert cache.get("when does the store open on the weekend") == ("9am.",)
+    assert cache.get("How much is a late fee?") is None
+
+
+@pytest.mark.asyncio
+async def test_ai_service_replays_cached_answer_without_kernel():
+    cache = AnswerCache(ttl_seconds=60, max_entries=10)
+    cache.put("Opening hours?", ["We open ", "at 9."])
+    service = AIService(
+        lambda: None, _summary_prompt_config(), film_service=None, answer_cache=cache
+    )
+
+    chunks_seen = REGISTRY.histogram("llm_call_chunks", "", ("route", "outcome"))
+    before = chunks_seen.sum(route="ask", outcome="cached")
+
+    chunks = [chunk async for chunk in service.ask("opening hours")]
+
+    assert chunks == ["We open ", "at 9."]
+    assert chunks_seen.sum(route="ask", outcome="cached") == before + 2
+
+
+@pytest.mark.asyncio
+async def test_handoff_stream_emits_agent_then_answer(client, db_session):
+    await seed_base_data(db_session)
+
+    async with client.stream(
+        "POST", "/v1/ai/handoff/stream", json={"question": "Who won the FIFA World Cup in 2022?"}
+    ) as response:
+        assert response.status_code == 200
+        body = "".join([text async for text in response.aiter_text()])
+
+    assert body.startswith("event: agent\ndata: LLMAgent\n\n")
+    assert "data: Argentina won the 2022 FIFA World Cup" in body
+
+    async with client.stream(
+        "POST",
+        "/v1/ai/handoff/stream",
+        json={"question": "What is the rental rate for the film Alien?"},
+    ) as response:
+        body = "".join([text async for text in response.aiter_text()])
+
+    assert body.startswith("event: agent\ndata: SearchAgent\n\n")
+    assert "Alien" in body
+
+
+class _StubSearchAgent:
+    def __init__(self, answer):
+        self._answer = answer
+
+    async def try_answer(self, question):
+        await asyncio.sleep(0.01)
+        return self._answer
+
+
+class _SlowLLMAgent:
+    def __init__(self):
+        self.cancelled = False
+
+    async def answer(self, question):
+        return "".join([chunk async for chunk in self.stream(question)])
+
+    async def stream(self, question):
+        try:
+            yield "thinking"
+            await asyncio.sleep(0.05)
+            yield " done"
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+
+@pytest.mark.asyncio
+async def test_speculative_handoff_cancels_llm_when_search_hits():
+    llm = _SlowLLMAgent()
+    orchestration = HandoffOrchestration(
+        _StubSearchAgent("From the DB."), lambda: llm, speculative=True
+    )
+
+    agent, chunks = await orchestration.stream("film question")
+
+    assert agent == "SearchAgent"
+    assert [chunk async for chunk in chunks] == ["From the DB."]
+    assert llm.cancelled
+
+
+@pytest.mark.asyncio
+async def test_speculative_handoff_streams_llm_on_miss():
+    orchestration = HandoffOrchestration(_StubSearchAgent(None), _SlowLLMAgent, speculative=True)
+
+    assert await orchestration.handle("anything") == ("LLMAgent", "thinking done")
+    agent, chunks = await orchestration.stream("anything")
+    assert agent == "LLMAgent"
+    assert [chunk async for chunk in chunks] == ["thinking", " done"]
+
+
+def test_search_agent_extracts_all_titles():
+    assert SearchAgent._extract_titles('compare "ACADEMY DINOSAUR" and "ACE GOLDFINGER"') == [
+        "ACADEMY DINOSAUR",
+        "ACE GOLDFINGER",
+    ]
+    assert SearchAgent._extract_titles("Rates for the films Alien and Jaws?") == ["Alien", "Jaws"]
+    assert SearchAgent._extract_titles("What is the rental rate for the film Alien?") == ["Alien"]
+    assert SearchAgent._extract_titles("Who won the FIFA World Cup in 2022?") == []
+
+
+@pytest.mark.asyncio
+async def test_handoff_search_agent_answers_multi_film_question(client, db_session):
+    await seed_base_data(db_session)
+    db_session.add(
+        Film(
+            title="Jaws",
+            language_id=1,
+            rental_duration=5,
+            rental_rate=Decimal("0.99"),
+            rating="PG",
+        )
+    )
+    await db_session.commit()
+
+    response = await client.post(
+        "/v1/ai/handoff",
+        json={"question": 'compare "alien" and "JAWS" and "Solaris"'},
+    )
+
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["agent"] == "SearchAgent"
+    assert "Alien (Horror) rents for $2.99." in payload["answer"]
+    assert "Jaws (Unknown) rents for $0.99." in payload["answer"]
+    assert "Jaws is the cheapest to rent." in payload["answer"]
+    assert 'No film matched "Solaris".' in payload["answer"]
+
+
+@pytest.mark.asyncio
+async def test_fake_llm_backend_streams_and_summarises(monkeypatch):
+    from core import ai_kernel
+    from core.config import get_settings
+
+    monkeypatch.setattr(ai_kernel, "_kernel", None)
+    settings = get_settings().model_copy(
+        update={
+            "llm_backend": "fake",
+            "openai_api_key": None,
+            "fake_llm_ttft_ms": 0,
+            "fake_llm_tokens_per_second": 10_000,
+            "fake_llm_response_tokens": 12,
+        }
+    )
+    kernel = ai_kernel.get_kernel(settings)
+
+    class _Films:
+        async def get_summary_context(self, film_id: int) -> dict[str, str]:
+            return {"title": "Alien", "description": "", "rating": "R", "rental_rate": "2.99"}
+
+    service = AIService(lambda: kernel, _summary_prompt_config(), _Films())
+
+    chunks = [chunk async for chunk in service.ask("Any horror picks?")]
+    assert len(chunks) == 12
+    assert "".join(chunks).startswith("Simulated answer to: Any horror picks?")
+
+    summary = await service.summary(1)
+    assert summary.model_dump() == {"title": "Alien", "rating": "R", "recommended": True}
+
+    tokens = REGISTRY.histogram("llm_call_tokens", "", ("route", "kind"))
+    assert tokens.count(route="summary", kind="completion") >= 1
+    duration = REGISTRY.histogram("llm_call_duration_seconds", "", ("route", "outcome"))
+    assert duration.count(route="ask", outcome="ok") >= 1
+
+
+def test_get_kernel_refuses_when_ai_disabled(monkeypatch):
+    from core import ai_kernel
+    from core.config import get_settings
+
+    monkeypatch.setattr(ai_kernel, "_kernel", None)
+    settings = get_settings().model_copy(update={"enable_ai": False})
+
+    with pytest.raises(RuntimeError, match="ENABLE_AI=false"):
+        ai_kernel.get_kernel(settings)
+
+
+@pytest.mark.asyncio
+async def test_fake_llm_backend_injects_errors():
+    from core.fake_llm import FakeChatCompletion
+
+    service = FakeChatCompletion(
+        ai_model_id="fake", service_id="openai", ttft_seconds=0, error_rate=1.0
+    )
+
+    with pytest.raises(Exception, match="Injected failure"):
+        async for _ in service.complete_chat_stream(None, None):
+            pass
+
+
+@pytest.mark.asyncio
+async def test_ai_summary_batch_packs_films_and_retries_failures(client, db_session, monkeypatch):
+    from api.v1 import ai_routes
+    from app.main import app
+    from core import ai_kernel
+    from core.config import get_settings
+    from core.fake_llm import FakeChatCompletion
+    from domain.services import FilmService
+
+    seeded = await seed_base_data(db_session)
+    jaws = Film(
+        title="Jaws", language_id=1, rental_duration=5, rental_rate=Decimal("0.99"), rating="PG"
+    )
+    db_session.add(jaws)
+    await db_session.commit()
+
+    prompts: list[str] = []
+
+    class DroppingFake(FakeChatCompletion):
+        """Leaves Jaws out of its first reply so the batch has to retry it."""
+
+        def _reply_tokens(self, prompt, settings):
+            prompts.append(prompt)
+            if len(prompts) == 1:
+                prompt = prompt.split(f"Film id: {jaws.film_id}")[0]
+            return super()._reply_tokens(prompt, settings)
+
+    monkeypatch.setattr(ai_kernel, "_kernel", None)
+    settings = get_settings().model_copy(update={"llm_backend": "fake", "fake_llm_ttft_ms": 0})
+    kernel = ai_kernel.get_kernel(settings)
+    kernel.add_service(
+        DroppingFake(
+            ai_model_id="fake", service_id="openai", ttft_seconds=0, tokens_per_second=1e6
+        ),
+        overwrite=True,
+    )
+
+    def _service() -> AIService:
+        return AIService(
+            lambda: kernel,
+            ai_routes._summary_prompt_config(),
+            FilmService(db_session),
+            batch_summary_prompt=ai_routes._batch_summary_prompt_config(),
+        )
+
+    app.dependency_overrides[ai_routes.get_ai_service] = _service
+
+    response = await client.post(
+        "/v1/ai/summary/batch", json={"film_ids": [seeded["film_id"], jaws.film_id, 999]}
+    )
+
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["items"] == [
+        {"film_id": seeded["film_id"], "title": "Alien", "rating": "R", "recommended": True},
+        {"film_id": jaws.film_id, "title": "Jaws", "rating": "PG", "recommended": False},
+    ]
+    assert payload["failed"] == [{"film_id": 999, "detail": "film not found: 999"}]
+    assert len(prompts) == 2
+    assert "Film title: Alien" in prompts[0] and "Film title: Jaws" in prompts[0]
+    assert "Film title: Alien" not in prompts[1] and "Film title: Jaws" in prompts[1]
+
+
+def _batch_service(db_session, governor, summarise) -> AIService:
+    from domain.services import FilmService
+
+    service = AIService(
+        lambda: object(),
+        _summary_prompt_config(),
+        FilmService(db_session),
+        governor=governor,
+        batch_summary_prompt={"template": "unused"},
+    )
+    service._summarise_batch = summarise
+    return service
+
+
+@pytest.mark.asyncio
+async def test_ai_summary_batch_stays_within_governor_concurrency(db_session):
+    from core.llm_governor import CircuitBreaker, LLMGovernor
+    from domain.models import FilmSummaryOut
+
+    films = [
+        Film(title=f"Film {n}", language_id=1, rental_duration=3, rating="PG") for n in range(30)
+    ]
+    db_session.add_all(films)
+    await db_session.commit()
+    governor = LLMGovernor(
+        global_limit=3,
+        max_queue=0,
+        queue_timeout=0.05,
+        call_timeout=1.0,
+        breaker=CircuitBreaker(3, 30),
+    )
+    running = peak = 0
+
+    async def summarise(kernel, contexts):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return {
+            film_id: FilmSummaryOut(
+                film_id=film_id, title=context["title"], rating="PG", recommended=False
+            )
+            for film_id, context in contexts.items()
+        }
+
+    service = _batch_service(db_session, governor, summarise)
+    result = await service.summary_batch([film.film_id for film in films], batch_size=2)
+
+    assert len(result.items) == 30
+    assert peak == 3
+
+
+@pytest.mark.asyncio
+async def test_ai_summary_batch_maps_open_circuit_to_retry_after(client, db_session):
+    from api.v1 import ai_routes
+    from app.main import app
+    from core.llm_governor import CircuitOpenError
+
+    seeded = await seed_base_data(db_session)
+    calls = 0
+
+    async def summarise(kernel, contexts):
+        nonlocal calls
+        calls += 1
+        raise CircuitOpenError("LLM upstream is unavailable.", retry_after=11.2)
+
+    app.dependency_overrides[ai_routes.get_ai_service] = lambda: _batch_service(
+        db_session, None, summarise
+    )
+
+    response = await client.post("/v1/ai/summary/batch", json={"film_ids": [seeded["film_id"]]})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "12"
+    assert calls == 1
@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import insert
+
+from core.db import get_engine
+from domain.analytics import (
+    ANALYTICS_METADATA,
+    analytics_refresh_log,
+    rental_by_category,
+    sales_by_store,
+)
+from domain.services import AnalyticsService
+
+
+@pytest_asyncio.fixture
+async def analytics_tables(db_session):
+    # SQLite has no materialized views; plain tables with the same columns stand in.
+    async with get_engine().begin() as conn:
+        await conn.run_sync(ANALYTICS_METADATA.drop_all)
+        await conn.run_sync(ANALYTICS_METADATA.create_all)
+    yield db_session
+    async with get_engine().begin() as conn:
+        await conn.run_sync(ANALYTICS_METADATA.drop_all)
+
+
+@pytest.mark.asyncio
+async def test_sales_by_category_reports_freshness(client, analytics_tables):
+    refreshed_at = datetime.now(timezone.utc) - timedelta(minutes=2)
+    await analytics_tables.execute(
+        insert(rental_by_category),
+        [
+            {"category": "Drama", "total_sales": Decimal("4587.39")},
+            {"category": "Sports", "total_sales": Decimal("5314.21")},
+        ],
+    )
+    await analytics_tables.execute(
+        insert(analytics_refresh_log).values(
+            view_name="rental_by_category",
+            refreshed_at=refreshed_at,
+            duration_ms=12.5,
+            row_count=2,
+        )
+    )
+    await analytics_tables.commit()
+
+    response = await client.get("/v1/analytics/sales-by-category")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["items"] == [
+        {"category": "Sports", "total_sales": 5314.21},
+        {"category": "Drama", "total_sales": 4587.39},
+    ]
+    freshness = body["freshness"]
+    assert freshness["view"] == "rental_by_category"
+    assert 110 <= freshness["age_seconds"] <= 180
+    assert freshness["stale"] is False
+
+
+@pytest.mark.asyncio
+async def test_sales_by_store_without_refresh_log_is_stale(client, analytics_tables):
+    await analytics_tables.execute(
+        insert(sales_by_store).values(
+            store_id=1, store="Lethbridge,Canada", manager="Mike Hillyer", total_sales=Decimal("10")
+        )
+    )
+    await analytics_tables.commit()
+
+    response = await client.get("/v1/analytics/sales-by-store")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["items"][0]["manager"] == "Mike Hillyer"
+    assert body["freshness"] == {
+        "view": "sales_by_store_mv",
+        "refreshed_at": None,
+        "age_seconds": None,
+        "stale": True,
+    }
+    assert await AnalyticsService(analytics_tables).refresh() == {}
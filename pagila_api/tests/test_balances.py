@@ -0,0 +1,176 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import text
+from sqlmodel import select
+
+from core.db import get_session_factory
+from domain.billing import late_fee
+from domain.models import CustomerBalance, Payment, Rental
+from domain.repositories import CustomerBalanceRepository
+from domain.services import ConflictError, RentalService
+from tests.conftest import seed_base_data
+
+ADMIN = {"Authorization": "Bearer dvd_admin"}
+
+
+def test_late_fee_charges_each_started_day_past_the_duration():
+    rented = datetime(2022, 5, 1, 12, tzinfo=timezone.utc)
+
+    assert late_fee(rented, None, 3) == Decimal("0")
+    assert late_fee(rented, rented + timedelta(days=3), 3) == Decimal("0")
+    assert late_fee(rented, rented + timedelta(days=3, hours=1), 3) == Decimal("1.00")
+    assert late_fee(rented.replace(tzinfo=None), rented + timedelta(days=5), 3) == Decimal("2.00")
+
+
+@pytest.mark.asyncio
+async def test_rental_return_and_payment_update_the_balance(client, db_session):
+    data = await seed_base_data(db_session)
+    customer_id = data["customer_id"]
+
+    response = await client.get(f"/v1/customers/{customer_id}/balance", headers=ADMIN)
+    assert response.status_code == 200
+    assert response.json()["balance"] == 0
+
+    created = await client.post(
+        f"/v1/customers/{customer_id}/rentals",
+        json={"inventory_id": data["inventory_id"], "staff_id": 1},
+        headers=ADMIN,
+    )
+    rental_id = created.json()["rental_id"]
+    rental = await db_session.get(Rental, rental_id)
+    rental.rental_date = datetime.utcnow() - timedelta(days=4, hours=12)
+    await db_session.commit()
+
+    returned = await client.post(f"/v1/rentals/{rental_id}/return", headers=ADMIN)
+    assert returned.status_code == 200
+    assert returned.json()["late_fee"] == 2.0
+    again = await client.post(f"/v1/rentals/{rental_id}/return", headers=ADMIN)
+    assert again.status_code == 409
+
+    paid = await client.post(
+        f"/v1/customers/{customer_id}/payments",
+        json={"rental_id": rental_id, "staff_id": 1, "amount": "3.99"},
+        headers=ADMIN,
+    )
+    assert paid.status_code == 201
+    assert paid.json()["balance"]["balance"] == 1.0
+
+    balance = (await client.get(f"/v1/customers/{customer_id}/balance", headers=ADMIN)).json()
+    assert balance["rent_fees"] == 2.99
+    assert balance["late_fees"] == 2.0
+    assert balance["payments"] == 3.99
+    assert balance["balance"] == 1.0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_returns_charge_the_late_fee_once(client, db_session):
+    data = await seed_base_data(db_session)
+    customer_id = data["customer_id"]
+    created = await client.post(
+        f"/v1/customers/{customer_id}/rentals",
+        json={"inventory_id": data["inventory_id"], "staff_id": 1},
+        headers=ADMIN,
+    )
+    rental_id = created.json()["rental_id"]
+    rental = await db_session.get(Rental, rental_id)
+    rental.rental_date = datetime.utcnow() - timedelta(days=4, hours=12)
+    await db_session.commit()
+
+    session_factory = get_session_factory()
+    async with session_factory() as first, session_factory() as second:
+        # Both requests have read the rental while it was still open.
+        stale = await second.get(Rental, rental_id)
+        assert stale.return_date is None
+        await RentalService(first).return_rental(rental_id)
+        await first.commit()
+        with pytest.raises(ConflictError):
+            await RentalService(second).return_rental(rental_id)
+        await second.rollback()
+
+    balance = (await client.get(f"/v1/customers/{customer_id}/balance", headers=ADMIN)).json()
+    assert balance["late_fees"] == 2.0
+
+
+@pytest.mark.asyncio
+async def test_payment_rejected_by_the_database_is_a_conflict(client, db_session):
+    data = await seed_base_data(db_session)
+    customer_id = data["customer_id"]
+    created = await client.post(
+        f"/v1/customers/{customer_id}/rentals",
+        json={"inventory_id": data["inventory_id"], "staff_id": 1},
+        headers=ADMIN,
+    )
+    # Stands in for Postgres refusing a payment_date outside every payment
+    # partition (Pagila ships 2022 only; migration 0004 adds a DEFAULT one).
+    await db_session.execute(
+        text(
+            "CREATE TRIGGER payment_partition BEFORE INSERT ON payment "
+            "WHEN NEW.payment_date >= '2022-08-01' BEGIN "
+            "SELECT RAISE(ABORT, 'no partition of relation \"payment\" found for row'); END"
+        )
+    )
+    await db_session.commit()
+
+    paid = await client.post(
+        f"/v1/customers/{customer_id}/payments",
+        json={"rental_id": created.json()["rental_id"], "staff_id": 1, "amount": "3.99"},
+        headers=ADMIN,
+    )
+
+    assert paid.status_code == 409
+    assert "no partition" in paid.json()["detail"]
+    balance = (await client.get(f"/v1/customers/{customer_id}/balance", headers=ADMIN)).json()
+    assert balance["payments"] == 0
+
+
+@pytest.mark.asyncio
+async def test_balance_endpoints_report_unknown_customers(client, db_session):
+    data = await seed_base_data(db_session)
+
+    response = await client.get("/v1/customers/999/balance", headers=ADMIN)
+    assert response.status_code == 404
+
+    response = await client.get(
+        "/v1/customers/balances",
+        params={"customer_id": [data["customer_id"], 999, data["customer_id"]]},
+        headers=ADMIN,
+    )
+    assert response.status_code == 200
+    payload = response.json()
+    assert [item["customer_id"] for item in payload["items"]] == [data["customer_id"]]
+    assert payload["missing"] == [999]
+
+    assert (await client.get(f"/v1/customers/{data['customer_id']}/balance")).status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_rebuild_matches_incremental_updates(client, db_session):
+    data = await seed_base_data(db_session)
+    customer_id = data["customer_id"]
+    created = await client.post(
+        f"/v1/customers/{customer_id}/rentals",
+        json={"inventory_id": data["inventory_id"], "staff_id": 1},
+        headers=ADMIN,
+    )
+    db_session.add(
+        Payment(
+            customer_id=customer_id,
+            staff_id=1,
+            rental_id=created.json()["rental_id"],
+            amount=Decimal("1.50"),
+            payment_date=datetime.utcnow(),
+        )
+    )
+    await db_session.commit()
+
+    assert await CustomerBalanceRepository(db_session).rebuild() == 1
+    await db_session.commit()
+
+    row = (await db_session.execute(select(CustomerBalance))).scalar_one()
+    assert (row.rent_fees, row.late_fees, row.payments) == (
+        Decimal("2.99"),
+        Decimal("0"),
+        Decimal("1.50"),
+    )
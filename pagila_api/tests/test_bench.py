@@ -0,0 +1,94 @@
+import random
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+from sqlmodel import SQLModel
+
+from bench.report import compare, percentile
+from bench.scenarios import KNOWN_TITLES, select_scenarios
+from core.db import get_engine
+from core.pagila_dump import decode_field, iter_copy_blocks, load_dump, parent_table
+from domain.models import Category, Film
+from tests.conftest import seed_base_data
+
+DUMP = """\
+--
+-- Data for Name: category; Type: TABLE DATA; Schema: public; Owner: postgres
+--
+
+COPY public.category (category_id, name, last_update) FROM stdin;
+1\tAction\t2022-02-15 09:46:27+00
+2\tSci\\\\Fi\\tTab\t2022-02-15 09:46:27+00
+\\.
+
+COPY public.film (film_id, title, description, release_year, language_id, rental_duration, \
+rental_rate, length, replacement_cost, rating, fulltext) FROM stdin;
+7\tALIEN CENTER\t\\N\t2006\t1\t5\t2.99\t46\t10.99\tNC-17\t'alien':1
+\\.
+
+COPY public.payment_p2022_01 (payment_id, amount) FROM stdin;
+\\.
+"""
+
+
+def test_iter_copy_blocks_decodes_text_format():
+    blocks = list(iter_copy_blocks(DUMP.splitlines(keepends=True)))
+
+    assert [block.table for block in blocks] == ["category", "film", "payment_p2022_01"]
+    assert blocks[0].columns == ["category_id", "name", "last_update"]
+    assert blocks[0].rows[1][1] == "Sci\\Fi\tTab"
+    assert blocks[1].rows[0][2] is None
+    assert blocks[2].rows == []
+    assert decode_field("a\\nb\\101\\x42") == "a\nbAB"
+    assert parent_table("payment_p2022_01") == "payment"
+    assert parent_table("payment_p_default") == "payment"
+
+
+@pytest.mark.asyncio
+async def test_load_dump_coerces_types_and_skips_unknown_columns(db_session):
+    blocks = iter_copy_blocks(DUMP.splitlines(keepends=True))
+
+    loaded = await load_dump(get_engine(), SQLModel.metadata.sorted_tables, blocks)
+
+    assert loaded == {"category": 2, "film": 1}
+    film = (await db_session.execute(select(Film))).scalar_one()
+    assert (film.film_id, film.description, film.rental_rate) == (7, None, Decimal("2.99"))
+    assert film.streaming_available is False
+    names = (await db_session.execute(select(Category.name).order_by(Category.category_id))).all()
+    assert [name for (name,) in names] == ["Action", "Sci\\Fi\tTab"]
+
+
+def test_compare_flags_only_regressions_beyond_tolerance():
+    baseline = {"scenarios": {"films": {"p50_ms": 10.0, "p99_ms": 40.0, "rps": 100.0}}}
+    current = {
+        "scenarios": {
+            "films": {"p50_ms": 11.0, "p99_ms": 60.0, "rps": 70.0},
+            "new_scenario": {"p50_ms": 1.0},
+        }
+    }
+
+    regressions = compare(current, baseline, tolerance=0.2)
+
+    assert [(r.metric, r.current) for r in regressions] == [("p99_ms", 60.0), ("rps", 70.0)]
+    assert percentile([5, 1, 3, 2, 4], 0.5) == 3
+
+
+@pytest.mark.asyncio
+async def test_handoff_search_scenario_is_answered_by_search_agent(client, db_session):
+    await seed_base_data(db_session)
+    db_session.add_all(
+        Film(title=title, language_id=1, rental_duration=3, rental_rate=Decimal("0.99"))
+        for title in KNOWN_TITLES
+    )
+    await db_session.commit()
+    (scenario,) = select_scenarios(["handoff_search"])
+    assert not scenario.uses_llm
+
+    rng = random.Random(0)
+    for n in range(8):
+        spec = scenario.build(rng, n, "token")
+        response = await client.post(spec.url, json=spec.json)
+
+        assert response.status_code == 200
+        assert response.json()["agent"] == "SearchAgent"
@@ -1,5 +1,14 @@
+import asyncio
+from datetime import datetime, timezone
+from decimal import Decimal
+
 import pytest
+from sqlalchemy import select
 
+from domain.corental import CoRentalMatrix
+from domain.loaders import DataLoader
+from domain.models import Actor, Film, FilmActor, Inventory, Language, Rental
+from domain.similarity import FilmSimilarityIndex
 from tests.conftest import seed_base_data
 
 
@@ -7,7 +16,9 @@ from tests.conftest import seed_base_data
 async def test_list_films_returns_paginated_results(client, db_session):
     await seed_base_data(db_session)
 
-    response = await client.get("/v1/films", params={"category": "Horror", "page": 1, "page_size": 10})
+    response = await client.get(
+        "/v1/films", params={"category": "Horror", "page": 1, "page_size": 10}
+    )
 
     assert response.status_code == 200
     payload = response.json()
@@ -19,3 +30,205 @@ async def test_list_films_returns_paginated_results(client, db_session):
     assert film["title"] == "Alien"
     assert film["category"] == "Horror"
     assert film["streaming_available"] is True
+
+
+def test_similarity_index_ranks_by_description():
+    index = FilmSimilarityIndex.build(
+        [
+            (1, "Academy Dinosaur", "A Epic Drama of a Feminist And a Mad Scientist"),
+            (
+                2,
+                "Ace Goldfinger",
+                "A Astounding Epistle of a Database Administrator And a Explorer",
+            ),
+            (3, "Adaptation Holes", "A Astounding Reflection of a Lumberjack And a Car"),
+            (4, "Affair Prejudice", "A Fanciful Documentary of a Dentist And a Crocodile"),
+        ]
+    )
+
+    [matches] = index.search(["dentist crocodile"], k=2)
+    assert [film_id for film_id, _ in matches] == [4]
+
+    [neighbours] = index.similar_to([2], k=3)
+    assert neighbours[0][0] == 3
+    assert all(film_id != 2 for film_id, _ in neighbours)
+
+
+@pytest.mark.asyncio
+async def test_similar_films_by_query_and_film_id(client, db_session):
+    seeded = await seed_base_data(db_session)
+
+    response = await client.get(
+        "/v1/films/similar",
+        params=[("q", "extraterrestrial crew"), ("film_id", seeded["film_id"]), ("k", 3)],
+    )
+
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload[0]["query"] == "extraterrestrial crew"
+    assert payload[0]["items"][0]["title"] == "Alien"
+    assert payload[1] == {"query": None, "film_id": seeded["film_id"], "items": []}
+
+    assert (await client.get("/v1/films/similar")).status_code == 422
+    assert (await client.get("/v1/films/similar", params={"film_id": 999})).status_code == 404
+
+
+async def _seed_relations(session, seeded) -> int:
+    now = datetime.now(timezone.utc)
+    session.add(Language(language_id=1, name="English             "))
+    sequel = Film(
+        title="Aliens",
+        language_id=1,
+        rental_duration=5,
+        rental_rate=Decimal("0.99"),
+        streaming_available=False,
+    )
+    weaver = Actor(first_name="Sigourney", last_name="Weaver")
+    session.add_all([sequel, weaver])
+    await session.flush()
+    session.add_all(
+        [
+            FilmActor(actor_id=weaver.actor_id, film_id=seeded["film_id"]),
+            FilmActor(actor_id=weaver.actor_id, film_id=sequel.film_id),
+            Inventory(film_id=seeded["film_id"], store_id=2, last_update=now),
+            Rental(
+                rental_date=now,
+                inventory_id=seeded["inventory_id"],
+                customer_id=seeded["customer_id"],
+                staff_id=1,
+                last_update=now,
+            ),
+        ]
+    )
+    await session.commit()
+    return sequel.film_id
+
+
+@pytest.mark.asyncio
+async def test_film_detail_expands_relations(client, db_session):
+    seeded = await seed_base_data(db_session)
+    await _seed_relations(db_session, seeded)
+
+    response = await client.get(f"/v1/films/{seeded['film_id']}")
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["category"] == "Horror"
+    assert "actors" not in payload
+
+    response = await client.get(
+        f"/v1/films/{seeded['film_id']}",
+        params={"expand": "actors,categories,inventory,stock,language"},
+    )
+    payload = response.json()
+    assert payload["actors"] == [{"actor_id": 1, "first_name": "Sigourney", "last_name": "Weaver"}]
+    assert payload["categories"] == ["Horror"]
+    assert [item["in_stock"] for item in payload["inventory"]] == [False, True]
+    assert payload["stock"] == [
+        {"store_id": 1, "total": 1, "available": 0},
+        {"store_id": 2, "total": 1, "available": 1},
+    ]
+    assert payload["language"] == "English"
+
+    assert (await client.get("/v1/films/999")).status_code == 404
+    response = await client.get(f"/v1/films/{seeded['film_id']}", params={"expand": "reviews"})
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_list_expansion_costs_one_query_per_relation(client, db_session):
+    seeded = await seed_base_data(db_session)
+    await _seed_relations(db_session, seeded)
+
+    response = await client.get("/v1/films", params={"expand": "actors,stock"})
+
+    items = response.json()["items"]
+    assert [item["title"] for item in items] == ["Alien", "Aliens"]
+    assert [len(item["actors"]) for item in items] == [1, 1]
+    assert items[1]["stock"] == []
+    # count + page + one query per expanded relation, however many films are listed
+    assert 'desc="4 queries"' in response.headers["server-timing"]
+
+
+@pytest.mark.asyncio
+async def test_data_loader_batches_and_caches_keys():
+    calls: list[list[int]] = []
+
+    async def batch(keys: list[int]) -> dict[int, int]:
+        calls.append(keys)
+        return {key: key * 10 for key in keys if key != 3}
+
+    loader: DataLoader[int, int | None] = DataLoader(batch, lambda: None)
+
+    assert await asyncio.gather(loader.load(1), loader.load(2), loader.load(1)) == [10, 20, 10]
+    assert await loader.load_many([2, 3]) == [20, None]
+    assert calls == [[1, 2], [3]]
+
+
+def test_corental_matrix_counts_distinct_customers_per_pair():
+    films = [(1, "Alien"), (2, "Aliens"), (3, "Brazil"), (4, "Casablanca")]
+    rentals = [(10, 1), (10, 2), (10, 2), (11, 1), (11, 2), (11, 3), (12, 3), (12, 1), (13, 4)]
+
+    matrix = CoRentalMatrix.build(films, rentals)
+
+    assert matrix.also_rented(1, 5) == [(2, 2), (3, 2)]
+    assert matrix.also_rented(2, 1) == [(1, 2)]
+    assert matrix.also_rented(3, 5) == [(1, 2), (2, 1)]
+    assert matrix.also_rented(4, 5) == []
+    assert matrix.pairs == 6
+    assert CoRentalMatrix.build(films, []).also_rented(1, 3) == []
+
+
+@pytest.mark.asyncio
+async def test_also_rented_endpoint(client, db_session):
+    seeded = await seed_base_data(db_session)
+    sequel_id = await _seed_relations(db_session, seeded)
+    now = datetime.now(timezone.utc)
+    db_session.add(Inventory(film_id=sequel_id, store_id=1, last_update=now))
+    await db_session.flush()
+    sequel_copy = (
+        await db_session.execute(
+            select(Inventory.inventory_id).where(Inventory.film_id == sequel_id)
+        )
+    ).scalar_one()
+    db_session.add(
+        Rental(
+            rental_date=now,
+            inventory_id=sequel_copy,
+            customer_id=seeded["customer_id"],
+            staff_id=1,
+            last_update=now,
+        )
+    )
+    await db_session.commit()
+
+    response = await client.get(f"/v1/films/{seeded['film_id']}/also-rented", params={"k": 3})
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "film_id": seeded["film_id"],
+        "items": [{"film_id": sequel_id, "title": "Aliens", "customers": 1}],
+    }
+    assert (await client.get("/v1/films/999/also-rented")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_find_by_titles_picks_the_lowest_id_per_fragment_in_sql(db_session):
+    from domain.repositories import FilmRepository
+
+    data = await seed_base_data(db_session)
+    titles = ["Jaws", "Aliens", "Jaws 2", "Paws"]
+    db_session.add_all(Film(title=title, language_id=1, rental_duration=3) for title in titles)
+    await db_session.commit()
+    repo = FilmRepository(db_session)
+
+    matches = await repo.find_by_titles(["aws", "ALIEN", "jaws 2", "Nope", "aws"])
+
+    assert {fragment: film.title for fragment, film in matches.items()} == {
+        "aws": "Jaws",
+        "ALIEN": "Alien",
+        "jaws 2": "Jaws 2",
+    }
+    assert matches["ALIEN"].category == data["category"]
+    single = await repo.find_by_title(" aliens ")
+    assert single is not None and single.title == "Aliens"
+    assert await repo.find_by_title("Nope") is None
@@ -0,0 +1,50 @@
+import httpx
+import pytest
+
+from core import http_client
+from core.config import get_settings
+
+
+def _settings(**overrides):
+    return get_settings().model_copy(update=overrides)
+
+
+@pytest.mark.asyncio
+async def test_http_client_is_shared_and_recreated_after_close():
+    settings = _settings(openai_max_connections=7, openai_connect_timeout_seconds=1.5)
+
+    client = http_client.get_http_client(settings)
+    try:
+        assert http_client.get_http_client(settings) is client
+        assert client.timeout.connect == 1.5
+    finally:
+        await http_client.close_http_client()
+
+    assert client.is_closed
+    replacement = http_client.get_http_client(settings)
+    assert replacement is not client
+    await http_client.close_http_client()
+
+
+@pytest.mark.asyncio
+async def test_warm_up_opens_configured_connections(monkeypatch):
+    seen: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        return httpx.Response(404)
+
+    monkeypatch.setattr(
+        http_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+    settings = _settings(
+        llm_backend="openai", openai_warmup_connections=3, openai_base_url="https://llm.test/v1"
+    )
+
+    await http_client.warm_up_http_client(settings)
+    await http_client.warm_up_http_client(settings.model_copy(update={"llm_backend": "fake"}))
+    await http_client.close_http_client()
+
+    assert [(request.method, str(request.url)) for request in seen] == [
+        ("HEAD", "https://llm.test/v1")
+    ] * 3
@@ -0,0 +1,41 @@
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+# Cumulative ``-X importtime`` budget for ``import app.main``; override on slow CI runners.
+IMPORT_BUDGET_MS = float(os.environ.get("IMPORT_TIME_BUDGET_MS", "2000"))
+HEAVY_MODULES = ("semantic_kernel", "openai")
+
+_IMPORT_LINE = re.compile(r"^import time:\s*\d+\s*\|\s*(\d+)\s*\|\s*(\S+)\s*$")
+
+
+def _import_app() -> subprocess.CompletedProcess:
+    probe = (
+        "import sys, app.main; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def test_app_import_does_not_load_ai_stack_and_stays_within_budget():
+    result = _import_app()
+
+    assert result.stdout.strip() == "", f"imported at startup: {result.stdout.strip()}"
+
+    cumulative = {
+        match.group(2): int(match.group(1)) / 1000
+        for match in map(_IMPORT_LINE.match, result.stderr.splitlines())
+        if match
+    }
+    assert (
+        cumulative["app.main"] <= IMPORT_BUDGET_MS
+    ), f"import app.main took {cumulative['app.main']:.0f}ms (budget {IMPORT_BUDGET_MS:.0f}ms)"
@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+
+from app.main import app
+from core.llm_governor import (
+    CircuitBreaker,
+    CircuitOpenError,
+    DeadlineExceededError,
+    LLMGovernor,
+    QueueFullError,
+)
+from core.metrics import MetricsRegistry
+
+
+def _governor(breaker=None, **overrides) -> LLMGovernor:
+    options = dict(global_limit=1, max_queue=0, queue_timeout=0.05, call_timeout=1.0)
+    options.update(overrides)
+    return LLMGovernor(breaker=breaker or CircuitBreaker(3, 30), **options)
+
+
+@pytest.mark.asyncio
+async def test_governor_rejects_when_queue_is_full():
+    governor = _governor()
+
+    async with governor.slot("ask") as permit:
+        assert permit.queue_wait >= 0
+        with pytest.raises(QueueFullError):
+            governor.check("ask")
+        assert governor.snapshot()["routes"]["ask"]["in_flight"] == 1
+
+    governor.check("ask")
+
+
+@pytest.mark.asyncio
+async def test_governor_times_out_waiting_in_queue():
+    governor = _governor(max_queue=5, route_limits={"summary": 1})
+
+    async with governor.slot("summary"):
+        with pytest.raises(QueueFullError) as excinfo:
+            async with governor.slot("summary"):
+                pass
+
+    assert excinfo.value.retry_after == pytest.approx(0.05)
+    assert governor.snapshot()["queued"] == 0
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_opens_and_recovers():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=lambda: now[0])
+    governor = _governor(breaker, global_limit=4)
+
+    async def fail():
+        raise RuntimeError("upstream down")
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            await governor.call("summary", fail)
+
+    with pytest.raises(CircuitOpenError) as excinfo:
+        await governor.call("summary", fail)
+    assert excinfo.value.retry_after == pytest.approx(10)
+    assert governor.snapshot()["circuit"]["state"] == "open"
+
+    now[0] = 11.0
+
+    async def succeed():
+        return "ok"
+
+    assert await governor.call("summary", succeed) == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_governor_stream_enforces_deadline():
+    governor = _governor(call_timeout=0.05)
+
+    async def slow():
+        yield "first"
+        await asyncio.sleep(1)
+        yield "never"
+
+    received = []
+    with pytest.raises(DeadlineExceededError):
+        async for piece in governor.stream("ask", slow):
+            received.append(piece)
+
+    assert received == ["first"]
+
+
+@pytest.mark.asyncio
+async def test_ai_summary_maps_open_circuit_to_retry_after(client, db_session):
+    from api.v1 import ai_routes
+
+    class UnavailableAIService:
+        async def summary(self, film_id: int):
+            raise CircuitOpenError("LLM upstream is unavailable.", retry_after=11.2)
+
+    app.dependency_overrides[ai_routes.get_ai_service] = UnavailableAIService
+
+    response = await client.post("/v1/ai/summary", json={"film_id": 1})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "12"
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = MetricsRegistry().histogram("latency_seconds", "", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, route="ask")
+
+    [(labels, sample)] = list(histogram.samples())
+    assert labels == ("ask",)
+    assert sample.buckets == [(0.1, 2), (1.0, 3), (float("inf"), 4)]
+    assert sample.count == 4
+    assert sample.sum == pytest.approx(3.65)
@@ -0,0 +1,86 @@
+import pytest
+
+from app.load_data import load_sqlite
+from core.pagila_dump import sequence_resets, split_schema, split_statements, statement_table
+
+SCHEMA = """\
+SET statement_timeout = 0;
+SELECT pg_catalog.set_config('search_path', '', false);
+
+CREATE FUNCTION public.last_updated() RETURNS trigger
+    LANGUAGE plpgsql
+    AS $$
+BEGIN
+    NEW.last_update = CURRENT_TIMESTAMP; -- keep ';' inside the body
+    RETURN NEW;
+END $$;
+
+ALTER FUNCTION public.last_updated() OWNER TO postgres;
+
+CREATE TABLE public.category (
+    category_id integer NOT NULL,
+    name text DEFAULT 'a;b' NOT NULL
+);
+
+CREATE MATERIALIZED VIEW public.category_names AS
+ SELECT name FROM public.category
+  WITH NO DATA;
+
+ALTER TABLE ONLY public.category
+    ADD CONSTRAINT category_pkey PRIMARY KEY (category_id);
+
+CREATE INDEX idx_category_name ON public.category USING btree (name);
+
+CREATE TRIGGER last_updated BEFORE UPDATE ON public.category
+    FOR EACH ROW EXECUTE FUNCTION public.last_updated();
+"""
+
+
+def test_split_schema_separates_pre_and_post_data():
+    schema = split_schema(SCHEMA)
+
+    assert len(schema.session) == 2
+    assert [statement.split()[1] for statement in schema.pre_data] == [
+        "FUNCTION",
+        "TABLE",
+        "MATERIALIZED",
+    ]
+    assert "RETURN NEW;" in schema.pre_data[0]
+    assert "'a;b'" in schema.pre_data[1]
+    assert [statement.split()[1] for statement in schema.post_data] == [
+        "TABLE",
+        "INDEX",
+        "TRIGGER",
+    ]
+    assert {statement_table(statement) for statement in schema.post_data} == {"public.category"}
+    assert schema.materialized_views == ["public.category_names"]
+    assert len(split_schema(SCHEMA, keep_owner=True).pre_data) == 4
+
+
+def test_split_statements_and_sequence_resets():
+    assert split_statements("SELECT 1; -- trailing; comment\nSELECT $x$;$x$") == [
+        "SELECT 1",
+        "SELECT $x$;$x$",
+    ]
+    data = "COPY public.film (film_id) FROM stdin;\n1\n\\.\n\n" + (
+        "SELECT pg_catalog.setval('public.film_film_id_seq', 1000, true);\n"
+    )
+    assert sequence_resets(data) == [
+        "SELECT pg_catalog.setval('public.film_film_id_seq', 1000, true)"
+    ]
+
+
+@pytest.mark.asyncio
+async def test_load_sqlite_creates_tables_and_loads_rows(tmp_path):
+    dump = tmp_path / "data.sql"
+    dump.write_text(
+        "COPY public.category (category_id, name, last_update) FROM stdin;\n"
+        "1\tAction\t2022-02-15 09:46:27+00\n"
+        "2\tAnimation\t2022-02-15 09:46:27+00\n"
+        "\\.\n",
+        encoding="utf-8",
+    )
+
+    loaded = await load_sqlite(f"sqlite+aiosqlite:///{tmp_path / 'pagila.db'}", data_path=dump)
+
+    assert loaded == {"category": 2}
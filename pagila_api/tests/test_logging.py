@@ -0,0 +1,80 @@
+import io
+import json
+import logging
+import threading
+
+import structlog
+
+from core.config import get_settings
+from core.logging import (
+    EventSampler,
+    QueueLogWriter,
+    configure_logging,
+    get_logger,
+    shutdown_logging,
+)
+
+
+class _BlockingStream(io.StringIO):
+    """Holds the writer thread inside its first write until released."""
+
+    def __init__(self):
+        super().__init__()
+        self.writing = threading.Event()
+        self.release = threading.Event()
+
+    def write(self, text):
+        self.writing.set()
+        self.release.wait(5)
+        return super().write(text)
+
+
+def test_queue_writer_writes_in_background_and_reports_drops():
+    stream = _BlockingStream()
+    writer = QueueLogWriter([structlog.processors.JSONRenderer()], stream=stream, max_size=2)
+    logger = structlog.wrap_logger(None, processors=[writer])
+
+    logger.info("request", index=0)
+    assert stream.writing.wait(5)
+    for index in range(1, 11):
+        logger.info("request", index=index)
+    stream.release.set()
+    writer.close()
+
+    events = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [event.get("index") for event in events if event["event"] == "request"] == [0, 1, 2]
+    assert {"event": "log_events_dropped", "count": 8} in events
+
+
+def test_loggers_bound_before_shutdown_still_write(capsys):
+    previous = structlog.get_config()
+    root_handlers, root_level = logging.root.handlers[:], logging.root.level
+    settings = get_settings().model_copy(update={"log_async": True, "log_json": True})
+    configure_logging(settings)
+    try:
+        logger = get_logger(worker="test")
+        logger.info("before_shutdown")
+        shutdown_logging()
+        logger.info("after_shutdown")
+    finally:
+        shutdown_logging()
+        structlog.configure(**previous)
+        logging.root.handlers[:], logging.root.level = root_handlers, root_level
+
+    events = [json.loads(line)["message"] for line in capsys.readouterr().out.splitlines()]
+    assert events == ["before_shutdown", "after_shutdown"]
+
+
+def test_event_sampler_keeps_warnings_and_samples_info():
+    values = iter([0.05, 0.5])
+    sampler = EventSampler({"llm_call": 0.1}, rng=lambda: next(values))
+    logger = structlog.wrap_logger(
+        structlog.ReturnLogger(),
+        processors=[sampler, lambda logger, method, event_dict: event_dict["event"]],
+        wrapper_class=structlog.BoundLogger,
+    )
+
+    assert logger.info("llm_call") == "llm_call"
+    assert logger.info("llm_call") is None
+    assert logger.warning("llm_call") == "llm_call"
+    assert logger.info("other") == "other"
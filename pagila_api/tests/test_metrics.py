@@ -0,0 +1,108 @@
+import os
+import time
+
+import pytest
+
+from core.metrics import (
+    MetricsRegistry,
+    merge_snapshots,
+    read_snapshots,
+    render_prometheus,
+    write_snapshot,
+)
+from tests.conftest import seed_base_data
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_reports_route_templates(client, db_session):
+    await seed_base_data(db_session)
+
+    assert (await client.get("/v1/films", params={"page": 1})).status_code == 200
+    assert (await client.get("/v1/ai/ask", params={"question": "hi"})).status_code == 200
+    response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'http_requests_total{method="GET",route="/v1/films",status="200"}' in body
+    assert (
+        'http_request_duration_seconds_bucket{method="GET",route="/v1/films",'
+        'status="200",le="+Inf"}' in body
+    )
+    assert "# TYPE db_pool_checkedout gauge" in body
+    assert 'http_stream_duration_seconds_count{route="/v1/ai/ask",status="200"}' in body
+    assert 'http_streams_open{route="/v1/ai/ask"} 0' in body
+    assert "# TYPE http_requests_in_flight gauge" in body
+
+
+def test_snapshots_from_several_workers_are_merged(tmp_path):
+    for pid, (requests, state) in {101: (2, 0), 102: (3, 2)}.items():
+        registry = MetricsRegistry()
+        registry.counter("jobs_total", "Jobs.", ("kind",)).inc(requests, kind="a")
+        registry.gauge("breaker_state", "State.", aggregate="max").set(state)
+        registry.histogram("job_seconds", "Latency.", buckets=(1.0,)).observe(0.5 * pid)
+        write_snapshot(tmp_path, registry, pid=pid)
+
+    text = render_prometheus(merge_snapshots(read_snapshots(tmp_path)))
+
+    assert 'jobs_total{kind="a"} 5' in text
+    assert "breaker_state 2" in text
+    assert 'job_seconds_bucket{le="1"} 0' in text
+    assert 'job_seconds_bucket{le="+Inf"} 2' in text
+    assert "job_seconds_sum 101.5" in text
+
+
+
+def test_snapshots_of_dead_workers_are_dropped(tmp_path):
+    for pid in (101, 102):
+        registry = MetricsRegistry()
+        registry.gauge("http_requests_in_flight", "In flight.").set(1)
+        write_snapshot(tmp_path, registry, pid=pid)
+    dead = tmp_path / "102.json"
+    os.utime(dead, (time.time() - 60, time.time() - 60))
+
+    text = render_prometheus(merge_snapshots(read_snapshots(tmp_path, max_age=15)))
+
+    assert "http_requests_in_flight 1" in text
+    assert not dead.exists()
+
+
+@pytest.mark.asyncio
+async def test_server_timing_reports_queries_per_request(client, db_session):
+    await seed_base_data(db_session)
+
+    response = await client.get("/v1/films")
+
+    timing = response.headers["server-timing"]
+    assert timing.startswith("db;dur=")
+    assert 'desc="2 queries"' in timing
+
+
+@pytest.mark.asyncio
+async def test_slow_queries_are_logged_with_parameters_and_plan():
+    from sqlalchemy import text
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from structlog.testing import capture_logs
+
+    from core.config import get_settings
+    from core.query_stats import QueryStats, _current, instrument_engine
+
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    instrument_engine(engine, get_settings().model_copy(update={"sql_slow_query_ms": 1e-6}))
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        with capture_logs() as logs:
+            async with engine.connect() as conn:
+                await conn.execute(text("CREATE TABLE film (film_id INTEGER PRIMARY KEY)"))
+                await conn.execute(text("SELECT * FROM film WHERE film_id = :id"), {"id": 7})
+    finally:
+        _current.reset(token)
+        await engine.dispose()
+
+    assert stats.count == 2
+    assert stats.slow == 2
+    select_log = next(log for log in logs if log["statement"].startswith("SELECT"))
+    assert select_log["event"] == "slow_query"
+    assert select_log["parameters"] == (7,)
+    assert any("film" in line for line in select_log["plan"])
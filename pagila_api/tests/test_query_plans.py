@@ -0,0 +1,131 @@
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.load_data import load_sqlite
+from bench.plans import (
+    DEFAULT_BASELINE_PATH,
+    LARGE_TABLE_ROWS,
+    collect_plans,
+    compare_plans,
+    explain_call,
+)
+from bench.report import read_results
+from domain.models import FilmListParams, Rental
+from domain.repositories import FilmRepository, InventoryRepository
+from tests.conftest import seed_base_data
+
+
+async def _plans(session, call: Callable[[], Awaitable[object]]) -> list[str]:
+    """``EXPLAIN QUERY PLAN`` of every statement ``call`` runs, one string per statement."""
+    return ["\n".join(plan.plan) for plan in await explain_call(session, call, {})]
+
+
+async def _seed(session) -> dict[str, int | str]:
+    data = await seed_base_data(session)
+    now = datetime.now(timezone.utc)
+    session.add(
+        Rental(
+            rental_date=now,
+            inventory_id=data["inventory_id"],
+            customer_id=data["customer_id"],
+            staff_id=1,
+            last_update=now,
+        )
+    )
+    await session.commit()
+    return data
+
+
+@pytest.mark.asyncio
+async def test_category_filter_uses_category_indexes(db_session):
+    await _seed(db_session)
+    repo = FilmRepository(db_session)
+
+    plans = await _plans(db_session, lambda: repo.paginate(FilmListParams(category="horror")))
+
+    assert len(plans) == 2  # count and page
+    for plan in plans:
+        assert "USING INDEX idx_category_lower_name" in plan
+        assert "USING COVERING INDEX idx_film_category_category_id_film_id" in plan
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("method", ["inventory_by_film", "stock_by_film"])
+async def test_film_inventory_uses_film_and_open_rental_indexes(db_session, method):
+    data = await _seed(db_session)
+    repo = FilmRepository(db_session)
+
+    (plan,) = await _plans(db_session, lambda: getattr(repo, method)([data["film_id"]]))
+
+    assert "idx_inventory_film_id_store_id (film_id=?)" in plan
+    assert "idx_rental_open_inventory_id" in plan
+    assert "SCAN rental\n" not in f"{plan}\n"
+
+
+@pytest.mark.asyncio
+async def test_stock_counts_for_films_uses_film_index(db_session):
+    data = await _seed(db_session)
+    repo = InventoryRepository(db_session)
+
+    (plan,) = await _plans(db_session, lambda: repo.stock_counts(1, [data["film_id"]]))
+
+    assert "idx_inventory_film_id_store_id" in plan
+    assert "idx_rental_open_inventory_id" in plan
+
+
+def test_compare_plans_flags_new_scans_and_cost_growth():
+    def case(seq_scans, cost):
+        return {"statements": [], "seq_scans": seq_scans, "cost": cost}
+
+    baseline = {
+        "dialects": {
+            "postgresql": {
+                "cases": {
+                    "film.get_film": case([], 8.0),
+                    "film.catalog_titles": case(["film"], 64.0),
+                    "rental.get_rental": case([], 8.0),
+                }
+            }
+        }
+    }
+    current = {
+        "dialects": {
+            "postgresql": {
+                "cases": {
+                    "film.get_film": case(["film"], 9.0),
+                    "film.catalog_titles": case(["film"], 70.0),
+                    "rental.get_rental": case([], 12.0),
+                    "rental.new_query": case(["rental"], 500.0),
+                }
+            }
+        }
+    }
+
+    regressions, unbaselined = compare_plans(current, baseline, tolerance=0.25)
+
+    assert [str(regression) for regression in regressions] == [
+        "postgresql:film.get_film: new sequential scan on film",
+        "postgresql:rental.get_rental: cost 8.0 -> 12.0",
+    ]
+    assert unbaselined == ["postgresql:rental.new_query"]
+
+
+@pytest.mark.asyncio
+async def test_repository_plans_match_baseline_on_pagila(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'pagila.db'}"
+    await load_sqlite(url)
+    engine = create_async_engine(url)
+    try:
+        results = {
+            "dialects": {"sqlite": await collect_plans(engine, large_table_rows=LARGE_TABLE_ROWS)}
+        }
+    finally:
+        await engine.dispose()
+
+    regressions, unbaselined = compare_plans(results, read_results(DEFAULT_BASELINE_PATH), 0.25)
+
+    assert [str(regression) for regression in regressions] == []
+    assert unbaselined == []
@@ -0,0 +1,62 @@
+import pytest
+from sqlalchemy import event
+
+from app import serve
+from app.preload import preload
+from core.config import get_settings
+from core.db import get_engine
+from tests.conftest import seed_base_data
+
+
+def test_uvicorn_options_follow_settings(monkeypatch):
+    monkeypatch.setattr(serve, "_available", lambda module: module == "uvloop")
+    settings = get_settings().model_copy(
+        update={"web_concurrency": 4, "sse_drain_seconds": 40, "shutdown_timeout_seconds": 30}
+    )
+
+    options = serve.uvicorn_options(settings)
+
+    assert options["workers"] == 4
+    assert options["loop"] == "uvloop"
+    assert options["http"] == "h11"
+    assert options["timeout_graceful_shutdown"] == 45
+
+
+
+@pytest.mark.parametrize(
+    ("environment", "argv", "expected"),
+    [(None, [], True), ("false", [], False), ("true", ["--no-preload"], False)],
+)
+def test_serve_preloads_unless_disabled(monkeypatch, environment, argv, expected):
+    if environment is None:
+        monkeypatch.delenv("PRELOAD", raising=False)
+    else:
+        monkeypatch.setenv("PRELOAD", environment)
+    monkeypatch.setattr(serve, "configure_logging", lambda settings: None)
+    started = []
+    monkeypatch.setattr(serve.uvicorn, "run", lambda app, **options: started.append(app))
+    try:
+        serve.main(argv)
+        assert get_settings().preload is expected
+    finally:
+        get_settings.cache_clear()
+    assert started == [serve.APP]
+
+
+@pytest.mark.asyncio
+async def test_preload_runs_catalog_queries_without_ai(db_session):
+    await seed_base_data(db_session)
+    statements: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = get_engine()
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        await preload(get_settings().model_copy(update={"enable_ai": False}))
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+    assert any(statement.startswith("SELECT 1") for statement in statements)
+    assert sum("FROM film" in statement for statement in statements) >= 4
@@ -0,0 +1,195 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import SQLModel
+
+from app.main import app
+from core.config import get_settings
+from core.db import ShardSessions, dispose_shards, get_shard_engines, init_shards
+from domain.models import Customer, Film, Inventory, Rental, Store
+from domain.sharding import ShardRouter, forget_customer_stores
+from tests.conftest import seed_base_data
+
+ADMIN = {"Authorization": "Bearer dvd_admin"}
+
+
+@pytest_asyncio.fixture
+async def shard_sessions(tmp_path, db_session):
+    urls = {store_id: f"sqlite+aiosqlite:///{tmp_path}/store{store_id}.db" for store_id in (1, 2)}
+    init_shards(get_settings().model_copy(update={"shard_database_urls": urls}))
+    engines = get_shard_engines()
+    for engine in engines.values():
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+    sessions = {
+        store_id: AsyncSession(engine, expire_on_commit=False)
+        for store_id, engine in engines.items()
+    }
+    yield sessions
+    for session in sessions.values():
+        await session.close()
+    await dispose_shards()
+    forget_customer_stores()
+
+
+async def _seed_shards(shard_sessions) -> None:
+    now = datetime.now(timezone.utc)
+    await seed_base_data(shard_sessions[1])
+    second = shard_sessions[2]
+    second.add_all(
+        [
+            # Reference data is replicated to every shard.
+            Film(
+                film_id=1,
+                title="Alien",
+                language_id=1,
+                rental_duration=3,
+                rental_rate=Decimal("2.99"),
+                streaming_available=True,
+            ),
+            Store(store_id=1, manager_staff_id=1, address_id=1),
+            Store(store_id=2, manager_staff_id=2, address_id=2),
+            Customer(
+                customer_id=2,
+                store_id=2,
+                first_name="Dwayne",
+                last_name="Hicks",
+                create_date=now,
+            ),
+            Inventory(inventory_id=2, film_id=1, store_id=2, last_update=now),
+        ]
+    )
+    await second.commit()
+
+
+async def _rentals(session) -> int:
+    return (await session.execute(select(func.count()).select_from(Rental))).scalar_one()
+
+
+@pytest.mark.asyncio
+async def test_customer_writes_and_reads_route_to_the_owning_shard(
+    client, db_session, shard_sessions
+):
+    await _seed_shards(shard_sessions)
+
+    created = await client.post(
+        "/v1/customers/2/rentals", json={"inventory_id": 2, "staff_id": 2}, headers=ADMIN
+    )
+    assert created.status_code == 201
+    assert await _rentals(shard_sessions[2]) == 1
+    assert await _rentals(shard_sessions[1]) == 0
+    assert await _rentals(db_session) == 0
+
+    # Copies held by another store's shard cannot be rented here.
+    other_store = await client.post(
+        "/v1/customers/1/rentals", json={"inventory_id": 2, "staff_id": 1}, headers=ADMIN
+    )
+    assert other_store.status_code == 404
+
+    response = await client.get(
+        "/v1/customers/balances", params={"customer_id": [2, 999, 1]}, headers=ADMIN
+    )
+    payload = response.json()
+    assert [(item["customer_id"], item["rent_fees"]) for item in payload["items"]] == [
+        (2, 2.99),
+        (1, 0.0),
+    ]
+    assert payload["missing"] == [999]
+
+    returned = await client.post(f"/v1/rentals/{created.json()['rental_id']}/return", headers=ADMIN)
+    assert returned.status_code == 200
+
+    availability = await client.post("/v1/stores/2/availability", json={"film_ids": [1]})
+    assert availability.json()["items"] == [
+        {"film_id": 1, "total": 1, "available": 1, "in_stock": True}
+    ]
+    missing_store = await client.post("/v1/stores/3/availability", json={"film_ids": [1]})
+    assert missing_store.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_rental_ids_present_in_two_shards_are_refused(client, db_session, shard_sessions):
+    await _seed_shards(shard_sessions)
+    for customer_id, inventory_id in ((1, 1), (2, 2)):
+        response = await client.post(
+            f"/v1/customers/{customer_id}/rentals",
+            json={"inventory_id": inventory_id, "staff_id": 1},
+            headers=ADMIN,
+        )
+        assert response.json()["rental_id"] == 1
+
+    response = await client.post("/v1/rentals/1/return", headers=ADMIN)
+    assert response.status_code == 409
+
+
+@pytest.mark.asyncio
+async def test_customer_groups_ask_each_shard_once(db_session, shard_sessions):
+    await _seed_shards(shard_sessions)
+    statements: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engines = get_shard_engines()
+    for engine in engines.values():
+        event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        async with ShardSessions() as shards:
+            router = ShardRouter(shards)
+            groups = await router.customer_groups([2, 999, 1])
+            assert len(statements) == len(engines)
+            assert [ids for _, ids in groups] == [[2], [999, 1]]
+
+            # Known customers are remembered; only the unknown one is asked for again.
+            statements.clear()
+            await router.customer_groups([1, 2, 999])
+            assert len(statements) == len(engines)
+            statements.clear()
+            await router.customer_groups([1, 2])
+            assert statements == []
+    finally:
+        for engine in engines.values():
+            event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+
+@pytest.mark.asyncio
+async def test_inventory_reads_cover_every_shard(client, db_session, shard_sessions):
+    await _seed_shards(shard_sessions)
+    db_session.add(
+        Film(
+            film_id=1, title="Alien", language_id=1, rental_duration=3, rental_rate=Decimal("2.99")
+        )
+    )
+    await db_session.commit()
+    await client.post(
+        "/v1/customers/2/rentals", json={"inventory_id": 2, "staff_id": 2}, headers=ADMIN
+    )
+
+    response = await client.get("/v1/films/1", params={"expand": "inventory,stock"})
+    film = response.json()
+    assert [(item["inventory_id"], item["store_id"]) for item in film["inventory"]] == [
+        (1, 1),
+        (2, 2),
+    ]
+    assert film["stock"] == [
+        {"store_id": 1, "total": 1, "available": 1},
+        {"store_id": 2, "total": 1, "available": 0},
+    ]
+
+    app.dependency_overrides[get_settings] = lambda: get_settings().model_copy(
+        update={"stock_table_enabled": False}
+    )
+    response = await client.post("/v1/stores/2/availability", json={"film_ids": [1]})
+    assert response.json()["items"] == [
+        {"film_id": 1, "total": 1, "available": 0, "in_stock": False}
+    ]
+
+
+@pytest.mark.asyncio
+async def test_analytics_are_refused_when_sharded(client, db_session, shard_sessions):
+    response = await client.get("/v1/analytics/sales-by-store")
+    assert response.status_code == 400
@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+
+from core.sse import (
+    DRAIN_FRAME,
+    HEARTBEAT_FRAME,
+    begin_drain,
+    coalesce_events,
+    drain_on_signals,
+    format_data,
+)
+
+
+async def _pieces(items, delay=0.0):
+    for item in items:
+        if delay:
+            await asyncio.sleep(delay)
+        yield item
+
+
+@pytest.mark.asyncio
+async def test_coalesce_events_batches_pieces_by_window():
+    events = coalesce_events(
+        _pieces(["Hel", "lo", " world"]), max_bytes=1024, window=0.05, heartbeat=10
+    )
+
+    frames = [frame async for frame in events]
+
+    assert frames == ["data: Hello world\n\n"]
+
+
+@pytest.mark.asyncio
+async def test_coalesce_events_flushes_on_byte_limit_and_splits_lines():
+    events = coalesce_events(_pieces(["ab", "cd", "e\nf"]), max_bytes=4, window=10, heartbeat=10)
+
+    frames = [frame async for frame in events]
+
+    assert frames == ["data: abcd\n\n", "data: e\ndata: f\n\n"]
+    assert format_data("x") == "data: x\n\n"
+
+
+@pytest.mark.asyncio
+async def test_coalesce_events_sends_heartbeats_while_idle():
+    events = coalesce_events(_pieces(["late"], delay=0.08), max_bytes=0, window=0, heartbeat=0.03)
+
+    frames = [frame async for frame in events]
+
+    assert HEARTBEAT_FRAME in frames
+    assert frames[-1] == "data: late\n\n"
+
+
+@pytest.mark.asyncio
+async def test_coalesce_events_cancels_upstream_on_disconnect():
+    upstream_closed = asyncio.Event()
+
+    async def endless():
+        try:
+            while True:
+                yield "token "
+                await asyncio.sleep(0.01)
+        finally:
+            upstream_closed.set()
+
+    checks = 0
+
+    async def is_disconnected() -> bool:
+        nonlocal checks
+        checks += 1
+        return checks > 1
+
+    events = coalesce_events(
+        endless(), max_bytes=0, window=0, heartbeat=10, is_disconnected=is_disconnected
+    )
+    frames = [frame async for frame in events]
+
+    assert frames == ["data: token \n\n"]
+    assert upstream_closed.is_set()
+
+
+@pytest.mark.asyncio
+async def test_coalesce_events_drains_open_streams_on_shutdown():
+    upstream_closed = asyncio.Event()
+
+    async def endless():
+        try:
+            while True:
+                yield "token "
+                await asyncio.sleep(0.01)
+        finally:
+            upstream_closed.set()
+
+    events = coalesce_events(endless(), max_bytes=1024, window=10, heartbeat=10, drain_grace=0.03)
+
+    with drain_on_signals():
+
+        async def collect():
+            return [frame async for frame in events]
+
+        task = asyncio.create_task(collect())
+        await asyncio.sleep(0.02)
+        begin_drain()
+        frames = await asyncio.wait_for(task, 1)
+
+    assert frames[-1] == DRAIN_FRAME
+    assert frames[0].startswith("data: token token")
+    assert upstream_closed.is_set()
@@ -0,0 +1,93 @@
+import pytest
+
+from domain.models import Store
+from domain.services import StockService
+from tests.conftest import seed_base_data
+
+ADMIN = {"Authorization": "Bearer dvd_admin"}
+
+
+async def _seed_store(session) -> dict[str, int | str]:
+    data = await seed_base_data(session)
+    session.add_all(
+        [
+            Store(store_id=1, manager_staff_id=1, address_id=1),
+            Store(store_id=2, manager_staff_id=2, address_id=2),
+        ]
+    )
+    await session.commit()
+    return data
+
+
+@pytest.mark.asyncio
+async def test_availability_follows_rentals_without_querying(client, db_session):
+    data = await _seed_store(db_session)
+    film_id = data["film_id"]
+
+    response = await client.post("/v1/stores/1/availability", json={"film_ids": [film_id, 999]})
+    assert response.status_code == 200
+    assert response.json()["items"] == [
+        {"film_id": film_id, "total": 1, "available": 1, "in_stock": True},
+        {"film_id": 999, "total": 0, "available": 0, "in_stock": False},
+    ]
+
+    rental = await client.post(
+        f"/v1/customers/{data['customer_id']}/rentals",
+        json={"inventory_id": data["inventory_id"], "staff_id": 1},
+        headers=ADMIN,
+    )
+    response = await client.post("/v1/stores/1/availability", json={"film_ids": [film_id]})
+    assert response.json()["items"][0]["available"] == 0
+    assert 'desc="0 queries"' in response.headers["server-timing"]
+
+    await client.post(f"/v1/rentals/{rental.json()['rental_id']}/return", headers=ADMIN)
+    response = await client.post("/v1/stores/1/availability", json={"film_ids": [film_id]})
+    assert response.json()["items"][0]["in_stock"] is True
+
+    response = await client.post("/v1/stores/2/availability", json={"film_ids": [film_id]})
+    assert response.json()["items"][0]["total"] == 0
+    response = await client.post("/v1/stores/3/availability", json={"film_ids": [film_id]})
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_availability_without_table_matches_table(client, db_session):
+    data = await _seed_store(db_session)
+    await client.post(
+        f"/v1/customers/{data['customer_id']}/rentals",
+        json={"inventory_id": data["inventory_id"], "staff_id": 1},
+        headers=ADMIN,
+    )
+
+    direct = await StockService(db_session, use_table=False).availability(1, [data["film_id"]])
+    cached = await StockService(db_session).availability(1, [data["film_id"]])
+
+    assert direct.items == cached.items
+    assert direct.items[0].available == 0
+    assert direct.age_seconds is None
+
+
+@pytest.mark.asyncio
+async def test_double_checkout_keeps_the_copy_out_until_its_last_return(client, db_session):
+    data = await _seed_store(db_session)
+    film_id = data["film_id"]
+    await client.post("/v1/stores/1/availability", json={"film_ids": [film_id]})
+
+    rental_ids = []
+    for _ in range(2):
+        rental = await client.post(
+            f"/v1/customers/{data['customer_id']}/rentals",
+            json={"inventory_id": data["inventory_id"], "staff_id": 1},
+            headers=ADMIN,
+        )
+        rental_ids.append(rental.json()["rental_id"])
+
+    await client.post(f"/v1/rentals/{rental_ids[0]}/return", headers=ADMIN)
+    response = await client.post("/v1/stores/1/availability", json={"film_ids": [film_id]})
+    assert response.json()["items"][0]["available"] == 0
+    direct = await StockService(db_session, use_table=False).availability(1, [film_id])
+    assert direct.items[0].available == 0
+
+    await client.post(f"/v1/rentals/{rental_ids[1]}/return", headers=ADMIN)
+    response = await client.post("/v1/stores/1/availability", json={"film_ids": [film_id]})
+    assert response.json()["items"][0]["available"] == 1